@@ -1,25 +1,53 @@
 # -*- coding: utf-8 -*-
 
 import asyncio
+import importlib
 import ipaddress
 from ipaddress import IPv4Address, IPv6Address
 import logging
 import socket
 import sys
-from typing import Optional, Union, Iterator
-
-import tldextract
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Iterable, Optional, Union, Iterator
 
+from async43 import psl
+from async43.bulk import BulkResult, BulkRunner
+from async43.cache import IanaCache, ReferralMemo
 from async43.exceptions import WhoisError, WhoisNonRoutableIPError, WhoisNetworkError, PywhoisError
-from async43.model import Whois, SoaRecord, DnsInfo
-from async43.net.resolve import resolve_dns_bundle
-from async43.parser import parse
+from async43.journal import BulkJournal
+from async43.net.priority import INTERACTIVE, current_priority, priority
+from async43.net.ratelimit import TokenBucket
 from async43.whois import NICClient
 
+if TYPE_CHECKING:
+    from async43.model import Whois
+
 logger = logging.getLogger("async43")
-extractor = tldextract.TLDExtract(include_psl_private_domains=True)
 IPAddress = Union[IPv4Address, IPv6Address]
 
+# Public names imported on first access: they pull in the parser and its
+# fuzzy matching and geo tables, pydantic and dnspython
+_LAZY_ATTRIBUTES = {
+    "parse": "async43.parser",
+    "Whois": "async43.model",
+    "SoaRecord": "async43.model",
+    "DnsInfo": "async43.model",
+    "resolve_dns_bundle": "async43.net.resolve",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name == "extractor":
+        # The tldextract instance this module used to build on import
+        value = psl._extractor()  # pylint: disable=protected-access
+        globals()[name] = value
+        return value
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
 
 def parse_ip(value: str) -> Optional[IPAddress]:
     """
@@ -67,6 +95,7 @@ class WhoisClient:
             timeout: int = 10,
             prefer_ipv6: bool = False,
             ipv6_cycle: Optional[Iterator[str]] = None,
+            nic_client: Optional[NICClient] = None,
     ):
         """
         Initialize the WHOIS client.
@@ -79,6 +108,8 @@ class WhoisClient:
             timeout: timeout for WHOIS request (default 10 seconds)
             prefer_ipv6: whether to prefer IPv6 connections (default False)
             ipv6_cycle: iterator for cycling through IPv6 addresses
+            nic_client: preconfigured NICClient to use instead of creating one
+                (prefer_ipv6 and ipv6_cycle are then ignored)
         """
         self.command = command
         self.executable = executable
@@ -88,13 +119,18 @@ class WhoisClient:
         self.prefer_ipv6 = prefer_ipv6
         self.ipv6_cycle = ipv6_cycle
 
-        self._nic_client = None
-        if not command:
+        self._nic_client = nic_client
+        if not command and nic_client is None:
             self._nic_client = NICClient(
                 prefer_ipv6=prefer_ipv6,
                 ipv6_cycle=ipv6_cycle
             )
 
+    @property
+    def nic_client(self) -> Optional[NICClient]:
+        """The NICClient running the queries, None in command mode."""
+        return self._nic_client
+
     async def _fetch_whois_text(self, domain: str, flags: int) -> str:
         """Fetch raw WHOIS text for a domain."""
         if self.command:
@@ -122,9 +158,15 @@ class WhoisClient:
         if self.convert_punycode:
             punycode_domain = domain.encode("idna").decode("utf-8")
 
-        text = await self._nic_client.whois_lookup(
-            None, punycode_domain, flags, timeout=self.timeout
-        )
+        lane, deadline = current_priority()
+        if lane == INTERACTIVE and deadline is None:
+            # Interactive lookups must start within the timeout
+            deadline = asyncio.get_running_loop().time() + self.timeout
+        with priority(lane, deadline):
+            # extract_domain() gives a domain under a public suffix
+            text = await self._nic_client.whois_lookup(
+                None, punycode_domain, flags, timeout=self.timeout, registrable=True
+            )
 
         if not text:
             raise WhoisError("Whois command returned no output")
@@ -136,7 +178,7 @@ class WhoisClient:
             url: str,
             flags: int = 0,
             enrich_dns: Optional[bool] = False,
-    ) -> Whois:
+    ) -> "Whois":
         """
         Perform a WHOIS lookup for the given URL.
 
@@ -151,6 +193,11 @@ class WhoisClient:
         Raises:
             WhoisError: if the WHOIS lookup fails
         """
+        # pylint: disable=import-outside-toplevel
+        from async43.model import DnsInfo, SoaRecord
+        from async43.net.resolve import resolve_dns_bundle
+        from async43.parser import parse
+
         domain = await extract_domain(url)
 
         # Use instance default if not overridden
@@ -192,12 +239,59 @@ class WhoisClient:
 
         return whois_object
 
+    def bulk(
+            self,
+            urls: Union[Iterable[str], AsyncIterable[str]],
+            flags: int = 0,
+            concurrency: int = 10,
+            max_attempts: int = 5,
+            per_server: int = 4,
+            rate: Optional[float] = None,
+            journal: Optional[BulkJournal] = None,
+    ) -> AsyncIterator[BulkResult]:
+        """
+        Perform WHOIS lookups for many URLs, yielding results as they complete.
+
+        Lookups wait in one queue per WHOIS server and servers take turns,
+        so a slow server only delays its own lookups. Servers answering with
+        a quota reply are backed off from and the affected lookups requeued,
+        see ``BulkRunner``.
+
+        Args:
+            urls: the URLs or domains to search whois, may be a lazy iterator
+                or an async iterable
+            flags: flags to pass to the whois client (default 0)
+            concurrency: maximum number of lookups in flight (default 10)
+            max_attempts: quota replies after which a lookup fails (default 5)
+            per_server: maximum number of lookups in flight per server, unless
+                the NICClient has adaptive limits (default 4)
+            rate: maximum number of lookups started per second, across all
+                servers (default None, unlimited)
+            journal: journal of completed lookups; lookups it has a final
+                outcome for are skipped and new outcomes are recorded, so an
+                interrupted job can be resumed (default None)
+
+        Returns:
+            Async iterator of BulkResult, in completion order
+        """
+        runner = BulkRunner(
+            self,
+            concurrency=concurrency,
+            max_attempts=max_attempts,
+            per_server=per_server,
+            rate_limit=TokenBucket(rate) if rate else None,
+            journal=journal,
+        )
+        return runner.run(urls, flags=flags)
+
     async def __aenter__(self):
         """Support async context manager."""
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Support async context manager."""
+        if self._nic_client is not None:
+            await self._nic_client.close()
 
 
 async def whois(
@@ -211,7 +305,7 @@ async def whois(
         enrich_dns: bool = False,
         prefer_ipv6: bool = False,
         ipv6_cycle: Optional[Iterator[str]] = None,
-) -> Whois:
+) -> "Whois":
     """
     Convenience function for one-off WHOIS lookups.
 
@@ -263,7 +357,7 @@ async def extract_domain(url: str) -> str:
         hostname = await resolve_ip_to_hostname(ip)
         return await extract_domain(hostname)
 
-    ext = extractor(url)
+    ext = psl.extract(url)
     return ext.top_domain_under_public_suffix
 
 
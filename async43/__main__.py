@@ -0,0 +1,7 @@
+import sys
+
+from async43.cli import main
+
+# Worker processes of "--workers" import this module again (spawn start method)
+if __name__ == "__main__":
+    sys.exit(main())
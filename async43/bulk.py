@@ -0,0 +1,435 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterable, Optional, Union
+
+from async43.exceptions import WhoisError, WhoisInternalError, WhoisQuotaExceededError
+from async43.net.priority import BACKGROUND, priority
+from async43.net.ratelimit import TokenBucket
+
+if TYPE_CHECKING:
+    from async43 import WhoisClient
+    from async43.journal import BulkJournal
+    from async43.model import Whois
+
+logger = logging.getLogger("async43")
+
+# Queue of the jobs whose server could not be determined (command mode, IANA failure...)
+UNKNOWN_SERVER = ""
+
+
+@dataclass
+class BulkResult:
+    """Outcome of one query of a bulk job."""
+    query: str
+    whois: Optional["Whois"] = None
+    error: Optional[WhoisError] = None
+    server: Optional[str] = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the lookup succeeded."""
+        return self.error is None
+
+
+def _as_whois_error(query: str, exception: Exception) -> WhoisError:
+    """
+    Wrap an exception that is not a ``WhoisError`` so that it fails its
+    query only, instead of the whole bulk job.
+    """
+    if isinstance(exception, ValueError):
+        # Invalid input, e.g. a label too long for the IDNA codec (UnicodeError)
+        error: WhoisError = WhoisError(f"Invalid query {query!r}: {exception}")
+    else:
+        error = WhoisInternalError(f"Unexpected error for {query!r}: {type(exception).__name__}: {exception}")
+    error.__cause__ = exception
+    return error
+
+
+@dataclass
+class _Job:
+    query: str
+    domain: Optional[str] = None
+    server: Optional[str] = None
+    attempts: int = 0
+    ready_at: float = 0.0
+    # Server that sent the last quota reply, a registrar one after a referral
+    throttled_by: Optional[str] = None
+    # Queue the job was taken from, until it is done
+    dispatched_from: str = UNKNOWN_SERVER
+
+    @property
+    def queue(self) -> str:
+        """
+        Key of the scheduler queue the job belongs to: the server that
+        throttled it if any, so that it waits for that server's back-off.
+        """
+        return self.throttled_by or self.server or UNKNOWN_SERVER
+
+
+class _Inputs:
+    """
+    Queries of a bulk job, from an iterable or an async iterable.
+
+    An async iterable is read by one task at a time, ``reading``, which the
+    runner waits on with its lookups, so a slow input never blocks the
+    lookups in flight. ``keep`` filters the queries out, e.g. the ones a
+    journal has an outcome for.
+    """
+
+    def __init__(
+            self,
+            queries: Union[Iterable[str], AsyncIterable[str]],
+            keep: Optional[Callable[[str], bool]] = None,
+    ):
+        self.keep = keep
+        self.reading: Optional[asyncio.Task] = None
+        self._sync = None if isinstance(queries, AsyncIterable) else iter(queries)
+        self._async = aiter(queries) if isinstance(queries, AsyncIterable) else None
+        self._ready: deque[str] = deque()
+        self._exhausted = False
+
+    def take(self) -> Optional[str]:
+        """Return the next query if one is available now, starting to read one otherwise."""
+        if self._sync is not None:
+            return next(self._sync if self.keep is None else filter(self.keep, self._sync), None)
+        if self._ready:
+            return self._ready.popleft()
+        if self.reading is None and not self._exhausted:
+            self.reading = asyncio.create_task(self._read())
+        return None
+
+    async def _read(self) -> None:
+        try:
+            query = await anext(self._async)
+        except StopAsyncIteration:
+            self._exhausted = True
+            return
+        if self.keep is None or self.keep(query):
+            self._ready.append(query)
+
+    def received(self) -> None:
+        """Handle the end of the ``reading`` task."""
+        task, self.reading = self.reading, None
+        task.result()
+
+    def close(self) -> None:
+        """Stop reading."""
+        if self.reading is not None:
+            self.reading.cancel()
+
+
+class FairScheduler:
+    """
+    Per-server queues of bulk jobs, dispatched round-robin.
+
+    Each server only gets as many jobs in flight as ``capacity(server)``
+    allows and none while it is backed off, so a slow or throttled server
+    only delays its own queries. Servers with queued work take turns.
+    Requeued jobs wait aside until their ``ready_at`` time, without holding
+    up the other jobs of their server.
+    """
+
+    def __init__(self, capacity: Callable[[str], int], backoff_until: Callable[[str], float]):
+        """
+        :param capacity: Returns the number of jobs a server may have in flight.
+        :param backoff_until: Returns the loop time before which a server must
+            not be sent anything.
+        """
+        self.capacity = capacity
+        self.backoff_until = backoff_until
+        self._queues: OrderedDict[str, deque[_Job]] = OrderedDict()
+        self._delayed: dict[str, list[tuple[float, int, _Job]]] = {}
+        self._in_flight: dict[str, int] = {}
+        self._order = itertools.count()
+        self._size = 0
+
+    def push(self, job: _Job) -> None:
+        """Queue a job on its server."""
+        if job.ready_at:
+            heapq.heappush(self._delayed.setdefault(job.queue, []), (job.ready_at, next(self._order), job))
+            self._queues.setdefault(job.queue, deque())
+        else:
+            self._queues.setdefault(job.queue, deque()).append(job)
+        self._size += 1
+
+    def _ready_at(self, server: str) -> float:
+        """Loop time from which a job of ``server`` may be sent."""
+        ready_at = 0.0 if self._queues[server] else self._delayed[server][0][0]
+        return max(self.backoff_until(server), ready_at)
+
+    def _take(self, server: str, now: float) -> _Job:
+        """Remove the next job of ``server``, requeued ones whose delay is over first."""
+        delayed = self._delayed.get(server)
+        if delayed and delayed[0][0] <= now:
+            job = heapq.heappop(delayed)[2]
+        else:
+            job = self._queues[server].popleft()
+        if not self._queues[server] and not delayed:
+            del self._queues[server]
+            self._delayed.pop(server, None)
+        return job
+
+    def pop(self, now: float) -> Optional[_Job]:
+        """
+        Take the next job to run, from the first server in turn that has
+        room and is not backed off, or None if no server can take one.
+        """
+        for server in list(self._queues):
+            if self._in_flight.get(server, 0) >= self.capacity(server) or self._ready_at(server) > now:
+                continue
+
+            # This server had its turn
+            self._queues.move_to_end(server)
+            job = self._take(server, now)
+            job.dispatched_from = server
+            self._size -= 1
+            self._in_flight[server] = self._in_flight.get(server, 0) + 1
+            return job
+        return None
+
+    def done(self, job: _Job) -> None:
+        """Free the slot of a job that was running."""
+        # job.queue changes when the job gets throttled by another server
+        self._in_flight[job.dispatched_from] -= 1
+
+    def next_wakeup(self, now: float) -> Optional[float]:
+        """Seconds until a server with only waiting work may be sent to again."""
+        waits = [self._ready_at(server) - now for server in self._queues]
+        waits = [wait for wait in waits if wait > 0]
+        return min(waits) if waits else None
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class BulkRunner:
+    """
+    Runs many lookups through a ``WhoisClient`` with bounded concurrency.
+
+    The WHOIS server of each query is determined first (``choose_server``)
+    and the query waits in that server's queue of a ``FairScheduler``. Up to
+    ``per_server`` queries, or the background share of the server's
+    adaptive limit when the client has ``limits``, run at once for one
+    server. Lookups run in the ``BACKGROUND`` priority class so that
+    interactive lookups made meanwhile by the same client go first.
+
+    When a server answers with a quota reply, the runner backs off from that
+    server for the announced delay (or ``backoff`` seconds) and puts the
+    query back in that server's queue instead of failing it. When the reply
+    comes from the registrar server a registry referred to, the registrar is
+    backed off from and the registry keeps being queried for the other
+    queries. Queries for other servers keep flowing in the meantime. A query
+    is given up after ``max_attempts`` quota replies.
+
+    With a ``rate_limit`` bucket, every attempt also waits for a token, which
+    caps the number of lookups started per second across all servers.
+
+    With a ``journal``, queries it has a final outcome for are skipped and
+    each result is recorded once the consumer asks for the next one, so a
+    job killed midway resumes where its output stopped.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+            self,
+            client: "WhoisClient",
+            concurrency: int = 10,
+            max_attempts: int = 5,
+            backoff: float = 60,
+            per_server: int = 4,
+            max_pending: int = 1000,
+            rate_limit: Optional[TokenBucket] = None,
+            journal: Optional["BulkJournal"] = None,
+    ):
+        """
+        :param client: Client running the lookups.
+        :param concurrency: Maximum number of lookups in flight.
+        :param max_attempts: Quota replies after which a query fails.
+        :param backoff: Seconds to stay away from a server after a quota
+            reply that doesn't announce a delay.
+        :param per_server: Maximum number of lookups in flight per server,
+            when the client has no adaptive limits.
+        :param max_pending: Maximum number of queries read ahead from the
+            input and waiting in the server queues.
+        :param rate_limit: Optional bucket every attempt takes a token from.
+        :param journal: Optional journal of completed queries to resume from.
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.per_server = per_server
+        self.max_pending = max_pending
+        self.rate_limit = rate_limit
+        self.journal = journal
+        self._backoff_until: dict[str, float] = {}
+
+    def back_off(self, server: str, delay: Optional[float] = None) -> None:
+        """Stop sending queries to ``server`` for ``delay`` seconds."""
+        delay = self.backoff if delay is None else delay
+        until = asyncio.get_running_loop().time() + delay
+        self._backoff_until[server] = max(self._backoff_until.get(server, 0.0), until)
+        logger.debug("Backing off from %s for %.0f seconds", server, delay)
+
+    def backoff_until(self, server: str) -> float:
+        """Loop time before which queries must not be sent to ``server``."""
+        return self._backoff_until.get(server, 0.0)
+
+    def capacity(self, server: str) -> int:
+        """Number of lookups that may run at once for ``server``."""
+        nic_client = self.client.nic_client
+        if server != UNKNOWN_SERVER and nic_client is not None and nic_client.limits is not None:
+            return nic_client.limits.get(server).capacity(BACKGROUND)
+        return self.per_server
+
+    async def _resolve(self, job: _Job) -> tuple[_Job, Optional[BulkResult]]:
+        """
+        Determine the domain and first WHOIS server of a job.
+
+        :return: The job and, if it can't be looked up at all, its result.
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from async43 import extract_domain
+        try:
+            job.domain = await extract_domain(job.query)
+            nic_client = self.client.nic_client
+            if nic_client is not None:
+                # Speculative probes query the registry, they mustn't use the interactive share
+                with priority(BACKGROUND):
+                    job.server = await nic_client.choose_server(
+                        job.domain, timeout=self.client.timeout, registrable=True
+                    )
+        except WhoisError as exception:
+            if job.domain is None:
+                return job, BulkResult(job.query, error=exception)
+            logger.debug("Could not determine the WHOIS server of %s: %s", job.domain, exception)
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            return job, BulkResult(job.query, error=_as_whois_error(job.query, exception))
+        return job, None
+
+    async def _attempt(self, job: _Job, flags: int) -> tuple[_Job, Optional[BulkResult]]:
+        """
+        Run a job once.
+
+        :return: The job and its result, or None as result when the job
+            must be requeued.
+        """
+        if self.rate_limit is not None:
+            await self.rate_limit.acquire()
+        job.attempts += 1
+        try:
+            with priority(BACKGROUND):
+                whois = await self.client.whois(job.domain, flags=flags)
+        except WhoisQuotaExceededError as exception:
+            # Back off from, and requeue the job on, the server that answered,
+            # which is the registrar one when the referral was throttled
+            job.throttled_by = exception.server or job.server
+            if job.throttled_by is not None:
+                self.back_off(job.throttled_by, exception.retry_after)
+            if job.attempts < self.max_attempts and job.throttled_by is not None:
+                job.ready_at = self.backoff_until(job.throttled_by)
+                return job, None
+            return job, BulkResult(job.query, error=exception, server=job.server, attempts=job.attempts)
+        except WhoisError as exception:
+            return job, BulkResult(job.query, error=exception, server=job.server, attempts=job.attempts)
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            error = _as_whois_error(job.query, exception)
+            return job, BulkResult(job.query, error=error, server=job.server, attempts=job.attempts)
+
+        return job, BulkResult(job.query, whois=whois, server=job.server, attempts=job.attempts)
+
+    async def run(
+            self,
+            queries: Union[Iterable[str], AsyncIterable[str]],
+            flags: int = 0,
+    ) -> AsyncIterator[BulkResult]:
+        """
+        Look up every query, yielding results as they complete.
+
+        Queries are pulled from ``queries`` only when there is room in the
+        server queues, so the input may be a lazy iterator of any size. It
+        may also be an async iterable, read without holding up the lookups.
+        """
+        loop = asyncio.get_running_loop()
+        inputs = _Inputs(queries, self.journal.pending if self.journal is not None else None)
+        scheduler = FairScheduler(self.capacity, self.backoff_until)
+        resolving: set[asyncio.Task] = set()
+        running: set[asyncio.Task] = set()
+
+        try:
+            while True:
+                self._fill(inputs, scheduler, resolving, running, flags)
+                waiting = resolving | running
+                if inputs.reading is not None:
+                    waiting.add(inputs.reading)
+                if not waiting:
+                    if not scheduler:
+                        return
+                    await asyncio.sleep(scheduler.next_wakeup(loop.time()) or 0)
+                    continue
+
+                done, _ = await asyncio.wait(
+                    waiting,
+                    timeout=scheduler.next_wakeup(loop.time()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task is inputs.reading:
+                        inputs.received()
+                        continue
+                    result = self._settle(task, scheduler, resolving, running)
+                    if result is not None:
+                        yield result
+                        if self.journal is not None:
+                            self.journal.record(result)
+        finally:
+            inputs.close()
+            for task in resolving | running:
+                task.cancel()
+            if self.journal is not None:
+                self.journal.sync()
+
+    @staticmethod
+    def _settle(
+            task: asyncio.Task,
+            scheduler: FairScheduler,
+            resolving: set[asyncio.Task],
+            running: set[asyncio.Task],
+    ) -> Optional[BulkResult]:
+        """Handle a finished resolve or attempt task, requeuing its job if it has no result yet."""
+        job, result = task.result()
+        if task in resolving:
+            resolving.discard(task)
+        else:
+            running.discard(task)
+            scheduler.done(job)
+        if result is None:
+            scheduler.push(job)
+        return result
+
+    def _fill(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+            self,
+            inputs: _Inputs,
+            scheduler: FairScheduler,
+            resolving: set[asyncio.Task],
+            running: set[asyncio.Task],
+            flags: int,
+    ) -> None:
+        """Start resolving new inputs and running queued jobs while there is room."""
+        while len(resolving) < self.concurrency and len(scheduler) + len(resolving) < self.max_pending:
+            query = inputs.take()
+            if query is None:
+                break
+            resolving.add(asyncio.create_task(self._resolve(_Job(query))))
+
+        now = asyncio.get_running_loop().time()
+        while len(running) < self.concurrency:
+            job = scheduler.pop(now)
+            if job is None:
+                break
+            running.add(asyncio.create_task(self._attempt(job, flags)))
@@ -0,0 +1,408 @@
+import functools
+import ipaddress
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Union
+
+logger = logging.getLogger("async43")
+
+
+# Seconds a "no WHOIS server" answer of IANA is trusted
+IANA_NEGATIVE_TTL = 3600
+# Most writes between two evictions of an SQLite store
+EVICT_INTERVAL = 100
+
+
+class TTLStore:
+    """
+    Key/value store where each entry expires after a fixed time-to-live.
+
+    Entries live in memory by default. When a ``path`` is given they are kept
+    in a SQLite database instead, so that they survive restarts and can be
+    shared by several processes working on the same machine.
+
+    Values must be JSON serializable.
+    """
+    table = "entries"
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 86400, max_entries: int = 100_000):
+        """
+        Create a new store.
+
+        :param path: Optional SQLite database file. When None the store is
+            kept in memory and lost when the process exits.
+        :param ttl: Lifetime of an entry in seconds.
+        :param max_entries: Maximum number of entries kept. The oldest entries
+            are evicted first once the bound is reached. SQLite stores only
+            evict every few writes, and may go over it by a tenth meanwhile.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._evict_interval = max(1, min(EVICT_INTERVAL, max_entries // 10))
+        # The first write evicts what previous runs left behind
+        self._writes = self._evict_interval - 1
+        self._memory: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_expires ON {self.table} (expires)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Return the value stored for ``key``, or None if missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                entry = self._memory.get(key)
+                if entry is None:
+                    return None
+                value, expires = entry
+                if expires <= now:
+                    del self._memory[key]
+                    return None
+                return value
+
+            try:
+                row = self._db.execute(
+                    f"SELECT value, expires FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as exception:
+                logger.debug("Could not read %s from %s: %s", key, self.path, exception)
+                return None
+
+        if row is None or row[1] <= now:
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store ``value`` for ``key``, replacing any previous entry.
+
+        :param key: Entry key.
+        :param value: JSON serializable value.
+        :param ttl: Optional lifetime overriding the store default.
+        """
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if self._db is None:
+                self._memory[key] = (value, expires)
+                self._memory.move_to_end(key)
+                while len(self._memory) > self.max_entries:
+                    self._memory.popitem(last=False)
+                return
+
+            try:
+                self._db.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires),
+                )
+                self._writes += 1
+                if self._writes >= self._evict_interval:
+                    self._writes = 0
+                    self._evict()
+            except sqlite3.Error as exception:
+                logger.debug("Could not write %s to %s: %s", key, self.path, exception)
+
+    def _evict(self) -> None:
+        """Drop the expired entries, then the oldest ones over ``max_entries``. Needs the lock."""
+        self._db.execute(f"DELETE FROM {self.table} WHERE expires <= ?", (time.time(),))
+        count = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY expires LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def delete(self, key: str) -> None:
+        """Remove the entry stored for ``key`` if any."""
+        with self._lock:
+            if self._db is None:
+                self._memory.pop(key, None)
+                return
+
+            try:
+                self._db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            except sqlite3.Error as exception:
+                logger.debug("Could not delete %s from %s: %s", key, self.path, exception)
+
+    def __len__(self) -> int:
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                return sum(1 for _, expires in self._memory.values() if expires > now)
+            return self._db.execute(
+                f"SELECT COUNT(*) FROM {self.table} WHERE expires > ?", (now,)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        """Close the underlying database, if any."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class ReferralMemo(TTLStore):
+    """
+    Remembers which registrar WHOIS server a domain was referred to.
+
+    ``NICClient.whois()`` fills the memo each time it follows a
+    ``Whois Server:`` referral from a thin registry. Later lookups of the
+    same domain can then go straight to the registrar server, and answer
+    with the registrar record only, without the registry one.
+    """
+    table = "referrals"
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 7 * 86400, max_entries: int = 100_000):
+        super().__init__(path, ttl=ttl, max_entries=max_entries)
+
+
+class IanaCache(TTLStore):
+    """
+    Remembers the WHOIS server IANA gave for each TLD.
+
+    Suffixes missing from ``WHOIS_SERVERS`` are looked up at whois.iana.org.
+    An empty string is stored when IANA knows no WHOIS server for the TLD,
+    for ``negative_ttl`` seconds only: such TLDs may get one, and a wrong
+    negative entry would leave the TLD without server for the whole ``ttl``.
+    """
+    table = "iana"
+
+    def __init__(
+            self,
+            path: Optional[str] = None,
+            ttl: float = 7 * 86400,
+            max_entries: int = 10_000,
+            negative_ttl: float = IANA_NEGATIVE_TTL,
+    ):
+        """
+        :param path: Optional SQLite database file, see ``TTLStore``.
+        :param ttl: Lifetime of a server entry in seconds.
+        :param max_entries: Maximum number of entries kept.
+        :param negative_ttl: Lifetime of a "no server" entry in seconds.
+        """
+        super().__init__(path, ttl=ttl, max_entries=max_entries)
+        self.negative_ttl = negative_ttl
+
+
+def default_cache_dir() -> str:
+    """
+    Return the directory of the on-disk caches: ``$ASYNC43_CACHE_DIR`` if
+    set, else ``async43`` under ``$XDG_CACHE_HOME`` or ``~/.cache``.
+    """
+    directory = os.environ.get("ASYNC43_CACHE_DIR")
+    if directory:
+        return directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "async43")
+
+
+@functools.lru_cache(maxsize=1)
+def default_iana_cache() -> IanaCache:
+    """
+    Return the IANA cache shared by clients that weren't given one.
+
+    It is kept in ``iana.sqlite`` under ``default_cache_dir()`` so that every
+    process of the machine benefits from it, or in memory if that file
+    can't be opened.
+    """
+    path = os.path.join(default_cache_dir(), "iana.sqlite")
+    try:
+        return IanaCache(path)
+    except (OSError, sqlite3.Error) as exception:
+        logger.debug("Could not open %s, keeping IANA answers in memory: %s", path, exception)
+        return IanaCache()
+
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+_RANGE_RE = re.compile(
+    r"^[ \t]*(?:inetnum|inet6num|netrange|cidr|ip-network)[ \t]*:[ \t]*(?P<value>[^\r\n]+)",
+    flags=re.IGNORECASE | re.MULTILINE,
+)
+
+_NETNAME_RE = re.compile(r"^[ \t]*netname[ \t]*:[ \t]*(?P<value>[^\r\n]+)", flags=re.IGNORECASE | re.MULTILINE)
+# Placeholder objects that RIRs answer with for space they don't manage, such
+# as ``inetnum: 0.0.0.0 - 255.255.255.255`` after inter-RIR transfers
+PLACEHOLDER_NETNAMES = frozenset({"IANA-BLK", "IANA-NETBLOCK", "NON-RIPE-NCC-MANAGED-ADDRESS-BLOCK"})
+# Shortest prefixes that real allocations use, anything larger is a placeholder
+MIN_PREFIXLEN = {4: 8, 6: 12}
+
+
+def _parse_network(value: str) -> list[IPNetwork]:
+    """
+    Parse the value of an ``inetnum``/``NetRange``/``CIDR`` field.
+
+    Supports ``first - last`` ranges, comma separated CIDR lists and the
+    abbreviated ``200.3.12/22`` notation used by LACNIC.
+    """
+    value = value.strip()
+    if " - " in value or ("-" in value and "/" not in value):
+        first, _, last = value.partition("-")
+        try:
+            first_address = ipaddress.ip_address(first.strip())
+            last_address = ipaddress.ip_address(last.strip())
+            return list(ipaddress.summarize_address_range(first_address, last_address))
+        except (ValueError, TypeError):
+            return []
+
+    networks = []
+    for part in value.split(","):
+        part = part.strip()
+        address, _, length = part.partition("/")
+        if "." in address and ":" not in address:
+            address = ".".join((address.split(".") + ["0", "0", "0"])[:4])
+        try:
+            networks.append(ipaddress.ip_network(f"{address}/{length}" if length else address, strict=False))
+        except ValueError:
+            continue
+    return networks
+
+
+def extract_ip_ranges(text: str, address: IPAddress) -> list[IPNetwork]:
+    """
+    Find the most specific address block described by a WHOIS answer that
+    contains ``address``.
+
+    Placeholder answers of RIRs for space they don't manage, and blocks
+    larger than a /8 (IPv4) or a /12 (IPv6), are never returned.
+
+    :param text: Raw WHOIS answer for ``address``.
+    :param address: The IP address that was looked up.
+    :return: The CIDR networks covering that block, or an empty list.
+    """
+    if any(match.group("value").strip().upper() in PLACEHOLDER_NETNAMES for match in _NETNAME_RE.finditer(text)):
+        return []
+
+    best: list[IPNetwork] = []
+    best_size = 0
+    for match in _RANGE_RE.finditer(text):
+        networks = [net for net in _parse_network(match.group("value")) if net.version == address.version]
+        if not networks or not any(address in net for net in networks):
+            continue
+        if any(net.prefixlen < MIN_PREFIXLEN[net.version] for net in networks):
+            continue
+        size = sum(net.num_addresses for net in networks)
+        if not best or size < best_size:
+            best, best_size = networks, size
+    return best
+
+
+class RangeCache:
+    """
+    Caches IP WHOIS answers by the address block they describe.
+
+    An answer for one address usually covers a whole ``inetnum`` or
+    ``NetRange``, so any later address inside that block can be served from
+    memory. Blocks are indexed as CIDR networks in one hash table per prefix
+    length, a lookup probes the lengths in use from the most specific one.
+    """
+
+    def __init__(self, ttl: float = 86400, max_entries: int = 10_000):
+        """
+        Create a new cache.
+
+        :param ttl: Lifetime of a cached answer in seconds.
+        :param max_entries: Maximum number of cached answers. The least
+            recently used ones are evicted first.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, tuple[list[IPNetwork], Any, float]] = OrderedDict()
+        # version -> prefix length -> network address -> entry id
+        self._index: dict[int, dict[int, dict[int, int]]] = {4: {}, 6: {}}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def get(self, address: Union[str, IPAddress]) -> Optional[Any]:
+        """Return the cached answer covering ``address``, or None."""
+        address = ipaddress.ip_address(address)
+        value = int(address)
+        bits = address.max_prefixlen
+        now = time.time()
+        with self._lock:
+            tables = self._index[address.version]
+            for length in sorted(tables, reverse=True):
+                mask = ((1 << length) - 1) << (bits - length)
+                entry_id = tables[length].get(value & mask)
+                if entry_id is None:
+                    continue
+                _, answer, expires = self._entries[entry_id]
+                if expires <= now:
+                    self._remove(entry_id)
+                    continue
+                self._entries.move_to_end(entry_id)
+                return answer
+        return None
+
+    def add(self, networks: list[IPNetwork], answer: Any) -> None:
+        """Cache ``answer`` for every address inside ``networks``."""
+        if not networks:
+            return
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (networks, answer, time.time() + self.ttl)
+            for network in networks:
+                table = self._index[network.version].setdefault(network.prefixlen, {})
+                previous = table.get(int(network.network_address))
+                table[int(network.network_address)] = entry_id
+                if previous is not None:
+                    self._forget_network(previous, network)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def put(self, address: Union[str, IPAddress], text: str) -> bool:
+        """
+        Cache a raw WHOIS answer for ``address`` under the block it describes.
+
+        :return: True if a block containing ``address`` was found and cached.
+        """
+        address = ipaddress.ip_address(address)
+        networks = extract_ip_ranges(text, address)
+        self.add(networks, text)
+        return bool(networks)
+
+    def _forget_network(self, entry_id: int, network: IPNetwork) -> None:
+        """Detach ``network`` from an older entry that it was taken over from."""
+        networks, answer, expires = self._entries[entry_id]
+        networks = [net for net in networks if net != network]
+        if networks:
+            self._entries[entry_id] = (networks, answer, expires)
+        else:
+            del self._entries[entry_id]
+
+    def _remove(self, entry_id: int) -> None:
+        """Remove an entry and its networks from the index."""
+        networks, _, _ = self._entries.pop(entry_id)
+        for network in networks:
+            tables = self._index[network.version]
+            table = tables.get(network.prefixlen, {})
+            if table.get(int(network.network_address)) == entry_id:
+                del table[int(network.network_address)]
+                if not table:
+                    del tables[network.prefixlen]
+
+    def __len__(self) -> int:
+        return len(self._entries)
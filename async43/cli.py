@@ -0,0 +1,261 @@
+"""
+Bulk WHOIS lookups from the command line.
+
+Reads one domain, URL or IP address per line from a file or stdin and writes
+one JSON object per lookup (NDJSON) as lookups complete::
+
+    python -m async43 domains.txt --concurrency 20 --rate 10 > results.ndjson
+
+Blank lines and lines starting with ``#`` are skipped. Progress and
+throughput are reported on stderr. The input is read as lookups go, so
+memory use doesn't depend on its size.
+
+With ``--journal``, completed lookups are recorded in a SQLite journal and
+the output file is appended to. Running the same command again after an
+interruption skips the lookups already written, except those that failed
+on network or quota trouble, which are retried.
+
+With ``--workers N``, lookups are spread over N processes to use more than
+one core for parsing; ``--per-server`` and ``--rate`` still apply to the
+job as a whole.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from functools import partial
+from typing import IO, Iterable, Iterator, Optional
+
+from async43 import WhoisClient
+from async43.bulk import BulkResult
+from async43.journal import BulkJournal
+from async43.whois import NICClient
+from async43.workers import ShardedRunner
+
+
+def read_queries(stream: IO[str]) -> Iterator[str]:
+    """Yield the queries of an input stream, one per non-blank, non-comment line."""
+    for line in stream:
+        query = line.strip()
+        if query and not query.startswith("#"):
+            yield query
+
+
+def result_record(result: BulkResult, include_raw: bool = False) -> dict:
+    """
+    Convert a bulk result to the JSON object written for it.
+
+    :param result: Result of one lookup.
+    :param include_raw: Whether to keep the raw WHOIS answer (``raw_text``).
+    """
+    record: dict = {
+        "query": result.query,
+        "ok": result.ok,
+        "server": result.server,
+        "attempts": result.attempts,
+    }
+    if result.ok:
+        exclude = None if include_raw else {"raw_text"}
+        record["whois"] = result.whois.model_dump(mode="json", exclude=exclude)
+    else:
+        record["error"] = {"type": type(result.error).__name__, "message": str(result.error)}
+    return record
+
+
+class Progress:
+    """Counts results and reports progress and throughput every ``interval`` seconds."""
+
+    def __init__(self, stream: Optional[IO[str]], interval: float = 5.0):
+        """
+        :param stream: Where to write the reports, None to stay quiet.
+        :param interval: Seconds between two reports.
+        """
+        self.stream = stream
+        self.interval = interval
+        self.ok = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+
+    @property
+    def done(self) -> int:
+        """Number of lookups completed."""
+        return self.ok + self.failed
+
+    def update(self, result: BulkResult) -> bool:
+        """
+        Count a result.
+
+        :return: Whether a report was just written.
+        """
+        if result.ok:
+            self.ok += 1
+        else:
+            self.failed += 1
+        now = time.monotonic()
+        if now - self._last_report < self.interval:
+            return False
+        self._last_report = now
+        self.report()
+        return True
+
+    def report(self) -> None:
+        """Write the counters and the average throughput."""
+        if self.stream is None:
+            return
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        self.stream.write(
+            f"{self.done} done ({self.ok} ok, {self.failed} failed) "
+            f"in {elapsed:.0f}s, {self.done / elapsed:.1f}/s\n"
+        )
+        self.stream.flush()
+
+
+def write_record(output: IO[str], result: BulkResult, include_raw: bool, progress: Progress) -> None:
+    """Write the record of a result, flushing the output whenever progress is reported."""
+    output.write(json.dumps(result_record(result, include_raw), ensure_ascii=False) + "\n")
+    if progress.update(result):
+        output.flush()
+
+
+async def run_bulk(
+        client: WhoisClient,
+        queries: Iterable[str],
+        output: IO[str],
+        options: argparse.Namespace,
+        progress: Progress,
+        journal: Optional[BulkJournal] = None,
+) -> None:
+    """Run the lookups of ``queries`` and write their records to ``output``."""
+    flags = NICClient.WHOIS_QUICK if options.quick else 0
+    results = client.bulk(
+        queries,
+        flags=flags,
+        concurrency=options.concurrency,
+        max_attempts=options.max_attempts,
+        per_server=options.per_server,
+        rate=options.rate,
+        journal=journal,
+    )
+    async for result in results:
+        write_record(output, result, options.raw, progress)
+    output.flush()
+
+
+def make_client(timeout: int, prefer_ipv6: bool) -> WhoisClient:
+    """Return the client of a bulk run, picklable through ``functools.partial`` for worker processes."""
+    return WhoisClient(timeout=timeout, nic_client=NICClient(prefer_ipv6=prefer_ipv6))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the parser of the command line options."""
+    parser = argparse.ArgumentParser(
+        prog="python -m async43",
+        description="Run WHOIS lookups for every line of a file and write the results as NDJSON.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="file of domains, one per line (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON file to write (default: stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="lookups in flight (default: 10)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="worker processes, each with --concurrency lookups in flight (default: 1)")
+    parser.add_argument("--per-server", type=int, default=4, help="lookups in flight per server (default: 4)")
+    parser.add_argument("--rate", type=float, help="maximum lookups started per second (default: unlimited)")
+    parser.add_argument("--max-attempts", type=int, default=5, help="quota replies before giving up (default: 5)")
+    parser.add_argument("-t", "--timeout", type=int, default=10, help="timeout of a query in seconds (default: 10)")
+    parser.add_argument("-Q", "--quick", action="store_true", help="don't follow registrar referrals")
+    parser.add_argument("--prefer-ipv6", action="store_true", help="prefer IPv6 to reach WHOIS servers")
+    parser.add_argument("--raw", action="store_true", help="include the raw WHOIS answer in the output")
+    parser.add_argument("--journal", help="SQLite journal of completed lookups, to resume an interrupted run")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="seconds between progress reports")
+    parser.add_argument("-q", "--no-progress", action="store_true", help="don't report progress on stderr")
+    return parser
+
+
+def _sync_output(output: IO[str]) -> None:
+    """Write the output records to disk, before the journal marks them done."""
+    output.flush()
+    try:
+        os.fsync(output.fileno())
+    except (OSError, ValueError):
+        # Not a regular file (pipe, terminal...)
+        pass
+
+
+async def _run_in_process(
+        options: argparse.Namespace,
+        source: IO[str],
+        output: IO[str],
+        progress: Progress,
+        journal: Optional[BulkJournal],
+) -> None:
+    async with make_client(options.timeout, options.prefer_ipv6) as client:
+        await run_bulk(client, read_queries(source), output, options, progress, journal)
+
+
+def _run_in_workers(
+        options: argparse.Namespace,
+        source: IO[str],
+        output: IO[str],
+        progress: Progress,
+        journal: Optional[BulkJournal],
+) -> None:
+    runner = ShardedRunner(
+        workers=options.workers,
+        client_factory=partial(make_client, options.timeout, options.prefer_ipv6),
+        concurrency=options.concurrency,
+        max_attempts=options.max_attempts,
+        per_server=options.per_server,
+        rate=options.rate,
+        journal=journal,
+    )
+    flags = NICClient.WHOIS_QUICK if options.quick else 0
+    results = runner.run(read_queries(source), flags=flags)
+    try:
+        for result in results:
+            write_record(output, result, options.raw, progress)
+        output.flush()
+    finally:
+        results.close()
+
+
+def _main(options: argparse.Namespace, source: IO[str], output: IO[str]) -> None:
+    progress = Progress(None if options.no_progress else sys.stderr, options.progress_interval)
+    journal = None
+    if options.journal:
+        journal = BulkJournal(options.journal, before_sync=lambda: _sync_output(output))
+    try:
+        if options.workers > 1:
+            _run_in_workers(options, source, output, progress, journal)
+        else:
+            asyncio.run(_run_in_process(options, source, output, progress, journal))
+    finally:
+        progress.report()
+        if journal is not None:
+            journal.close()
+            if progress.stream is not None:
+                progress.stream.write(f"{journal.skipped} skipped as already done\n")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point of ``python -m async43``."""
+    options = build_parser().parse_args(argv)
+    if min(options.concurrency, options.per_server, options.workers) < 1 or (
+            options.rate is not None and options.rate <= 0):
+        build_parser().error("--concurrency, --workers, --per-server and --rate must be positive")
+
+    # pylint: disable=consider-using-with
+    source = sys.stdin if options.input == "-" else open(options.input, encoding="utf-8", errors="replace")
+    mode = "a" if options.journal else "w"
+    output = sys.stdout if options.output == "-" else open(options.output, mode, encoding="utf-8")
+    try:
+        _main(options, source, output)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    return 0
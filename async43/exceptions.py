@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class PywhoisError(Exception):
     """
     Base exception for all errors raised by the pywhois/async43 package.
@@ -26,6 +29,28 @@ class WhoisNetworkError(WhoisError):
     """
 
 
+class WhoisCircuitOpenError(WhoisNetworkError):
+    """
+    Raised without contacting a WHOIS server whose circuit breaker is open.
+
+    The server failed repeatedly and is given time to recover. ``server`` is
+    the WHOIS server concerned.
+    """
+
+    def __init__(self, message: str, server: Optional[str] = None):
+        super().__init__(message)
+        self.server = server
+
+
+class WhoisDeadlineExceededError(WhoisError):
+    """
+    Raised when a query could not be sent before its deadline.
+
+    The WHOIS server was not contacted: the query was still waiting for one
+    of the server's concurrency slots, taken by more urgent queries.
+    """
+
+
 class WhoisInternalError(WhoisError):
     """
     Raised when an unexpected internal error occurs.
@@ -76,9 +101,16 @@ class WhoisQuotaExceededError(WhoisError):
     Raised when a WHOIS query quota or rate limit has been exceeded.
 
     This may be enforced by the registry or WHOIS server and usually
-    requires waiting before retrying.
+    requires waiting before retrying. ``server`` is the WHOIS server that
+    refused the query and ``retry_after`` the delay in seconds it announced,
+    when known.
     """
 
+    def __init__(self, message: str, server: Optional[str] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.server = server
+        self.retry_after = retry_after
+
 
 class WhoisUnknownDateFormatError(WhoisError):
     """
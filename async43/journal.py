@@ -0,0 +1,122 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import Callable, Optional
+
+from async43.bulk import BulkResult
+from async43.exceptions import (
+    WhoisDeadlineExceededError,
+    WhoisInternalError,
+    WhoisNetworkError,
+    WhoisQuotaExceededError,
+)
+
+logger = logging.getLogger("async43")
+
+# Failures worth another try in a later run: the query itself is fine
+RETRYABLE_ERRORS = (WhoisNetworkError, WhoisQuotaExceededError, WhoisInternalError, WhoisDeadlineExceededError)
+
+DONE = "done"
+FAILED = "failed"
+RETRY = "retry"
+
+
+def is_retryable(result: BulkResult) -> bool:
+    """Whether a failed lookup may succeed if run again (network or quota trouble)."""
+    return result.error is not None and isinstance(result.error, RETRYABLE_ERRORS)
+
+
+class BulkJournal:
+    """
+    Journal of the queries a bulk job has completed, to resume it after a
+    crash or a restart.
+
+    Outcomes are kept in a SQLite database. Successful lookups and failures
+    that would fail again (domain not found, non-routable address...) are
+    final: a resumed job skips them. Lookups that failed on network or
+    quota trouble are recorded too, but run again.
+
+    Records are committed, and synced to disk, every ``sync_interval``
+    seconds and when the journal is closed, so a crash loses at most that
+    much work. ``before_sync`` is called right before each commit, for the
+    caller to flush the output the records refer to.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            sync_interval: float = 5.0,
+            before_sync: Optional[Callable[[], None]] = None,
+    ):
+        """
+        :param path: SQLite database file, created if needed.
+        :param sync_interval: Seconds between two commits.
+        :param before_sync: Optional callable run before each commit.
+        """
+        self.path = path
+        self.sync_interval = sync_interval
+        self.before_sync = before_sync
+        self.skipped = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes "
+            "(query TEXT PRIMARY KEY, status TEXT NOT NULL, error TEXT, updated REAL NOT NULL)"
+        )
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def is_done(self, query: str) -> bool:
+        """Whether ``query`` has a final outcome and must be skipped."""
+        row = self._db.execute("SELECT status FROM outcomes WHERE query = ?", (query,)).fetchone()
+        return row is not None and row[0] != RETRY
+
+    def pending(self, query: str) -> bool:
+        """Whether ``query`` must be run, counting it as skipped if not."""
+        if self.is_done(query):
+            self.skipped += 1
+            return False
+        return True
+
+    def record(self, result: BulkResult) -> None:
+        """Record the outcome of a lookup, committing if the sync interval is over."""
+        if result.ok:
+            status, error = DONE, None
+        else:
+            status = RETRY if is_retryable(result) else FAILED
+            error = f"{type(result.error).__name__}: {result.error}"
+
+        if not self._pending:
+            self._db.execute("BEGIN")
+        self._db.execute(
+            "INSERT OR REPLACE INTO outcomes (query, status, error, updated) VALUES (?, ?, ?, ?)",
+            (result.query, status, error, time.time()),
+        )
+        self._pending += 1
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Commit the pending records to disk."""
+        self._last_sync = time.monotonic()
+        if not self._pending:
+            return
+        if self.before_sync is not None:
+            self.before_sync()
+        self._db.execute("COMMIT")
+        logger.debug("Journal %s: committed %d records", self.path, self._pending)
+        self._pending = 0
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of queries per status."""
+        return dict(self._db.execute("SELECT status, COUNT(*) FROM outcomes GROUP BY status").fetchall())
+
+    def close(self) -> None:
+        """Commit the pending records and close the database."""
+        self.sync()
+        self._db.close()
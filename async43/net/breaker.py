@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from async43.exceptions import WhoisCircuitOpenError, WhoisNetworkError
+
+logger = logging.getLogger("async43")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Errors telling that a server can't be reached
+FAILURE_ERRORS = (WhoisNetworkError, asyncio.TimeoutError, OSError)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of one WHOIS server.
+
+    After ``failure_threshold`` consecutive network failures the circuit
+    opens and queries fail immediately. Once ``cooldown`` seconds have
+    passed it becomes half-open: up to ``probes`` queries go through, and
+    ``probes`` successes in a row close it again while any failure reopens
+    it for another cooldown.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30, probes: int = 1):
+        """
+        :param failure_threshold: Consecutive failures opening the circuit.
+        :param cooldown: Seconds the circuit stays open.
+        :param probes: Queries let through, and successes needed, while half-open.
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probes = probes
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: ``closed``, ``open`` or ``half-open``."""
+        if self.opened_at is None:
+            return CLOSED
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return OPEN
+        return HALF_OPEN
+
+    def retry_in(self) -> float:
+        """Seconds left before the circuit becomes half-open."""
+        if self.opened_at is None:
+            return 0.0
+        return max(self.opened_at + self.cooldown - time.monotonic(), 0.0)
+
+    def allow(self) -> bool:
+        """Whether a query may go through now, taking a probe slot if half-open."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == OPEN or self._probes_in_flight >= self.probes:
+            return False
+        self._probes_in_flight += 1
+        return True
+
+    def record_success(self, probe: bool) -> None:
+        """Record a successful query."""
+        if not probe:
+            self.failures = 0
+            return
+        self._probes_in_flight -= 1
+        self._probe_successes += 1
+        if self._probe_successes >= self.probes:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_successes = 0
+
+    def record_failure(self, probe: bool) -> None:
+        """Record a failed query, opening the circuit if needed."""
+        self.failures += 1
+        if probe:
+            self._probes_in_flight -= 1
+        if probe or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self._probe_successes = 0
+
+    def record_neutral(self, probe: bool) -> None:
+        """Release a probe slot after a query that tells nothing about the server."""
+        if probe:
+            self._probes_in_flight -= 1
+
+
+class BreakerGuard:
+    """
+    Async context manager letting one query through a circuit breaker.
+
+    :raises WhoisCircuitOpenError: On enter, if the circuit is open.
+    """
+
+    def __init__(self, hostname: str, breaker: CircuitBreaker):
+        self.hostname = hostname
+        self.breaker = breaker
+        self._probe = False
+
+    async def __aenter__(self) -> "BreakerGuard":
+        self._probe = self.breaker.state == HALF_OPEN
+        if not self.breaker.allow():
+            raise WhoisCircuitOpenError(
+                f"Circuit open for {self.hostname}, retrying in {self.breaker.retry_in():.0f}s",
+                server=self.hostname,
+            )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
+        was_open = self.breaker.opened_at is not None
+        if exc_type is None:
+            self.breaker.record_success(self._probe)
+        elif issubclass(exc_type, FAILURE_ERRORS):
+            self.breaker.record_failure(self._probe)
+        else:
+            self.breaker.record_neutral(self._probe)
+
+        is_open = self.breaker.opened_at is not None
+        if is_open != was_open:
+            logger.debug("Circuit of %s is now %s", self.hostname, self.breaker.state)
+        return False
+
+
+class BreakerRegistry:
+    """Circuit breakers of every WHOIS server a client talks to, created on first use."""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30, probes: int = 1):
+        """
+        See ``CircuitBreaker`` for the parameters.
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.probes = probes
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, hostname: str) -> CircuitBreaker:
+        """Return the breaker of ``hostname``, creating it if needed."""
+        key = hostname.lower()
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(self.failure_threshold, self.cooldown, self.probes)
+        return breaker
+
+    def guard(self, hostname: str) -> BreakerGuard:
+        """Return a context manager letting one query to ``hostname`` through."""
+        return BreakerGuard(hostname, self.get(hostname))
+
+    def states(self) -> dict[str, dict]:
+        """Return the state of every known server's breaker."""
+        return {
+            hostname: {
+                "state": breaker.state,
+                "consecutive_failures": breaker.failures,
+                "retry_in": round(breaker.retry_in(), 1),
+            }
+            for hostname, breaker in self._breakers.items()
+        }
@@ -0,0 +1,148 @@
+import asyncio
+import re
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Optional
+
+
+class BulkProtocol(ABC):
+    """
+    Base class of the protocols used to send many queries over one WHOIS
+    session and split the answers back per query.
+
+    Subclasses encode a batch of queries into the bytes sent to the server and
+    read the answers from the stream in the same order as the queries.
+    """
+
+    @abstractmethod
+    def encode(self, queries: list[str]) -> bytes:
+        """Return the bytes to send to the server for a batch of queries."""
+
+    @abstractmethod
+    async def read_answers(
+            self,
+            reader: asyncio.StreamReader,
+            queries: list[str],
+            timeout: float,
+    ) -> AsyncIterator[tuple[str, str]]:
+        """
+        Read the answers of a batch, yielding (query, answer) pairs as they arrive.
+
+        :raises asyncio.IncompleteReadError: If the server closed the
+            connection before every answer was received.
+        """
+
+    @staticmethod
+    async def _readline(reader: asyncio.StreamReader, timeout: float) -> str:
+        """Read one line, raising IncompleteReadError at end of stream."""
+        line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+        if not line:
+            raise asyncio.IncompleteReadError(line, None)
+        return line.decode("utf-8", "replace").rstrip("\r\n")
+
+
+class CymruBulkProtocol(BulkProtocol):
+    """
+    Team Cymru style ``begin``/``end`` bulk interface.
+
+    Queries are IP addresses or ``AS<number>`` and each one gets exactly one
+    answer line, errors included, in the order of the queries.
+    """
+
+    def __init__(self, verbose: bool = False):
+        """
+        :param verbose: Ask for the verbose output (country, registry,
+            allocation date and AS name columns).
+        """
+        self.verbose = verbose
+
+    def encode(self, queries: list[str]) -> bytes:
+        lines = ["begin"]
+        if self.verbose:
+            lines.append("verbose")
+        lines.extend(queries)
+        lines.append("end")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _is_header(line: str) -> bool:
+        """Whether a line is the bulk mode banner or the column header."""
+        return line.startswith("Bulk mode;") or line.split("|", 1)[0].strip() == "AS"
+
+    async def read_answers(
+            self,
+            reader: asyncio.StreamReader,
+            queries: list[str],
+            timeout: float,
+    ) -> AsyncIterator[tuple[str, str]]:
+        pending = iter(queries)
+        query = next(pending, None)
+        while query is not None:
+            line = await self._readline(reader, timeout)
+            if not line.strip() or self._is_header(line):
+                continue
+            yield query, line
+            query = next(pending, None)
+
+
+class IrrdBulkProtocol(BulkProtocol):
+    """
+    IRRd (RADb style) multiple-command mode, entered with ``!!``.
+
+    Every answer is framed: ``A<length>`` followed by the data and ``C``,
+    ``C`` alone for an empty success, ``D`` when the key was not found and
+    ``F <message>`` for errors. Queries not starting with ``!`` are translated:
+    ``AS<number>`` becomes ``!gAS<number>`` (routes originated by the AS) and
+    an IP address or prefix becomes ``!r<prefix>,o`` (origin of the covering
+    route).
+    """
+    _ASN_RE = re.compile(r"^as\d+$", flags=re.IGNORECASE)
+
+    def command(self, query: str) -> str:
+        """Translate a query into an IRRd command."""
+        if query.startswith("!"):
+            return query
+        if self._ASN_RE.match(query):
+            return f"!g{query.upper()}"
+        return f"!r{query},o"
+
+    def encode(self, queries: list[str]) -> bytes:
+        lines = ["!!"] + [self.command(query) for query in queries] + ["!q"]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    async def read_answers(
+            self,
+            reader: asyncio.StreamReader,
+            queries: list[str],
+            timeout: float,
+    ) -> AsyncIterator[tuple[str, str]]:
+        for query in queries:
+            status = await self._readline(reader, timeout)
+            while not status:
+                status = await self._readline(reader, timeout)
+
+            if status.startswith("A") and status[1:].isdigit():
+                data = await asyncio.wait_for(reader.readexactly(int(status[1:])), timeout=timeout)
+                end = await self._readline(reader, timeout)
+                while not end:
+                    end = await self._readline(reader, timeout)
+                yield query, data.decode("utf-8", "replace").rstrip("\n")
+            elif status == "C":
+                yield query, ""
+            elif status == "D":
+                yield query, f"No entries found for {query}"
+            elif status.startswith("F"):
+                yield query, status[1:].strip()
+            else:
+                yield query, status
+
+
+# Protocols of the servers known to accept batched queries
+BULK_PROTOCOLS: dict[str, BulkProtocol] = {
+    "whois.cymru.com": CymruBulkProtocol(),
+    "whois.radb.net": IrrdBulkProtocol(),
+}
+
+
+def bulk_protocol_for(hostname: str) -> Optional[BulkProtocol]:
+    """Return the bulk protocol known for ``hostname``, if any."""
+    return BULK_PROTOCOLS.get(hostname.lower())
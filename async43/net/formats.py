@@ -0,0 +1,109 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger("async43")
+
+
+@dataclass(frozen=True)
+class QueryFormat:
+    """
+    Describes how a query must be written for a given WHOIS server.
+
+    The line sent to the server is built as ``<flags> <prefix><query><suffix>``.
+    ``many_results_prefix`` replaces ``prefix`` when the server asked for the
+    ``=xxx`` form, used by thin registries to return every matching record.
+    """
+    prefix: str = ""
+    suffix: str = ""
+    flags: tuple[str, ...] = ()
+    many_results_prefix: str = "="
+
+    def build(self, query: str, many_results: bool = False) -> str:
+        """Return the query line (without CRLF) to send to the server."""
+        prefix = self.many_results_prefix if many_results else self.prefix
+        line = f"{prefix}{query}{self.suffix}"
+        if self.flags:
+            line = " ".join(self.flags) + " " + line
+        return line
+
+
+# Servers matched by their exact hostname
+DEFAULT_HOST_FORMATS: dict[str, QueryFormat] = {
+    "whois.denic.de": QueryFormat(flags=("-T dn,ace", "-C UTF-8")),
+    "whois.dk-hostmaster.dk": QueryFormat(flags=("--show-handles",)),
+}
+
+# Servers matched by hostname suffix, the longest suffix wins
+DEFAULT_SUFFIX_FORMATS: dict[str, QueryFormat] = {
+    ".jp": QueryFormat(suffix="/e"),
+}
+
+
+@dataclass
+class QueryFormatRegistry:
+    """
+    Table of per-server query formats.
+
+    Besides the static table, the registry learns at runtime which servers
+    answered with the ``with "=xxx"`` hint, so that later queries to these
+    servers are sent in the ``=`` form right away instead of paying a second
+    round trip.
+    """
+    host_formats: dict[str, QueryFormat] = field(default_factory=lambda: dict(DEFAULT_HOST_FORMATS))
+    suffix_formats: dict[str, QueryFormat] = field(default_factory=lambda: dict(DEFAULT_SUFFIX_FORMATS))
+    many_results_hosts: set[str] = field(default_factory=set)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def lookup(self, hostname: str) -> QueryFormat:
+        """Return the query format to use for ``hostname``."""
+        hostname = hostname.lower()
+        query_format = self.host_formats.get(hostname)
+        if query_format is not None:
+            return query_format
+
+        best: Optional[str] = None
+        for suffix in self.suffix_formats:
+            if hostname.endswith(suffix) and (best is None or len(suffix) > len(best)):
+                best = suffix
+        return self.suffix_formats[best] if best else QueryFormat()
+
+    def build(self, hostname: str, query: str, many_results: bool = False) -> str:
+        """
+        Build the query line for ``hostname``.
+
+        :param hostname: WHOIS server the query is sent to.
+        :param query: Domain or IP being looked up.
+        :param many_results: Force the ``=`` form.
+        :return: The query line, without the trailing CRLF.
+        """
+        many_results = many_results or self.needs_many_results(hostname)
+        return self.lookup(hostname).build(query, many_results)
+
+    def needs_many_results(self, hostname: str) -> bool:
+        """Whether ``hostname`` is known to expect the ``=`` form."""
+        return hostname.lower() in self.many_results_hosts
+
+    def learn_many_results(self, hostname: str) -> None:
+        """Remember that ``hostname`` expects the ``=`` form."""
+        with self._lock:
+            if hostname.lower() not in self.many_results_hosts:
+                logger.debug("Learned that %s expects the =xxx query form", hostname)
+                self.many_results_hosts.add(hostname.lower())
+
+    def register(self, hostname: str, query_format: QueryFormat) -> None:
+        """
+        Register a format for an exact hostname, or for a hostname suffix
+        when ``hostname`` starts with a dot.
+        """
+        with self._lock:
+            if hostname.startswith("."):
+                self.suffix_formats[hostname.lower()] = query_format
+            else:
+                self.host_formats[hostname.lower()] = query_format
+
+
+# Shared by clients that don't bring their own registry so that what is
+# learned by one client benefits the others.
+query_formats = QueryFormatRegistry()
@@ -0,0 +1,65 @@
+from typing import Optional
+
+from async43.net.limits import LatencyStats
+
+
+class HedgePolicy:
+    """
+    When to send a duplicate of a slow WHOIS query.
+
+    Latencies of successful queries are kept per server. Once a server has
+    ``min_samples`` of them, a query still running after the server's
+    ``percentile`` latency gets a hedge: the same query sent to another of
+    the server's addresses, the first complete answer winning. At most
+    ``budget`` hedges are sent per query, on average, so that a server
+    having a bad time is not sent twice as many queries.
+    """
+
+    def __init__(
+            self,
+            percentile: float = 95,
+            min_samples: int = 20,
+            min_delay: float = 0.05,
+            budget: float = 0.1,
+    ):
+        """
+        :param percentile: Latency percentile after which a query is hedged.
+        :param min_samples: Successful queries needed before hedging a server.
+        :param min_delay: Shortest delay before a hedge, in seconds.
+        :param budget: Maximum ratio of hedges to queries.
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.budget = budget
+        self.queries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies: dict[str, LatencyStats] = {}
+
+    def record(self, hostname: str, seconds: float) -> None:
+        """Record the latency of a successful query to ``hostname``."""
+        self._latencies.setdefault(hostname.lower(), LatencyStats()).record(seconds)
+
+    def delay_for(self, hostname: str) -> Optional[float]:
+        """
+        Count a new query to ``hostname`` and return how long to wait before
+        hedging it, or None if it must not be hedged.
+        """
+        self.queries += 1
+        latencies = self._latencies.get(hostname.lower())
+        if latencies is None or len(latencies) < self.min_samples:
+            return None
+        return max(latencies.percentile(self.percentile), self.min_delay)
+
+    def has_budget(self) -> bool:
+        """Whether the hedging budget allows one more hedge."""
+        return self.hedges + 1 <= self.queries * self.budget
+
+    def count_hedge(self) -> None:
+        """Count a hedge that was sent."""
+        self.hedges += 1
+
+    def stats(self) -> dict:
+        """Return the number of queries, hedges sent and hedges that won."""
+        return {"queries": self.queries, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
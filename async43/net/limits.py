@@ -0,0 +1,278 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from typing import Optional
+
+from async43.exceptions import WhoisDeadlineExceededError, WhoisNetworkError, WhoisQuotaExceededError
+from async43.net.priority import BACKGROUND, INTERACTIVE, current_priority
+
+# Errors telling that a server is overloaded or pushing back
+DECREASE_ERRORS = (WhoisQuotaExceededError, WhoisNetworkError, asyncio.TimeoutError, ConnectionError)
+
+
+class LatencyStats:
+    """Latencies of the most recent successful queries to one server."""
+
+    def __init__(self, window: int = 200):
+        """
+        :param window: Number of recent samples kept.
+        """
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample."""
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Return the given percentile of the recent latencies, None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(int(len(ordered) * percent / 100), len(ordered) - 1)
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class AdaptiveLimit:  # pylint: disable=too-many-instance-attributes
+    """
+    Concurrency limit of one WHOIS server, adjusted with additive-increase
+    multiplicative-decrease (AIMD).
+
+    Each success grows the limit by ``increase / limit``, so about one slot
+    per round of ``limit`` queries, unless its latency is more than
+    ``latency_tolerance`` times the usual median. Quota replies, timeouts and
+    connection resets multiply the limit by ``decrease``, at most once per
+    ``decrease_interval`` seconds so that a burst of failures of queries sent
+    together only counts once.
+
+    Waiting queries are served by priority class, then by deadline.
+    ``reserved_share`` of the slots are kept for interactive queries:
+    background queries never take them, so an interactive lookup only waits
+    for other interactive lookups.
+    """
+
+    def __init__(
+            self,
+            initial: float = 2,
+            minimum: float = 1,
+            maximum: float = 32,
+            increase: float = 1,
+            decrease: float = 0.5,
+            latency_tolerance: float = 2.0,
+            decrease_interval: float = 1.0,
+            reserved_share: float = 0.25,
+    ):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.decrease_interval = decrease_interval
+        self.reserved_share = reserved_share
+        self.latency = LatencyStats()
+        self.in_flight = 0
+        self.background_in_flight = 0
+        self.successes = 0
+        self.errors = 0
+        self.last_decrease = 0.0
+        self._waiters: list[tuple[int, float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def capacity(self, lane: int) -> int:
+        """Number of slots queries of the given priority class may use."""
+        total = max(int(self.limit), 1)
+        if lane < BACKGROUND or total < 2:
+            return total
+        return max(total - math.ceil(total * self.reserved_share), 1)
+
+    def _can_take(self, lane: int) -> bool:
+        if self.in_flight >= max(int(self.limit), 1):
+            return False
+        return lane < BACKGROUND or self.background_in_flight < self.capacity(lane)
+
+    def _take(self, lane: int) -> None:
+        self.in_flight += 1
+        if lane >= BACKGROUND:
+            self.background_in_flight += 1
+
+    def _wake(self) -> None:
+        """Hand free slots to the waiting queries, most urgent first."""
+        while self._waiters:
+            lane, _, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_take(lane):
+                return
+            heapq.heappop(self._waiters)
+            self._take(lane)
+            future.set_result(None)
+
+    async def acquire(self, lane: int, deadline: Optional[float] = None) -> None:
+        """
+        Wait until a slot is free for the given priority class and take it.
+
+        :param lane: Priority class of the query.
+        :param deadline: Loop time by which the query should start.
+        :raises WhoisDeadlineExceededError: If no slot was free by ``deadline``.
+        """
+        if not self._waiters and self._can_take(lane):
+            self._take(lane)
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (lane, math.inf if deadline is None else deadline, next(self._order), future))
+        # A more urgent query may pass the waiting ones
+        self._wake()
+        if future.done():
+            return
+        timeout = None if deadline is None else max(deadline - loop.time(), 0)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exception:
+            if future.done() and not future.cancelled():
+                # The slot was handed over meanwhile
+                self.release(lane)
+            else:
+                future.cancel()
+            if isinstance(exception, asyncio.TimeoutError):
+                raise WhoisDeadlineExceededError("No slot was free before the deadline") from exception
+            raise
+
+    def try_acquire(self, lane: int) -> bool:
+        """Take a slot for the given priority class if one is free right away."""
+        if self._waiters or not self._can_take(lane):
+            return False
+        self._take(lane)
+        return True
+
+    def release(self, lane: int) -> None:
+        """Give a slot back."""
+        self.in_flight -= 1
+        if lane >= BACKGROUND:
+            self.background_in_flight -= 1
+        self._wake()
+
+    def on_success(self, latency: float) -> None:
+        """Record a successful query and grow the limit if latency is normal."""
+        self.successes += 1
+        median = self.latency.percentile(50)
+        self.latency.record(latency)
+        if median is not None and latency > median * self.latency_tolerance:
+            return
+        self.limit = min(self.limit + self.increase / self.limit, self.maximum)
+        self._wake()
+
+    def on_error(self) -> None:
+        """Record a failed query and shrink the limit."""
+        self.errors += 1
+        now = time.monotonic()
+        if now - self.last_decrease < self.decrease_interval:
+            return
+        self.last_decrease = now
+        self.limit = max(self.limit * self.decrease, self.minimum)
+
+    def stats(self) -> dict:
+        """Return the current limit, counters and latency percentiles."""
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "background_in_flight": self.background_in_flight,
+            "waiting": sum(1 for *_, future in self._waiters if not future.done()),
+            "successes": self.successes,
+            "errors": self.errors,
+            "p50": self.latency.percentile(50),
+            "p90": self.latency.percentile(90),
+            "p95": self.latency.percentile(95),
+        }
+
+
+class ServerSlot:
+    """
+    Async context manager holding one slot of a server while a query runs.
+
+    The slot is taken with the priority of the current context, see
+    ``async43.net.priority``. Leaving the block normally counts as a
+    success, leaving it with one of ``DECREASE_ERRORS`` as a decrease
+    signal. Other errors leave the limit untouched.
+    """
+
+    def __init__(self, limit: AdaptiveLimit, acquired: bool = False):
+        """
+        :param limit: Limit of the server.
+        :param acquired: Whether the slot was already taken with ``try_acquire``.
+        """
+        self.limit = limit
+        self.acquired = acquired
+        self._lane = current_priority().lane if acquired else INTERACTIVE
+        self._started = 0.0
+
+    async def __aenter__(self) -> "ServerSlot":
+        if not self.acquired:
+            lane, deadline = current_priority()
+            self._lane = lane
+            await self.limit.acquire(lane, deadline)
+        self._started = time.monotonic()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
+        if exc_type is None:
+            self.limit.on_success(time.monotonic() - self._started)
+        elif issubclass(exc_type, DECREASE_ERRORS):
+            self.limit.on_error()
+        self.limit.release(self._lane)
+        return False
+
+
+class ServerLimits:
+    """
+    Adaptive concurrency limits of every WHOIS server a client talks to.
+
+    Limits are created on first use with the parameters given here, and can
+    be pinned for specific servers with ``configure``.
+    """
+
+    def __init__(self, initial: float = 2, minimum: float = 1, maximum: float = 32, **options):
+        """
+        :param initial: Starting concurrency of a server.
+        :param minimum: Lowest concurrency a server can be pushed down to.
+        :param maximum: Highest concurrency a server can grow to.
+        :param options: Other ``AdaptiveLimit`` parameters.
+        """
+        self.defaults = {"initial": initial, "minimum": minimum, "maximum": maximum, **options}
+        self._limits: dict[str, AdaptiveLimit] = {}
+
+    def configure(self, hostname: str, **options) -> AdaptiveLimit:
+        """Set specific ``AdaptiveLimit`` parameters for one server."""
+        limit = AdaptiveLimit(**{**self.defaults, **options})
+        self._limits[hostname.lower()] = limit
+        return limit
+
+    def get(self, hostname: str) -> AdaptiveLimit:
+        """Return the limit of ``hostname``, creating it if needed."""
+        limit = self._limits.get(hostname.lower())
+        if limit is None:
+            limit = self.configure(hostname)
+        return limit
+
+    def slot(self, hostname: str) -> ServerSlot:
+        """Return a context manager holding a slot of ``hostname``."""
+        return ServerSlot(self.get(hostname))
+
+    def try_slot(self, hostname: str) -> Optional[ServerSlot]:
+        """Return a slot of ``hostname`` already taken, or None if none is free right away."""
+        limit = self.get(hostname)
+        if not limit.try_acquire(current_priority().lane):
+            return None
+        return ServerSlot(limit, acquired=True)
+
+    def stats(self) -> dict[str, dict]:
+        """Return the statistics of every known server."""
+        return {hostname: limit.stats() for hostname, limit in self._limits.items()}
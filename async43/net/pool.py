@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, Optional
+
+logger = logging.getLogger("async43")
+
+# Servers running the RIPE database software, which supports the -k flag
+PERSISTENT_HOSTS = frozenset({
+    "whois.ripe.net",
+    "whois.apnic.net",
+    "whois.afrinic.net",
+})
+
+Opener = Callable[[str, int, int], Awaitable[tuple[asyncio.StreamReader, asyncio.StreamWriter]]]
+
+
+class PersistentSession:
+    """
+    A connection to a RIPE-style server kept open with the ``-k`` flag.
+
+    In persistent mode the server ends every response with two consecutive
+    empty lines instead of closing the connection.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+        self.started = False
+
+    async def query(self, query: str, timeout: float) -> str:
+        """
+        Send a query and read its framed response.
+
+        :raises asyncio.IncompleteReadError: If the server closed the connection.
+        :raises asyncio.TimeoutError: If the response did not arrive in time.
+        """
+        line = query if self.started else f"-k {query}"
+        self.writer.write(line.encode("utf-8") + b"\r\n")
+        await self.writer.drain()
+        self.started = True
+
+        lines: list[str] = []
+        blank = 0
+        while blank < 2:
+            raw = await asyncio.wait_for(self.reader.readline(), timeout=timeout)
+            if not raw:
+                raise asyncio.IncompleteReadError(raw, None)
+            text = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if text:
+                blank = 0
+                lines.append(text)
+            elif lines:
+                blank += 1
+                lines.append(text)
+
+        self.last_used = time.monotonic()
+        return "\n".join(lines[:-2]) + "\n"
+
+    def is_idle_for(self, seconds: float) -> bool:
+        """Whether the session was not used for more than ``seconds``."""
+        return time.monotonic() - self.last_used > seconds
+
+    async def close(self) -> None:
+        """Leave persistent mode and close the connection."""
+        try:
+            if self.started and not self.writer.is_closing():
+                self.writer.write(b"-k\r\n")
+            self.writer.close()
+            await self.writer.wait_closed()
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+
+
+class SessionPool:
+    """
+    Small pool of persistent sessions per capable WHOIS server.
+
+    At most ``max_sessions`` sessions are opened per server. Sessions idle for
+    longer than ``idle_timeout`` are closed instead of being reused, and a
+    reused session that fails is replaced by a fresh connection once.
+    """
+
+    def __init__(
+            self,
+            hosts: Iterable[str] = PERSISTENT_HOSTS,
+            max_sessions: int = 2,
+            idle_timeout: float = 60,
+    ):
+        """
+        :param hosts: Servers supporting persistent connections.
+        :param max_sessions: Maximum number of sessions per server.
+        :param idle_timeout: Seconds after which an unused session is closed.
+        """
+        self.hosts = frozenset(host.lower() for host in hosts)
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._idle: dict[tuple[str, int], list[PersistentSession]] = {}
+        self._slots: dict[tuple[str, int], asyncio.Semaphore] = {}
+
+    def supports(self, hostname: str) -> bool:
+        """Whether queries to ``hostname`` go through the pool."""
+        return hostname.lower() in self.hosts
+
+    async def query(self, hostname: str, port: int, query: str, timeout: int, opener: Opener) -> str:
+        """
+        Run a query over a pooled session.
+
+        :param hostname: WHOIS server hostname.
+        :param port: WHOIS server port.
+        :param query: Query line, without CRLF.
+        :param timeout: Network timeout in seconds.
+        :param opener: Coroutine function opening a new connection, called
+            with (hostname, timeout, port).
+        :return: The response to the query.
+        """
+        key = (hostname.lower(), port)
+        slots = self._slots.setdefault(key, asyncio.Semaphore(self.max_sessions))
+        async with slots:
+            session = await self._take_idle(key)
+            if session is not None:
+                try:
+                    response = await session.query(query, timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as exception:
+                    logger.debug("Persistent session to %s failed, reconnecting: %s", hostname, exception)
+                    await session.close()
+                else:
+                    self._idle.setdefault(key, []).append(session)
+                    return response
+
+            reader, writer = await opener(hostname, timeout, port)
+            session = PersistentSession(reader, writer)
+            try:
+                response = await session.query(query, timeout)
+            except BaseException:
+                await session.close()
+                raise
+
+            self._idle.setdefault(key, []).append(session)
+            return response
+
+    async def _take_idle(self, key: tuple[str, int]) -> Optional[PersistentSession]:
+        """Pop the most recently used idle session, closing expired ones."""
+        sessions = self._idle.get(key, [])
+        while sessions:
+            session = sessions.pop()
+            if session.is_idle_for(self.idle_timeout) or session.reader.at_eof() or session.writer.is_closing():
+                await session.close()
+                continue
+            return session
+        return None
+
+    async def close(self) -> None:
+        """Close every pooled session."""
+        sessions = [session for idle in self._idle.values() for session in idle]
+        self._idle.clear()
+        for session in sessions:
+            await session.close()
@@ -0,0 +1,38 @@
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple, Optional
+
+# Priority classes, lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class Priority(NamedTuple):
+    """Priority class of the running lookup and the loop time it should start by."""
+    lane: int = INTERACTIVE
+    deadline: Optional[float] = None
+
+
+_current: contextvars.ContextVar[Priority] = contextvars.ContextVar("async43_priority", default=Priority())
+
+
+def current_priority() -> Priority:
+    """Return the priority of the lookup running in the current context."""
+    return _current.get()
+
+
+@contextmanager
+def priority(lane: int, deadline: Optional[float] = None) -> Iterator[Priority]:
+    """
+    Run the lookups of the block, and of the tasks created inside it, with
+    the given priority class.
+
+    Lookups are ``INTERACTIVE`` unless told otherwise, bulk jobs run as
+    ``BACKGROUND``. Among waiting lookups of the same class, the one with the
+    earliest ``deadline`` (a loop time) is served first.
+    """
+    token = _current.set(Priority(lane, deadline))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
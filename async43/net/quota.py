@@ -0,0 +1,118 @@
+import re
+from typing import Optional
+
+from async43.exceptions import WhoisQuotaExceededError
+
+# Rate-limit and quota replies, per WHOIS server. Patterns are matched
+# case-insensitively against the raw answer.
+QUOTA_PATTERNS: dict[str, list[str]] = {
+    "whois.ripe.net": [r"%ERROR:201: access denied", r"access from your host has been \w+ denied"],
+    "whois.apnic.net": [r"%ERROR:201: access denied"],
+    "whois.afrinic.net": [r"%ERROR:201: access denied"],
+    "whois.arin.net": [r"query rate limit exceeded"],
+    "whois.lacnic.net": [r"query rate limit exceeded", r"exceeded the maximum number of queries"],
+    "whois.denic.de": [r"55000000002 connection refused; access control limit (?:reached|exceeded)"],
+    "whois.eu": [r"excessive querying", r"-8: %quota exceeded"],
+    "whois.nic.it": [r"quota exceeded", r"too many requests"],
+    "whois.nic.fr": [r"too many requests"],
+    "whois.nic.uk": [r"blocked for exceeding the query limit"],
+    "whois.jprs.jp": [r"query rate exceeded"],
+    "whois.cira.ca": [r"not authorised to make any more queries"],
+    "whois.pir.org": [r"whois limit exceeded"],
+    "whois.publicinterestregistry.org": [r"whois limit exceeded"],
+    "whois.godaddy.com": [r"number of allowed queries exceeded"],
+}
+
+# Replies seen across many servers and registrars. As these words may also
+# show up in the terms of use of a full record, they only count in short answers.
+GENERIC_QUOTA_PATTERNS: list[str] = [
+    r"query rate (?:limit )?exceeded",
+    r"rate limit exceeded",
+    r"too many (?:requests|queries|connections)",
+    r"(?:whois |query |lookup )?limit exceeded",
+    r"quota exceeded",
+    r"exceeded (?:the|your) (?:allowed |maximum )?(?:query |request )?(?:quota|limit|rate)",
+    r"maximum daily connection limit reached",
+    r"connection limit exceeded",
+    r"number of allowed queries exceeded",
+    r"excessive querying",
+]
+
+_RETRY_AFTER_RE = re.compile(
+    r"(?:try again|wait|retry|grace period of|blocked for|after)\D{0,40}?"
+    r"(?P<value>\d+)\s*(?P<unit>seconds?|secs?|s\b|minutes?|mins?|hours?|h\b)",
+    flags=re.IGNORECASE,
+)
+_UNITS = {"s": 1, "m": 60, "h": 3600}
+GENERIC_MAX_LENGTH = 2048
+_compiled: dict[str, Optional[re.Pattern]] = {}
+
+
+def _compile(patterns: list[str]) -> Optional[re.Pattern]:
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{item})" for item in patterns), flags=re.IGNORECASE)
+
+
+def _pattern_for(server: Optional[str]) -> Optional[re.Pattern]:
+    """Return the compiled patterns specific to ``server``, if any."""
+    key = server.lower()
+    if key not in _compiled:
+        _compiled[key] = _compile(QUOTA_PATTERNS.get(key, []))
+    return _compiled[key]
+
+
+_GENERIC_RE = _compile(GENERIC_QUOTA_PATTERNS)
+# Without a server, the patterns of every known server are as likely to show
+# up in the terms of use of a full record as the generic ones.
+_ANY_SERVER_RE = _compile(
+    list(dict.fromkeys(item for items in QUOTA_PATTERNS.values() for item in items)) + GENERIC_QUOTA_PATTERNS
+)
+
+
+def find_quota_message(raw_text: str, server: Optional[str] = None) -> Optional[str]:
+    """
+    Return the line of ``raw_text`` telling that a quota or rate limit was
+    hit, or None if the answer is not a quota reply.
+
+    :param raw_text: Raw WHOIS answer.
+    :param server: WHOIS server that sent the answer, to also apply its own
+        patterns. Without it, the patterns of every known server only apply
+        to short answers, like the generic ones.
+    """
+    match = None
+    if server:
+        pattern = _pattern_for(server)
+        match = pattern.search(raw_text) if pattern is not None else None
+    if match is None and len(raw_text.strip()) <= GENERIC_MAX_LENGTH:
+        match = (_GENERIC_RE if server else _ANY_SERVER_RE).search(raw_text)
+    if match is None:
+        return None
+    start = raw_text.rfind("\n", 0, match.start()) + 1
+    end = raw_text.find("\n", match.end())
+    return raw_text[start:end if end != -1 else len(raw_text)].strip()
+
+
+def parse_retry_after(raw_text: str) -> Optional[float]:
+    """Return the delay in seconds announced by a quota reply, if any."""
+    match = _RETRY_AFTER_RE.search(raw_text)
+    if match is None:
+        return None
+    return float(match.group("value")) * _UNITS[match.group("unit")[0].lower()]
+
+
+def raise_for_quota(raw_text: str, server: Optional[str] = None) -> None:
+    """
+    Raise if ``raw_text`` is a quota or rate limit reply.
+
+    :raises WhoisQuotaExceededError: With the server and the announced retry
+        delay, if any.
+    """
+    message = find_quota_message(raw_text, server)
+    if message is not None:
+        prefix = f"{server}: " if server else ""
+        raise WhoisQuotaExceededError(
+            f"{prefix}{message or 'query quota exceeded'}",
+            server=server,
+            retry_after=parse_retry_after(raw_text),
+        )
@@ -0,0 +1,49 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token bucket limiting how many lookups start per second.
+
+    The bucket holds up to ``burst`` tokens and gains ``rate`` tokens per
+    second. Each lookup takes one token, waiting for it when the bucket is
+    empty, so lookups start at ``rate`` per second on average with bursts of
+    at most ``burst``.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        :param rate: Tokens added per second.
+        :param burst: Capacity of the bucket, defaults to one second of tokens
+            (at least one).
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def try_take(self) -> float:
+        """
+        Take a token if there is one.
+
+        :return: 0 if a token was taken, else the seconds until one is available.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait for a token and take it."""
+        while True:
+            wait = self.try_take()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
@@ -0,0 +1,122 @@
+import re
+from typing import NamedTuple, Optional
+
+WHOIS_PORT = 43
+
+# Hosts of the regional registries an ARIN answer may point to.
+RIR_HOSTS = (
+    "whois.lacnic.net",
+    "whois.ripe.net",
+    "whois.apnic.net",
+    "whois.registro.br",
+    "whois.pandi.or.id",
+    "whois.afrinic.net",
+)
+
+# A single pass over the response finds both the referral labels (only at the
+# start of a line, so no backtracking over the whole buffer) and bare mentions
+# of a regional registry, used for ARIN answers that have no referral label.
+_REFERRAL_RE = re.compile(
+    r"^[ \t]*(?:registrar[ \t]+whois[ \t]+server|whois[ \t]+server|referralserver)[ \t]*:[ \t]*(?P<value>\S+)"
+    r"|(?P<rir>" + "|".join(re.escape(host) for host in RIR_HOSTS) + r")",
+    flags=re.IGNORECASE | re.MULTILINE,
+)
+_URL_RE = re.compile(r"^(?P<scheme>[a-z][a-z0-9+.-]*)://(?P<rest>[^/?#]*)(?P<path>.*)$", flags=re.IGNORECASE)
+
+
+class Referral(NamedTuple):
+    """A WHOIS server found in a response, and the TCP port to query it on."""
+    host: str
+    port: int = WHOIS_PORT
+
+    def __str__(self) -> str:
+        if self.port == WHOIS_PORT:
+            return self.host
+        if ":" in self.host:
+            return f"[{self.host}]:{self.port}"
+        return f"{self.host}:{self.port}"
+
+
+def split_host_port(server: str, default_port: int = WHOIS_PORT) -> tuple[str, int]:
+    """
+    Split a ``host``, ``host:port`` or ``[ipv6]:port`` string.
+
+    :param server: Server specification.
+    :param default_port: Port used when none is given.
+    :raises ValueError: If the port is not a valid number.
+    :return: A tuple of (host, port).
+    """
+    if server.startswith("["):
+        host, _, rest = server[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else ""
+    elif server.count(":") == 1:
+        host, port = server.split(":")
+    else:
+        # A bare host name or an IPv6 literal without brackets
+        host, port = server, ""
+
+    if not port:
+        return host, default_port
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"Invalid port in WHOIS server {server!r}")
+    return host, int(port)
+
+
+def parse_referral(value: str) -> Optional[Referral]:
+    """
+    Turn the value of a referral label into a ``Referral``.
+
+    Accepted forms are ``host``, ``host:port`` and ``whois://host[:port]``.
+    Web URLs and other protocols such as ``rwhois://`` can't be queried over
+    port 43 and give None.
+    """
+    value = value.strip().rstrip(".")
+    url = _URL_RE.match(value)
+    if url:
+        if url.group("scheme").lower() != "whois" or url.group("path").strip("/"):
+            return None
+        value = url.group("rest")
+    elif "/" in value:
+        return None
+
+    try:
+        host, port = split_host_port(value)
+    except ValueError:
+        return None
+
+    host = host.strip().rstrip(".").lower()
+    if not host:
+        return None
+    return Referral(host, port)
+
+
+def scan_referral(buf: str, hostname: str = "") -> Optional[Referral]:
+    """
+    Find the WHOIS server a response refers to, reading the buffer once.
+
+    Recognized labels are ``Whois Server:``, ``Registrar WHOIS Server:`` and
+    ``ReferralServer:``. The first usable one wins. For answers coming from
+    ARIN, a bare mention of a regional registry host is used as a fallback.
+    A referral back to the server that sent the response is ignored.
+
+    :param buf: Raw WHOIS response text.
+    :param hostname: Hostname of the WHOIS server that returned the response.
+    :return: The referred server, or None.
+    """
+    hostname = hostname.lower()
+    rir: Optional[str] = None
+
+    for match in _REFERRAL_RE.finditer(buf):
+        value = match.group("value")
+        if value is None:
+            if rir is None:
+                rir = match.group("rir").lower()
+            continue
+
+        referral = parse_referral(value)
+        if referral is not None and referral.host != hostname:
+            return referral
+
+    if rir is not None and hostname == "whois.arin.net":
+        return Referral(rir)
+    return None
@@ -0,0 +1,68 @@
+import bisect
+import ipaddress
+from functools import lru_cache
+from typing import Optional, Union
+
+IPAddress = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+class DelegationIndex:
+    """
+    Sorted-array index of address blocks to the WHOIS server of the
+    registry responsible for them.
+
+    Adjacent blocks delegated to the same server are merged, then a lookup is
+    a binary search on the block starts.
+    """
+
+    def __init__(self, delegations: list[tuple[str, str]]):
+        """
+        Build the index.
+
+        :param delegations: (network, whois server) pairs, non-overlapping.
+        """
+        ranges: list[tuple[int, int, str]] = []
+        for network, server in sorted(delegations, key=lambda item: ipaddress.ip_network(item[0])):
+            net = ipaddress.ip_network(network)
+            start, end = int(net.network_address), int(net.broadcast_address)
+            if ranges and ranges[-1][2] == server and ranges[-1][1] + 1 == start:
+                ranges[-1] = (ranges[-1][0], end, server)
+            else:
+                ranges.append((start, end, server))
+
+        self._starts = [start for start, _, _ in ranges]
+        self._ends = [end for _, end, _ in ranges]
+        self._servers = [server for _, _, server in ranges]
+
+    def lookup(self, address: IPAddress) -> Optional[str]:
+        """Return the WHOIS server responsible for ``address``, or None."""
+        value = int(address)
+        position = bisect.bisect_right(self._starts, value) - 1
+        if position >= 0 and value <= self._ends[position]:
+            return self._servers[position]
+        return None
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+
+@lru_cache(maxsize=None)
+def _index(version: int) -> DelegationIndex:
+    """Build the index of an address family from the bundled table on first use."""
+    from async43.delegations import IPV4_DELEGATIONS, IPV6_DELEGATIONS  # pylint: disable=import-outside-toplevel
+    return DelegationIndex(IPV4_DELEGATIONS if version == 4 else IPV6_DELEGATIONS)
+
+
+def rir_whois_server(address: Union[str, IPAddress]) -> Optional[str]:
+    """
+    Return the WHOIS server of the registry IANA delegated ``address`` to.
+
+    :param address: IPv4 or IPv6 address.
+    :raises ValueError: If ``address`` is not a valid IP address.
+    :return: The WHOIS server hostname, or None for reserved and unassigned space.
+    """
+    if isinstance(address, str):
+        address = ipaddress.ip_address(address)
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return _index(address.version).lookup(address)
@@ -0,0 +1,95 @@
+import random
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+
+@dataclass
+class AddressScore:
+    """Moving averages of the connections to one address of a WHOIS server."""
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    samples: int = 0
+
+
+class AddressScores:
+    """
+    Latency and error scores of the resolved addresses of each WHOIS server.
+
+    Connection latencies and failures are folded into exponentially weighted
+    moving averages. Connections go to the address with the best (lowest)
+    score, latency inflated by its error rate, and addresses never tried
+    come first. With probability ``epsilon`` another address is tried first
+    so that the scores of the others stay current.
+    """
+
+    def __init__(
+            self,
+            alpha: float = 0.3,
+            epsilon: float = 0.05,
+            failure_penalty: float = 5.0,
+            rng: Optional[random.Random] = None,
+    ):
+        """
+        :param alpha: Weight of a new sample in the moving averages.
+        :param epsilon: Probability of exploring another address first.
+        :param failure_penalty: How much a 100% error rate multiplies the latency.
+        :param rng: Random generator used for exploration.
+        """
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.failure_penalty = failure_penalty
+        self.rng = rng or random.Random()
+        self._scores: dict[tuple[str, str], AddressScore] = {}
+
+    def _get(self, hostname: str, address: str) -> AddressScore:
+        return self._scores.setdefault((hostname.lower(), address), AddressScore())
+
+    def record_success(self, hostname: str, address: str, latency: float) -> None:
+        """Record a connection to ``address`` established in ``latency`` seconds."""
+        score = self._get(hostname, address)
+        score.samples += 1
+        score.latency = latency if score.latency is None else score.latency + self.alpha * (latency - score.latency)
+        score.error_rate -= self.alpha * score.error_rate
+
+    def record_failure(self, hostname: str, address: str, latency: Optional[float] = None) -> None:
+        """
+        Record a failed connection to ``address``, after ``latency`` seconds
+        if known. A slow failure raises the latency of an address known to
+        answer, it never lowers it.
+        """
+        score = self._get(hostname, address)
+        score.samples += 1
+        score.error_rate += self.alpha * (1 - score.error_rate)
+        if latency is not None and score.latency is not None:
+            score.latency = max(score.latency, latency)
+
+    def score(self, hostname: str, address: str) -> float:
+        """Return the score of an address, lower is better. Unknown addresses score 0."""
+        score = self._scores.get((hostname.lower(), address))
+        if score is None or not score.samples:
+            return 0.0
+        latency = score.latency if score.latency is not None else 1.0
+        return latency * (1 + self.failure_penalty * score.error_rate)
+
+    def order(self, hostname: str, addr_infos: Sequence[tuple[Any, ...]]) -> list[tuple[Any, ...]]:
+        """
+        Sort ``getaddrinfo`` results best address first, sometimes putting
+        another one first to explore it.
+        """
+        ordered = sorted(addr_infos, key=lambda info: self.score(hostname, info[4][0]))
+        if len(ordered) > 1 and self.rng.random() < self.epsilon:
+            explored = ordered.pop(self.rng.randrange(1, len(ordered)))
+            ordered.insert(0, explored)
+        return ordered
+
+    def stats(self) -> dict[str, dict[str, dict]]:
+        """Return the scores per server, then per address."""
+        result: dict[str, dict[str, dict]] = {}
+        for (hostname, address), score in self._scores.items():
+            result.setdefault(hostname, {})[address] = {
+                "latency": score.latency,
+                "error_rate": round(score.error_rate, 3),
+                "samples": score.samples,
+                "score": self.score(hostname, address),
+            }
+        return result
@@ -0,0 +1,319 @@
+import asyncio
+import ipaddress
+import logging
+import struct
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from urllib.parse import unquote, urlsplit
+
+logger = logging.getLogger("async43")
+
+SOCKS5_ERRORS = {
+    0x01: "general SOCKS server failure",
+    0x02: "connection not allowed by ruleset",
+    0x03: "network unreachable",
+    0x04: "host unreachable",
+    0x05: "connection refused",
+    0x06: "TTL expired",
+    0x07: "command not supported",
+    0x08: "address type not supported",
+}
+# Replies telling that the proxy works but the target can't be reached
+SOCKS5_TARGET_ERRORS = frozenset({0x03, 0x04, 0x05, 0x06})
+
+
+class SocksError(OSError):
+    """
+    Raised when a SOCKS handshake fails.
+
+    ``proxy_failure`` is False when the proxy itself answered properly but
+    could not reach the target, which doesn't count against its health.
+    """
+
+    def __init__(self, message: str, proxy_failure: bool = True):
+        super().__init__(message)
+        self.proxy_failure = proxy_failure
+
+
+@dataclass
+class SocksProxy:
+    """A SOCKS5 or SOCKS4a proxy and the number of connections it may carry at once."""
+    host: str
+    port: int = 1080
+    username: Optional[str] = None
+    password: Optional[str] = None
+    version: int = 5
+    max_connections: int = 10
+
+    @classmethod
+    def from_url(cls, value: str, max_connections: int = 10) -> "SocksProxy":
+        """
+        Build a proxy from ``[socks5|socks4a://][user:password@]host:port``.
+
+        The scheme-less form is the one of the ``SOCKS`` environment variable.
+        """
+        if "://" not in value:
+            value = "socks5://" + value
+        url = urlsplit(value)
+        versions = {"socks5": 5, "socks5h": 5, "socks4a": 4, "socks4": 4}
+        if url.scheme not in versions or not url.hostname:
+            raise ValueError(f"Invalid SOCKS proxy {value!r}")
+        return cls(
+            host=url.hostname,
+            port=url.port or 1080,
+            username=unquote(url.username) if url.username else None,
+            password=unquote(url.password) if url.password else None,
+            version=versions[url.scheme],
+            max_connections=max_connections,
+        )
+
+    def __str__(self) -> str:
+        return f"socks{self.version}://{self.host}:{self.port}"
+
+
+async def socks5_handshake(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        proxy: SocksProxy,
+        host: str,
+        port: int,
+) -> None:
+    """
+    Ask a SOCKS5 proxy to connect to ``host:port``, host names being resolved by the proxy.
+
+    :raises SocksError: If the proxy refuses the request.
+    """
+    methods = b"\x00\x02" if proxy.username else b"\x00"
+    writer.write(b"\x05" + bytes([len(methods)]) + methods)
+    await writer.drain()
+    version, method = await reader.readexactly(2)
+    if version != 5:
+        raise SocksError(f"{proxy} is not a SOCKS5 proxy")
+
+    if method == 0x02:
+        username = (proxy.username or "").encode("utf-8")
+        password = (proxy.password or "").encode("utf-8")
+        writer.write(b"\x01" + bytes([len(username)]) + username + bytes([len(password)]) + password)
+        await writer.drain()
+        _, status = await reader.readexactly(2)
+        if status != 0:
+            raise SocksError(f"{proxy} rejected the credentials")
+    elif method != 0x00:
+        raise SocksError(f"{proxy} accepts none of the offered authentication methods")
+
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        encoded = host.encode("idna")
+        destination = b"\x03" + bytes([len(encoded)]) + encoded
+    else:
+        destination = (b"\x01" if address.version == 4 else b"\x04") + address.packed
+
+    writer.write(b"\x05\x01\x00" + destination + struct.pack("!H", port))
+    await writer.drain()
+    _, reply, _, address_type = await reader.readexactly(4)
+    if reply != 0:
+        raise SocksError(
+            f"{proxy} could not connect to {host}:{port}: {SOCKS5_ERRORS.get(reply, reply)}",
+            proxy_failure=reply not in SOCKS5_TARGET_ERRORS,
+        )
+
+    # Skip the bound address and port
+    if address_type == 0x01:
+        await reader.readexactly(4 + 2)
+    elif address_type == 0x04:
+        await reader.readexactly(16 + 2)
+    elif address_type == 0x03:
+        length = (await reader.readexactly(1))[0]
+        await reader.readexactly(length + 2)
+    else:
+        raise SocksError(f"{proxy} sent an invalid reply")
+
+
+async def socks4a_handshake(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        proxy: SocksProxy,
+        host: str,
+        port: int,
+) -> None:
+    """
+    Ask a SOCKS4a proxy to connect to ``host:port``.
+
+    :raises SocksError: If the proxy refuses the request.
+    """
+    user_id = (proxy.username or "").encode("utf-8") + b"\x00"
+    try:
+        address = ipaddress.IPv4Address(host)
+    except ValueError:
+        request = b"\x00\x00\x00\x01" + user_id + host.encode("idna") + b"\x00"
+    else:
+        request = address.packed + user_id
+
+    writer.write(b"\x04\x01" + struct.pack("!H", port) + request)
+    await writer.drain()
+    reply = await reader.readexactly(8)
+    if reply[1] != 0x5A:
+        raise SocksError(f"{proxy} could not connect to {host}:{port} (code {reply[1]:#x})", proxy_failure=False)
+
+
+async def open_socks_connection(
+        proxy: SocksProxy,
+        host: str,
+        port: int,
+        timeout: float,
+) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Open a connection to ``host:port`` through ``proxy`` without blocking the event loop.
+
+    :raises SocksError: If the handshake fails.
+    :raises OSError: If the proxy can't be reached.
+    :raises asyncio.TimeoutError: If connecting or the handshake takes longer than ``timeout``.
+    """
+    handshake = socks5_handshake if proxy.version == 5 else socks4a_handshake
+
+    async def connect():
+        reader, writer = await asyncio.open_connection(proxy.host, proxy.port)
+        try:
+            await handshake(reader, writer, proxy, host, port)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    try:
+        return await asyncio.wait_for(connect(), timeout=timeout)
+    except asyncio.IncompleteReadError as exception:
+        raise SocksError(f"{proxy} closed the connection during the handshake") from exception
+
+
+class _ProxyState:
+    """Concurrency slots and health of one proxy."""
+
+    def __init__(self, proxy: SocksProxy):
+        self.proxy = proxy
+        self.slots = asyncio.Semaphore(proxy.max_connections)
+        self.in_use = 0
+        self.failures = 0
+        self.successes = 0
+        self.down_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        """Whether the proxy is not cooling down after repeated failures."""
+        return self.down_until <= now
+
+
+class ProxyPool:
+    """
+    Pool of SOCKS proxies with per-proxy concurrency limits and health tracking.
+
+    Connections go to the healthy proxy with the fewest connections in use.
+    A proxy failing ``max_failures`` times in a row is left aside for
+    ``cooldown`` seconds, after which it gets a new chance.
+    """
+
+    def __init__(self, proxies: Iterable[SocksProxy], max_failures: int = 3, cooldown: float = 30):
+        """
+        :param proxies: Proxies of the pool.
+        :param max_failures: Consecutive failures taking a proxy out of rotation.
+        :param cooldown: Seconds a failing proxy stays out of rotation.
+        """
+        self._states = [_ProxyState(proxy) for proxy in proxies]
+        if not self._states:
+            raise ValueError("A proxy pool needs at least one proxy")
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+
+    @classmethod
+    def from_env(cls, value: str) -> "ProxyPool":
+        """Build a single proxy pool from the value of the ``SOCKS`` environment variable."""
+        return cls([SocksProxy.from_url(value)])
+
+    def _candidates(self) -> list[_ProxyState]:
+        """Proxies to try, healthy ones first, least busy first."""
+        now = time.monotonic()
+        return sorted(self._states, key=lambda state: (not state.healthy(now), state.in_use, state.failures))
+
+    async def open_connection(
+            self,
+            host: str,
+            port: int,
+            timeout: float,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """
+        Connect to ``host:port`` through the best available proxy, trying the
+        others if it fails.
+
+        The proxy slot is held until the returned writer is closed.
+
+        :raises OSError: The last error if no proxy could open the connection.
+        """
+        last_error: Optional[BaseException] = None
+        for state in self._candidates():
+            await state.slots.acquire()
+            state.in_use += 1
+            try:
+                reader, writer = await open_socks_connection(state.proxy, host, port, timeout)
+            except SocksError as exception:
+                self._release(state)
+                if not exception.proxy_failure:
+                    raise
+                last_error = exception
+                self._record_failure(state, exception)
+                continue
+            except (OSError, asyncio.TimeoutError) as exception:
+                self._release(state)
+                last_error = exception
+                self._record_failure(state, exception)
+                continue
+            except BaseException:
+                # Cancelled while connecting, by hedging or an outer timeout
+                self._release(state)
+                raise
+
+            state.failures = 0
+            state.successes += 1
+            self._release_on_close(state, writer)
+            return reader, writer
+
+        raise last_error if last_error else OSError("No SOCKS proxy available")
+
+    def _record_failure(self, state: _ProxyState, exception: BaseException) -> None:
+        """Count a failure and take the proxy out of rotation if needed."""
+        state.failures += 1
+        logger.debug("SOCKS proxy %s failed (%d in a row): %s", state.proxy, state.failures, exception)
+        if state.failures >= self.max_failures:
+            state.down_until = time.monotonic() + self.cooldown
+
+    @staticmethod
+    def _release(state: _ProxyState) -> None:
+        state.in_use -= 1
+        state.slots.release()
+
+    def _release_on_close(self, state: _ProxyState, writer: asyncio.StreamWriter) -> None:
+        """Give the proxy slot back once the connection is closed."""
+        close = writer.close
+        released = False
+
+        def close_and_release():
+            nonlocal released
+            if not released:
+                released = True
+                self._release(state)
+            close()
+
+        writer.close = close_and_release
+
+    def health(self) -> dict[str, dict]:
+        """Return the state of each proxy, keyed by proxy URL."""
+        now = time.monotonic()
+        return {
+            str(state.proxy): {
+                "healthy": state.healthy(now),
+                "in_use": state.in_use,
+                "consecutive_failures": state.failures,
+                "successes": state.successes,
+            }
+            for state in self._states
+        }
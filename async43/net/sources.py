@@ -0,0 +1,151 @@
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+logger = logging.getLogger("async43")
+
+
+@dataclass
+class SourceUsage:
+    """Query accounting of one source address towards one WHOIS server."""
+    queries: int = 0
+    window_start: float = 0.0
+    window_queries: int = 0
+    last_used: float = 0.0
+    quota_hits: int = 0
+    cooldown_until: float = 0.0
+
+
+class SourceAddressPool:
+    """
+    Pool of local IPv4 and IPv6 addresses to send WHOIS queries from.
+
+    Registries throttle per source address, so usage is accounted per
+    (source, server) pair. For each connection the least recently used
+    address of the right family that is neither cooling down nor over its
+    quota for the target server is picked. An address that triggers a quota
+    response is taken out of rotation for that server during ``cooldown``
+    seconds, or the retry-after delay announced by the server.
+    """
+
+    def __init__(
+            self,
+            addresses: Iterable[str],
+            cooldown: float = 300,
+            max_queries: Optional[int] = None,
+            window: float = 60,
+    ):
+        """
+        :param addresses: Local IPv4 and/or IPv6 addresses.
+        :param cooldown: Seconds an address stays out of rotation for a
+            server after a quota response.
+        :param max_queries: Optional maximum number of queries per address
+            and server within ``window`` seconds.
+        :param window: Length of the accounting window in seconds.
+        """
+        self.addresses = [str(ipaddress.ip_address(address)) for address in addresses]
+        self.cooldown = cooldown
+        self.max_queries = max_queries
+        self.window = window
+        self._families = {
+            address: socket.AF_INET6 if ipaddress.ip_address(address).version == 6 else socket.AF_INET
+            for address in self.addresses
+        }
+        self._usage: dict[tuple[str, str], SourceUsage] = {}
+        self._lock = threading.Lock()
+
+    def has_family(self, family: int) -> bool:
+        """Whether the pool holds addresses of the given address family."""
+        return family in self._families.values()
+
+    def _usage_for(self, source: str, server: str) -> SourceUsage:
+        return self._usage.setdefault((source, server.lower()), SourceUsage())
+
+    def _available(self, usage: SourceUsage, now: float) -> bool:
+        if usage.cooldown_until > now:
+            return False
+        if self.max_queries is None or now - usage.window_start >= self.window:
+            return True
+        return usage.window_queries < self.max_queries
+
+    def acquire(self, server: str, family: int) -> Optional[str]:
+        """
+        Pick the source address for a new connection to ``server`` and account for it.
+
+        :param server: Target WHOIS server hostname.
+        :param family: ``socket.AF_INET`` or ``socket.AF_INET6``.
+        :return: The address to bind to, or None if the pool has no address
+            of this family or all of them are cooling down or over quota.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                (self._usage_for(address, server), address)
+                for address, address_family in self._families.items()
+                if address_family == family
+            ]
+            candidates = [(usage, address) for usage, address in candidates if self._available(usage, now)]
+            if not candidates:
+                return None
+
+            usage, address = min(candidates, key=lambda candidate: candidate[0].last_used)
+            if now - usage.window_start >= self.window:
+                usage.window_start = now
+                usage.window_queries = 0
+            usage.window_queries += 1
+            usage.queries += 1
+            usage.last_used = now
+            return address
+
+    def report_quota(self, source: str, server: str, retry_after: Optional[float] = None) -> None:
+        """
+        Take ``source`` out of rotation for ``server`` after a quota response.
+
+        :param source: Local address the query was sent from.
+        :param server: WHOIS server that refused the query.
+        :param retry_after: Delay announced by the server, if any.
+        """
+        try:
+            source = str(ipaddress.ip_address(source))
+        except ValueError:
+            return
+        if source not in self._families:
+            return
+
+        with self._lock:
+            usage = self._usage_for(source, server)
+            usage.quota_hits += 1
+            usage.cooldown_until = time.monotonic() + (retry_after if retry_after is not None else self.cooldown)
+        logger.debug("Source address %s is cooling down for %s", source, server)
+
+    def next_available_in(self, server: str, family: int) -> Optional[float]:
+        """Seconds until an address of ``family`` is usable again for ``server``."""
+        now = time.monotonic()
+        with self._lock:
+            delays = []
+            for address, address_family in self._families.items():
+                if address_family != family:
+                    continue
+                usage = self._usage_for(address, server)
+                delay = max(usage.cooldown_until - now, 0)
+                if self.max_queries is not None and usage.window_queries >= self.max_queries:
+                    delay = max(delay, usage.window_start + self.window - now)
+                delays.append(delay)
+        return min(delays) if delays else None
+
+    def stats(self) -> dict[str, dict[str, dict]]:
+        """Return the accounting per source address, then per server."""
+        now = time.monotonic()
+        with self._lock:
+            result: dict[str, dict[str, dict]] = {address: {} for address in self.addresses}
+            for (address, server), usage in self._usage.items():
+                result[address][server] = {
+                    "queries": usage.queries,
+                    "quota_hits": usage.quota_hits,
+                    "cooling_down": usage.cooldown_until > now,
+                }
+            return result
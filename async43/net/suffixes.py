@@ -0,0 +1,70 @@
+from functools import lru_cache
+from typing import Optional
+
+# Key holding the server of the suffix ending at a node, labels are never empty
+_SERVER = ""
+
+
+class SuffixIndex:
+    """
+    Trie of domain suffixes to their WHOIS server, on reversed labels.
+
+    ``ac.uk`` is stored under ``uk`` then ``ac``, so a lookup walks the
+    labels of a domain from the TLD down and keeps the deepest suffix that
+    has a server: the longest matching suffix.
+    """
+
+    def __init__(self, servers: dict[str, str]):
+        """
+        Build the index.
+
+        :param servers: WHOIS server of each suffix, such as ``WHOIS_SERVERS``.
+        """
+        self._root: dict = {}
+        self._size = 0
+        for suffix, server in servers.items():
+            node = self._root
+            for label in reversed(suffix.lower().strip(".").split(".")):
+                node = node.setdefault(label, {})
+            if _SERVER not in node:
+                self._size += 1
+            node[_SERVER] = server
+
+    def lookup(self, domain: str) -> tuple[Optional[str], Optional[str]]:
+        """
+        Find the longest suffix of ``domain`` that has a WHOIS server.
+
+        :param domain: Domain name, punycoded.
+        :return: The matching suffix and its server, or (None, None).
+        """
+        labels = domain.lower().strip(".").split(".")
+        node = self._root
+        match: tuple[Optional[str], Optional[str]] = (None, None)
+        for depth, label in enumerate(reversed(labels), start=1):
+            node = node.get(label)
+            if node is None:
+                break
+            if _SERVER in node:
+                match = (".".join(labels[-depth:]), node[_SERVER])
+        return match
+
+    def __len__(self) -> int:
+        return self._size
+
+
+@lru_cache(maxsize=None)
+def _index() -> SuffixIndex:
+    """Build the index from the bundled table on first use."""
+    from async43.servers import WHOIS_SERVERS  # pylint: disable=import-outside-toplevel
+    return SuffixIndex(WHOIS_SERVERS)
+
+
+def suffix_whois_server(domain: str) -> tuple[Optional[str], Optional[str]]:
+    """
+    Return the longest suffix of ``domain`` found in ``WHOIS_SERVERS``, and
+    its WHOIS server.
+
+    :param domain: Domain name, punycoded.
+    :return: The matching suffix and its server, or (None, None).
+    """
+    return _index().lookup(domain)
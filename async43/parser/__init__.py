@@ -8,6 +8,7 @@ from async43.parser.structure import parse_whois
 from async43.parser.engine import normalize_whois_tree_fuzzy
 from async43.exceptions import WhoisDomainNotFoundError, WhoisInternalError
 from async43.model import Whois
+from async43.net.quota import raise_for_quota
 
 
 logger = logging.getLogger("async43")
@@ -44,6 +45,8 @@ def parse(raw_text: str) -> Whois:
     :param raw_text: Raw WHOIS response as returned by a WHOIS server.
     :return: A populated ``Whois`` model containing structured WHOIS data.
 
+    :raises WhoisQuotaExceededError:
+        If the WHOIS response is a quota or rate limit reply.
     :raises WhoisDomainNotFoundError:
         If the WHOIS response explicitly indicates that the domain does not
         exist, or if the parsed result contains no meaningful data.
@@ -52,6 +55,7 @@ def parse(raw_text: str) -> Whois:
     :raises pydantic.ValidationError:
         If the normalized data cannot be validated against the ``Whois`` model.
     """
+    raise_for_quota(raw_text)
     tree = parse_whois(raw_text)
     logger.debug("\n--- DEBUG STRUCTURE ---")
     print_nodes(tree)
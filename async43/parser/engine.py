@@ -1,12 +1,14 @@
 import logging
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Optional, Any, Dict
 
 from rapidfuzz import process, fuzz
-from text_scrubber.geo import find_city_in_string, find_country_in_string
+from text_scrubber.geo import find_country_in_string
 
 from async43.parser.constants import SCHEMA_MAPPING
 from async43.parser.detector import HeuristicDetector
+from async43.parser.geo import find_city
 from async43.parser.structure import Node
 
 logger = logging.getLogger("async43")
@@ -140,12 +142,19 @@ class SchemaMapper:
         ]
 
         self.section_triggers: Dict[str, str] = {}
+        # Lowercased alias to the first field path listing it, and alias to path for fuzzy matches
+        self.exact_paths: Dict[str, str] = {}
+        self.alias_paths: Dict[str, str] = {}
         # Revert mapping so we have a "technical contact" to "technical" section logic
         for key, aliases in mapping.items():
             if key.startswith("SECTION_"):
                 section = key.replace("SECTION_", "").lower()
                 for alias in aliases:
                     self.section_triggers[alias.lower()] = section
+                continue
+            for alias in aliases:
+                self.exact_paths.setdefault(alias.lower(), key)
+                self.alias_paths.setdefault(alias, key)
 
         # Allows to detect sections from values like "contact: technical".
         # Values here can look stupid but may evolve
@@ -236,13 +245,11 @@ class SchemaMapper:
 
         Returns the first matching path, or None if no match found.
         """
-        for path, aliases in self.mapping.items():
-            if path.startswith("SECTION_"):
-                continue
-            if term in (a.lower() for a in aliases):
-                logger.debug("Exact match: '%s' -> %s", term, path)
-                return MappingTarget(path)
-        return None
+        path = self.exact_paths.get(term)
+        if path is None:
+            return None
+        logger.debug("Exact match: '%s' -> %s", term, path)
+        return MappingTarget(path)
 
     def _try_fuzzy_match(self, term: str) -> Optional[MappingTarget]:
         """
@@ -257,16 +264,14 @@ class SchemaMapper:
         if not match or match[1] <= 90:
             return None
 
-        for path, aliases in self.mapping.items():
-            if path.startswith("SECTION_"):
-                continue
-            if match[0] in aliases:
-                logger.debug(
-                    "Fuzzy match: '%s' -> '%s' -> %s",
-                    term, match[0], path,
-                )
-                return MappingTarget(path)
-        return None
+        path = self.alias_paths.get(match[0])
+        if path is None:
+            return None
+        logger.debug(
+            "Fuzzy match: '%s' -> '%s' -> %s",
+            term, match[0], path,
+        )
+        return MappingTarget(path)
 
     def _try_map_to_field(self, search_terms: List[str]) -> Optional[MappingTarget]:
         """
@@ -335,6 +340,12 @@ class SchemaMapper:
         return result
 
 
+@lru_cache(maxsize=1)
+def default_mapper() -> SchemaMapper:
+    """Return the mapper of ``SCHEMA_MAPPING``, built once and shared by every parse."""
+    return SchemaMapper(SCHEMA_MAPPING)
+
+
 class WhoisEngine:
     """
     Traverses the parsed WHOIS tree and builds a normalized WHOIS output.
@@ -348,7 +359,7 @@ class WhoisEngine:
     """
 
     def __init__(self):
-        self.mapper = SchemaMapper(SCHEMA_MAPPING)
+        self.mapper = default_mapper()
         self.ctx = WhoisContext()
         self.detector = HeuristicDetector()
 
@@ -498,9 +509,7 @@ class WhoisEngine:
         Detect and store city and country information from a text line.
         """
         if detected_countries:
-            cities = find_city_in_string(
-                content, country_set=detected_countries
-            )
+            cities = find_city(content, detected_countries)
             if cities:
                 self.ctx.update_value(
                     self._contact_path("city"),
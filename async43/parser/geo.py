@@ -0,0 +1,122 @@
+import hashlib
+import importlib.metadata
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from functools import lru_cache
+from typing import Iterable, List
+
+import text_scrubber.geo
+from text_scrubber.geo import find_city_in_string
+from text_scrubber.geo.normalize import normalize_country_to_country_codes
+# text_scrubber keeps the city indices it builds in this module level map
+from text_scrubber.geo.resources import _CITY_RESOURCES, add_city_resources
+
+from async43.cache import default_cache_dir
+
+logger = logging.getLogger("async43")
+
+# Bump when the layout of the cached files changes
+GEO_CACHE_VERSION = 1
+
+
+def _version(distribution: str) -> str:
+    try:
+        return importlib.metadata.version(distribution)
+    except importlib.metadata.PackageNotFoundError:
+        return "dev"
+
+
+@lru_cache(maxsize=1)
+def _cache_key() -> str:
+    """Versions the pickled indices depend on: the package, text_scrubber, scipy and Python."""
+    parts = [
+        str(GEO_CACHE_VERSION),
+        _version("async43"),
+        _version("text-scrubber"),
+        _version("scipy"),
+        f"{sys.version_info.major}.{sys.version_info.minor}",
+        str(pickle.HIGHEST_PROTOCOL),
+    ]
+    return "-".join(parts)
+
+
+def _resource_path(country_code: str) -> str:
+    return os.path.join(os.path.dirname(text_scrubber.geo.__file__), "resources", "cities_per_country",
+                        f"{country_code}.txt")
+
+
+def _cache_path(country_code: str) -> str:
+    """
+    Path of the cached index of a country, named after a hash of the
+    versions and of the city list it was built from.
+    """
+    digest = hashlib.sha256(_cache_key().encode())
+    with open(_resource_path(country_code), "rb") as fd:
+        digest.update(fd.read())
+    return os.path.join(default_cache_dir(), "geo", f"{country_code}-{digest.hexdigest()[:16]}.pickle")
+
+
+def _build_and_store(country_code: str, path: str) -> None:
+    """Build the city index of a country with text_scrubber and write it to ``path``."""
+    add_city_resources({country_code})
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False) as fd:
+            pickle.dump(_CITY_RESOURCES["cities_per_country_code_map"][country_code], fd,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(fd.name, path)
+    except OSError as exception:
+        logger.debug("Could not cache the city index of %s: %s", country_code, exception)
+        return
+
+    # Indices built for other versions are not needed anymore
+    prefix = f"{country_code}-"
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(".pickle") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def load_city_resources(countries: Iterable[str]) -> None:
+    """
+    Make sure text_scrubber has the city indices of ``countries``.
+
+    Building the index of a country takes text_scrubber from a tenth of a
+    second to a few seconds, for every new process. Built indices are kept
+    as pickles under ``default_cache_dir()`` so that later processes only
+    have to load them.
+
+    :param countries: Country names or codes, as accepted by text_scrubber.
+    """
+    loaded = _CITY_RESOURCES["cities_per_country_code_map"]
+    for country_code in normalize_country_to_country_codes(countries):
+        if country_code in loaded:
+            continue
+
+        try:
+            path = _cache_path(country_code)
+        except OSError:
+            # No city list for this country, text_scrubber handles it
+            continue
+
+        try:
+            with open(path, "rb") as fd:
+                loaded[country_code] = pickle.load(fd)
+            continue
+        except FileNotFoundError:
+            pass
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as exception:
+            logger.debug("Ignoring the cached city index of %s: %s", country_code, exception)
+        _build_and_store(country_code, path)
+
+
+def find_city(sample: str, countries: set) -> List:
+    """``find_city_in_string`` restricted to ``countries``, with their indices loaded from the cache."""
+    load_city_resources(countries)
+    return find_city_in_string(sample, country_set=countries)
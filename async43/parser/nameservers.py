@@ -2,7 +2,7 @@ import ipaddress
 import re
 from typing import List, Set, Tuple, Dict
 
-import tldextract
+from async43 import psl
 
 
 def is_global_ip(ip_str: str) -> bool:
@@ -55,7 +55,7 @@ def is_valid_nameserver_hostname(hostname: str) -> bool:
     Nameservers typically have a subdomain (ns1.google.com, dns.example.net).
     """
     try:
-        extracted = tldextract.extract(hostname, include_psl_private_domains=True)
+        extracted = psl.extract(hostname)
 
         if not extracted.domain or not extracted.suffix:
             return False
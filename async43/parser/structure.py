@@ -4,6 +4,7 @@ from async43.parser.constants import LEGAL_MENTIONS
 
 
 TAB_WIDTH = 4
+_LEGAL_MENTIONS = tuple(mention.lower() for mention in LEGAL_MENTIONS)
 
 
 def normalize_indent(line: str) -> tuple[int, str]:
@@ -144,9 +145,8 @@ def parse_whois(text: str) -> List[Node]:
     stack: List[Node] = []
 
     for raw_line in lines:
-        if is_comment(raw_line) or any(
-            m.lower() in raw_line.lower() for m in LEGAL_MENTIONS
-        ):
+        lowered_line = raw_line.lower()
+        if is_comment(raw_line) or any(m in lowered_line for m in _LEGAL_MENTIONS):
             continue
 
         indent, content = normalize_indent(raw_line)
@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import tldextract
+    from tldextract.tldextract import ExtractResult
+
+# Most recent names whose public suffix split is kept
+MAX_ENTRIES = 65_536
+
+
+@lru_cache(maxsize=1)
+def _extractor() -> "tldextract.TLDExtract":
+    """
+    Build the extractor on first use.
+
+    It reads the public suffix list snapshot bundled with tldextract, never
+    the network nor a disk cache, and includes the private suffixes such as
+    ``blogspot.com``. tldextract itself is only imported then.
+    """
+    import tldextract  # pylint: disable=import-outside-toplevel,redefined-outer-name
+    return tldextract.TLDExtract(cache_dir=None, suffix_list_urls=(), include_psl_private_domains=True)
+
+
+@lru_cache(maxsize=MAX_ENTRIES)
+def extract(name: str) -> "ExtractResult":
+    """
+    Split a hostname or URL into subdomain, registrable label and public suffix.
+
+    Every part of the package goes through this function, so a name seen
+    by ``extract_domain()``, the nameserver parser or elsewhere is only
+    split once while it stays among the ``MAX_ENTRIES`` most recent ones.
+    """
+    return _extractor()(name)
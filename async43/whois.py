@@ -1,23 +1,49 @@
+# pylint: disable=too-many-lines
 import asyncio
+import ipaddress
 import logging
 import optparse
 import os
 import re
 import socket
 import sys
-from contextlib import asynccontextmanager
-from typing import Optional, Tuple, AsyncGenerator, Iterator
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from typing import Optional, Tuple, AsyncContextManager, AsyncGenerator, AsyncIterator, Iterable, Iterator
 
 from async_lru import alru_cache
-from tldextract import extract
 
-from async43.exceptions import WhoisNetworkError
-from async43.servers import WHOIS_SERVERS
+from async43 import psl
+from async43.cache import IANA_NEGATIVE_TTL, IanaCache, RangeCache, ReferralMemo, default_iana_cache
+from async43.exceptions import WhoisCircuitOpenError, WhoisError, WhoisNetworkError, WhoisQuotaExceededError
+from async43.net.breaker import BreakerRegistry
+from async43.net.bulk import BulkProtocol, bulk_protocol_for
+from async43.net.formats import QueryFormatRegistry, query_formats as default_query_formats
+from async43.net.hedging import HedgePolicy
+from async43.net.limits import ServerLimits
+from async43.net.pool import SessionPool
+from async43.net.quota import raise_for_quota
+from async43.net.referral import WHOIS_PORT, scan_referral, split_host_port
+from async43.net.rir import rir_whois_server
+from async43.net.scoring import AddressScores
+from async43.net.socks import ProxyPool
+from async43.net.sources import SourceAddressPool
+from async43.net.suffixes import suffix_whois_server
 
 logger = logging.getLogger("async43")
 
 
-class NICClient:
+def _is_ip(value: str) -> bool:
+    """Whether ``value`` is an IPv4 or IPv6 address."""
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return True
+
+
+class NICClient:  # pylint: disable=too-many-instance-attributes
     """
     Asynchronous WHOIS client responsible for selecting and querying
     appropriate NIC (Network Information Center) servers.
@@ -55,9 +81,29 @@ class NICClient:
     WHOIS_RECURSE = 0x01
     WHOIS_QUICK = 0x02
 
+    # Probe answers kept for the lookups that triggered them
+    PROBE_ANSWERS_SIZE = 256
+
     ip_whois: list[str] = [LNICHOST, RNICHOST, PNICHOST, BNICHOST, PANDIHOST]
 
-    def __init__(self, prefer_ipv6: bool = False, ipv6_cycle: Optional[Iterator[str]] = None):
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+            self,
+            prefer_ipv6: bool = False,
+            ipv6_cycle: Optional[Iterator[str]] = None,
+            referral_memo: Optional[ReferralMemo] = None,
+            verify_referrals: bool = False,
+            query_formats: Optional[QueryFormatRegistry] = None,
+            range_cache: Optional[RangeCache] = None,
+            session_pool: Optional[SessionPool] = None,
+            proxies: Optional[ProxyPool] = None,
+            source_pool: Optional[SourceAddressPool] = None,
+            limits: Optional[ServerLimits] = None,
+            breakers: Optional[BreakerRegistry] = None,
+            hedging: Optional[HedgePolicy] = None,
+            address_scores: Optional[AddressScores] = None,
+            speculative: bool = False,
+            iana_cache: Optional[IanaCache] = None,
+    ):
         """
         Initialize a NICClient instance.
 
@@ -65,135 +111,172 @@ class NICClient:
             resolving WHOIS server hostnames.
         :param ipv6_cycle: Optional iterator of IPv6 source addresses to cycle
             through when establishing IPv6 connections.
+        :param referral_memo: Optional memo of domain to registrar WHOIS server.
+            When set, referrals followed during lookups are recorded and later
+            lookups of the same domain query the registrar server directly.
+            Their answer is then the registrar record alone, without the
+            registry record a regular lookup puts before it.
+        :param verify_referrals: When a memoized referral is used, also query
+            the registry in the background to refresh the memo.
+        :param query_formats: Optional registry of per-server query formats.
+            Defaults to a registry shared by all clients.
+        :param range_cache: Optional cache of IP WHOIS answers indexed by the
+            address block they describe. Addresses inside a cached block are
+            answered from memory.
+        :param session_pool: Optional pool of persistent (``-k``) sessions
+            used for RIPE-style servers such as whois.ripe.net.
+        :param proxies: Optional pool of SOCKS proxies to connect through.
+            Defaults to the proxy set in the ``SOCKS`` environment variable,
+            if any.
+        :param source_pool: Optional pool of local IPv4/IPv6 addresses to
+            send queries from, with per-server accounting. Takes precedence
+            over ``ipv6_cycle`` for the families it holds.
+        :param limits: Optional adaptive per-server concurrency limits. Each
+            server's limit grows while its queries succeed and shrinks on
+            quota replies, timeouts and connection resets.
+        :param breakers: Optional per-server circuit breakers. A server that
+            keeps failing is not contacted for a while, queries to it failing
+            immediately with ``WhoisCircuitOpenError``.
+        :param hedging: Optional hedging policy. Queries slower than the
+            server's usual latency get a duplicate sent to another address
+            of the server, the first complete answer winning. Hedges take a
+            slot of the server when ``limits`` are enabled.
+        :param address_scores: Optional latency and error scores of each
+            resolved address of the WHOIS servers. Connections then go to the
+            best-scoring address first instead of following resolver order.
+        :param speculative: For suffixes missing from ``WHOIS_SERVERS``,
+            also try the conventional ``whois.nic.<tld>`` server while IANA
+            is being asked, and use whichever confirmed answer comes first.
+        :param iana_cache: Optional cache of the WHOIS servers IANA gave for
+            each TLD. Defaults to an on-disk cache shared by all clients and
+            processes, see ``default_iana_cache()``.
         """
         self.use_qnichost: bool = False
         self.prefer_ipv6 = prefer_ipv6
         self.ipv6_cycle = ipv6_cycle
+        self.referral_memo = referral_memo
+        self.verify_referrals = verify_referrals
+        self.query_formats = query_formats if query_formats is not None else default_query_formats
+        self.range_cache = range_cache
+        self.session_pool = session_pool
+        if proxies is None and os.environ.get("SOCKS"):
+            proxies = ProxyPool.from_env(os.environ["SOCKS"])
+        self.proxies = proxies
+        self.source_pool = source_pool
+        self.limits = limits
+        self.breakers = breakers
+        self.hedging = hedging
+        self.address_scores = address_scores
+        self.speculative = speculative
+        self.iana_cache = iana_cache
+        # Servers found through IANA or probing for suffixes missing from WHOIS_SERVERS
+        self.learned_servers: dict[str, str] = {}
+        # Registry answers of speculative probes, not used by a lookup yet
+        self._probe_answers: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._background_tasks: set[asyncio.Task] = set()
 
     @staticmethod
-    def findwhois_server(buf: str, hostname: str, query: str) -> Optional[str]:
+    def findwhois_server(buf: str, hostname: str, query: str) -> Optional[str]:  # pylint: disable=unused-argument
         """
         Attempt to extract a referral WHOIS server from a WHOIS response.
 
         This method inspects the raw response returned by an initial WHOIS
         query and tries to identify a more specific WHOIS server that should
         be queried next (for example, a registrar or regional registry).
+        See ``async43.net.referral.scan_referral`` for the recognized formats.
 
         :param buf: Raw WHOIS response text.
         :param hostname: Hostname of the WHOIS server that returned the response.
-        :param query: Original query string (domain or IP).
-        :return: The hostname of the referred WHOIS server if found, otherwise None.
+        :param query: Original query string (domain or IP). Kept for backward
+            compatibility, the referral does not depend on it.
+        :return: The referred WHOIS server if found, otherwise None. A port
+            other than 43 is appended as ``host:port``.
         """
-        nhost = None
-        match = re.compile(
-             rf"Domain Name: {re.escape(query)}\s*.*?Whois Server: (.*?)\s",
-            flags=re.IGNORECASE | re.DOTALL,
-        ).search(buf)
-        if match:
-            nhost = match.group(1)
-            if nhost.count("/") > 0:
-                nhost = None
-        elif hostname == NICClient.ANICHOST:
-            for nichost in NICClient.ip_whois:
-                if buf.find(nichost) != -1:
-                    nhost = nichost
-                    break
-        return nhost
+        referral = scan_referral(buf, hostname)
+        return str(referral) if referral else None
 
-    @staticmethod
-    def get_socks_socket():
+    async def _resolve(self, hostname: str, port: int, rotate: int = 0) -> list[tuple]:
         """
-        Create and configure a SOCKS5 socket based on the ``SOCKS`` environment
-        variable.
+        Resolve a WHOIS server into the addresses to try, in order.
 
-        The ``SOCKS`` variable must be defined in the form::
+        Addresses are ordered by score when address scores are kept, IPv6
+        ones first if preferred, then rotated by ``rotate`` positions.
 
-            host:port
-            user:password@host:port
-
-        :raises ImportError: If the ``PySocks`` module is not installed.
-        :return: A configured SOCKS socket instance.
+        :raises WhoisNetworkError: If the hostname can't be resolved.
         """
         try:
-            import socks  # pylint: disable=import-outside-toplevel
-        except ImportError as e:
-            logger.error(
-                "You need to install the Python socks module. Install PIP "
-                "(https://bootstrap.pypa.io/get-pip.py) and then 'pip install PySocks'"
+            loop = asyncio.get_running_loop()
+            addr_infos = await loop.getaddrinfo(
+                hostname,
+                port,
+                family=socket.AF_UNSPEC,
+                type=socket.SOCK_STREAM,
             )
-            raise e
-        socks_user, socks_password = None, None
-        if "@" in os.environ["SOCKS"]:
-            creds, proxy = os.environ["SOCKS"].split("@")
-            socks_user, socks_password = creds.split(":")
-        else:
-            proxy = os.environ["SOCKS"]
-        socksproxy, port = proxy.split(":")
-        socks_proto = socket.AF_INET
-        if socket.AF_INET6 in [
-            sock[0] for sock in socket.getaddrinfo(socksproxy, port)
-        ]:
-            socks_proto = socket.AF_INET6
-        s = socks.socksocket(socks_proto)
-        s.set_proxy(
-            socks.SOCKS5, socksproxy, int(port), True, socks_user, socks_password
-        )
-        return s
+        except socket.gaierror as e:
+            raise WhoisNetworkError(f"Could not resolve WHOIS server {hostname}: {e}") from e
+
+        if self.address_scores is not None:
+            addr_infos = self.address_scores.order(hostname, addr_infos)
+        if self.prefer_ipv6:
+            addr_infos.sort(key=lambda x: x[0], reverse=True)
+        if rotate and addr_infos:
+            rotate %= len(addr_infos)
+            addr_infos = addr_infos[rotate:] + addr_infos[:rotate]
+        return addr_infos
 
     async def _open_connection(
             self,
             hostname: str,
             timeout: int,
+            port: int = WHOIS_PORT,
+            rotate: int = 0,
     ) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
         """
         Open an asynchronous TCP connection to a WHOIS server.
 
-        This method resolves the target hostname, optionally prefers IPv6,
-        supports cycling source IPv6 addresses, and falls back across
-        available interfaces until a connection succeeds.
+        This method resolves the target hostname (see ``_resolve``), picks
+        the source address from the source address pool (or cycles source
+        IPv6 addresses), and falls back across available interfaces until a
+        connection succeeds.
 
-        SOCKS proxies are supported via the ``SOCKS`` environment variable.
+        Connections go through the SOCKS proxy pool when one is configured,
+        either programmatically or via the ``SOCKS`` environment variable.
 
         :param hostname: WHOIS server hostname.
         :param timeout: Connection timeout in seconds.
+        :param port: TCP port of the WHOIS server.
+        :param rotate: Number of resolved addresses to move to the end of
+            the list, to reach another address than a previous connection.
         :raises WhoisNetworkError: If no connection could be established.
+        :raises WhoisQuotaExceededError: If every source address of the pool
+            is cooling down or over quota for this server.
         :return: A tuple of (StreamReader, StreamWriter).
         """
-        port = 43
-
-        if "SOCKS" in os.environ:
+        if self.proxies is not None:
             try:
-                s = NICClient.get_socks_socket()
-                s.settimeout(timeout)
-                s.connect((hostname, port))
-                return await asyncio.open_connection(sock=s)
+                return await self.proxies.open_connection(hostname, port, timeout)
             except (OSError, asyncio.TimeoutError) as e:
                 raise WhoisNetworkError(f"SOCKS connection failed for {hostname}: {e}") from e
 
-        try:
-            loop = asyncio.get_running_loop()
-            addr_infos = await loop.getaddrinfo(
-                hostname,
-                port,
-                family=socket.AF_UNSPEC,
-                type=socket.SOCK_STREAM,
-            )
-        except socket.gaierror as e:
-            raise WhoisNetworkError(f"Could not resolve WHOIS server {hostname}: {e}") from e
-
-        if self.prefer_ipv6:
-            addr_infos.sort(key=lambda x: x[0], reverse=True)
-
+        addr_infos = await self._resolve(hostname, port, rotate)
         last_err: Exception | None = None
+        sources_exhausted = False
 
         for family, _, _, _, sockaddr in addr_infos:
             local_addr = None
-            if family == socket.AF_INET6 and self.ipv6_cycle:
+            if self.source_pool is not None and self.source_pool.has_family(family):
+                source_address = self.source_pool.acquire(hostname, family)
+                if source_address is None:
+                    sources_exhausted = True
+                    continue
+                local_addr = (source_address, 0)
+            elif family == socket.AF_INET6 and self.ipv6_cycle:
                 source_address = next(self.ipv6_cycle)
                 local_addr = (source_address, 0)
 
+            started = time.monotonic()
             try:
-                return await asyncio.wait_for(
+                connection = await asyncio.wait_for(
                     asyncio.open_connection(
                         host=sockaddr[0],
                         port=sockaddr[1],
@@ -203,6 +286,19 @@ class NICClient:
                 )
             except (OSError, asyncio.TimeoutError) as e:
                 last_err = e
+                if self.address_scores is not None:
+                    self.address_scores.record_failure(hostname, sockaddr[0], time.monotonic() - started)
+                continue
+
+            if self.address_scores is not None:
+                self.address_scores.record_success(hostname, sockaddr[0], time.monotonic() - started)
+            return connection
+
+        if sources_exhausted and last_err is None:
+            raise WhoisQuotaExceededError(
+                f"Every source address is cooling down or over quota for {hostname}",
+                server=hostname,
+            )
 
         msg = f"Interface connection failed for {hostname}"
         if last_err:
@@ -215,6 +311,8 @@ class NICClient:
             self,
             hostname: str,
             timeout: int,
+            port: int = WHOIS_PORT,
+            rotate: int = 0,
     ) -> AsyncGenerator[Tuple[asyncio.StreamReader, asyncio.StreamWriter], None]:
         """
         Asynchronous context manager that opens and safely closes
@@ -225,31 +323,40 @@ class NICClient:
 
         :param hostname: WHOIS server hostname.
         :param timeout: Connection timeout in seconds.
+        :param port: TCP port of the WHOIS server.
+        :param rotate: See ``_open_connection``.
         :yield: A tuple of (StreamReader, StreamWriter).
         """
         writer: asyncio.StreamWriter | None = None
 
         try:
-            reader, writer = await self._open_connection(hostname, timeout)
+            reader, writer = await self._open_connection(hostname, timeout, port, rotate)
             yield reader, writer
         finally:
             if writer:
                 writer.close()
                 await writer.wait_closed()
 
-    @alru_cache(ttl=86400)
+    @alru_cache(ttl=IANA_NEGATIVE_TTL)
     async def findwhois_iana(self, tld: str, timeout: int = 10) -> Optional[str]:
         """
         Query IANA to discover the authoritative WHOIS server for a TLD.
 
-        The result is cached for 24 hours to reduce network traffic and
-        improve performance.
+        The result is cached for an hour in memory, and in the IANA cache so
+        that other clients and processes don't ask again. Only complete
+        answers (with a ``domain:`` line) count as IANA knowing no server.
 
         :param tld: Top-level domain (without leading dot).
         :param timeout: Network timeout in seconds.
-        :raises WhoisNetworkError: If the IANA WHOIS server cannot be reached.
+        :raises WhoisNetworkError: If the IANA WHOIS server cannot be reached
+            or its answer is empty or truncated.
         :return: Hostname of the authoritative WHOIS server, or None if not found.
         """
+        iana_cache = self.iana_cache if self.iana_cache is not None else default_iana_cache()
+        cached = iana_cache.get(tld.lower())
+        if cached is not None:
+            return cached or None
+
         try:
             # noinspection PyArgumentList
             async with self._connect("whois.iana.org", timeout) as (reader, writer):
@@ -259,8 +366,17 @@ class NICClient:
         except (OSError, asyncio.TimeoutError) as exception:
             raise WhoisNetworkError(f"Network failure for whois.iana.org: {str(exception)}") from exception
 
-        match = re.search(r"whois:[ \t]+(.*?)\n", response.decode("utf-8"))
-        return match.group(1) if match and match.group(1) else None
+        text = response.decode("utf-8", "replace")
+        match = re.search(r"whois:[ \t]+(.*?)\n", text)
+        server = match.group(1).strip() if match and match.group(1) else None
+        # Writes to an SQLite cache may wait on other processes, keep them off the event loop
+        if server:
+            await asyncio.to_thread(iana_cache.set, tld.lower(), server)
+        elif re.search(r"^domain:", text, flags=re.MULTILINE | re.IGNORECASE):
+            await asyncio.to_thread(iana_cache.set, tld.lower(), "", ttl=iana_cache.negative_ttl)
+        else:
+            raise WhoisNetworkError(f"Incomplete answer from whois.iana.org for {tld}")
+        return server
 
     async def whois(
             self,
@@ -274,68 +390,454 @@ class NICClient:
         then, if the quick flag is false, search that result
         for the region-specific whois server and do a lookup
         there for contact details.
+
+        ``hostname`` may carry a port as ``host:port``.
+
+        :raises WhoisQuotaExceededError: If a server answered with a quota
+            or rate limit reply.
+        :raises WhoisCircuitOpenError: If the circuit breaker of a server is open.
         """
+        server = hostname
+        hostname, port = split_host_port(server)
+        many_results = many_results or self.query_formats.needs_many_results(hostname)
         try:
-            # noinspection PyArgumentList
-            async with self._connect(hostname, timeout) as (reader, writer):
-                if hostname == NICClient.DENICHOST:
-                    query_bytes = "-T dn,ace -C UTF-8 " + query
-                elif hostname == NICClient.DK_HOST:
-                    query_bytes = " --show-handles " + query
-                elif hostname.endswith(".jp"):
-                    query_bytes = query + "/e"
-                elif hostname.endswith(NICClient.QNICHOST_TAIL) and many_results:
-                    query_bytes = "=" + query
-                else:
-                    query_bytes = query
-
-                writer.write(bytes(query_bytes, "utf-8") + b"\r\n")
-                await writer.drain()
-
-                response = await reader.read()
-                response_str = response.decode("utf-8", "replace")
+            query_line = self.query_formats.build(hostname, query, many_results)
+            async with self._breaker_guard(hostname), self._server_slot(hostname):
+                response_str, source = await self._hedged_query(hostname, port, query_line, timeout)
+                try:
+                    raise_for_quota(response_str, hostname)
+                except WhoisQuotaExceededError as exception:
+                    self.report_quota(hostname, source, exception.retry_after)
+                    raise
 
-            nhost = None
-            if 'with "=xxx"' in response_str:
-                return await self.whois(query, hostname, flags, True, timeout=timeout)
-            if flags & NICClient.WHOIS_RECURSE and nhost is None:
-                nhost = self.findwhois_server(response_str, hostname, query)
-            if nhost is not None and nhost != "":
-                response_str += await self.whois(query, nhost, 0, timeout=timeout)
+            if 'with "=xxx"' in response_str and not many_results:
+                self.query_formats.learn_many_results(hostname)
+                return await self.whois(query, server, flags, True, timeout=timeout)
+            if flags & NICClient.WHOIS_RECURSE:
+                response_str = await self._follow_referral(query, hostname, response_str, timeout)
 
             return response_str
         except (asyncio.TimeoutError, OSError) as e:
             raise WhoisNetworkError(f"Network failure for {hostname}: {str(e)}") from e
 
+    async def _follow_referral(self, query: str, hostname: str, response: str, timeout: int) -> str:
+        """Append the answer of the registrar server ``response`` refers to, if any."""
+        nhost = self.findwhois_server(response, hostname, query)
+        if not nhost:
+            return response
+        if self.referral_memo is not None:
+            await asyncio.to_thread(self.referral_memo.set, query.lower(), nhost)
+        return response + await self.whois(query, nhost, 0, timeout=timeout)
+
+    async def _send_query(
+            self,
+            hostname: str,
+            port: int,
+            query_line: str,
+            timeout: int,
+            rotate: int = 0,
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Send one query line and return the whole response.
+
+        Queries to servers handled by the session pool reuse a persistent
+        connection, others use a connection of their own.
+
+        :param rotate: See ``_open_connection``.
+        :return: A tuple of (response, local address the query was sent
+            from), the address being None when unknown.
+        """
+        if self.session_pool is not None and self.session_pool.supports(hostname):
+            try:
+                response = await self.session_pool.query(hostname, port, query_line, timeout, self._open_connection)
+            except asyncio.IncompleteReadError as e:
+                raise WhoisNetworkError(f"{hostname} closed the persistent session") from e
+            return response, None
+
+        # noinspection PyArgumentList
+        async with self._connect(hostname, timeout, port, rotate) as (reader, writer):
+            sockname = writer.get_extra_info("sockname")
+            writer.write(bytes(query_line, "utf-8") + b"\r\n")
+            await writer.drain()
+            response = await reader.read()
+        return response.decode("utf-8", "replace"), sockname[0] if sockname else None
+
+    def _server_slot(self, hostname: str) -> AsyncContextManager:
+        """Hold a concurrency slot of ``hostname`` when limits are enabled."""
+        if self.limits is None:
+            return nullcontext()
+        return self.limits.slot(hostname)
+
+    def _breaker_guard(self, hostname: str) -> AsyncContextManager:
+        """Let a query through the circuit breaker of ``hostname`` when breakers are enabled."""
+        if self.breakers is None:
+            return nullcontext()
+        return self.breakers.guard(hostname)
+
+    def breaker_states(self) -> dict[str, dict]:
+        """Return the circuit breaker state of each server."""
+        return self.breakers.states() if self.breakers is not None else {}
+
+    def server_stats(self) -> dict[str, dict]:
+        """Return the concurrency limit and latency statistics of each server."""
+        return self.limits.stats() if self.limits is not None else {}
+
+    async def _hedged_query(
+            self,
+            hostname: str,
+            port: int,
+            query_line: str,
+            timeout: int,
+    ) -> Tuple[str, Optional[str]]:
+        """
+        Send one query line, hedging it with a duplicate sent to another
+        address of the server if it is slower than usual.
+
+        Without a hedging policy, or for persistent sessions, this is
+        ``_send_query``. A hedge needs a free slot of the server when
+        limits are enabled.
+        """
+        if self.hedging is None or (self.session_pool is not None and self.session_pool.supports(hostname)):
+            return await self._send_query(hostname, port, query_line, timeout)
+
+        started = time.monotonic()
+        delay = self.hedging.delay_for(hostname)
+        primary = asyncio.create_task(self._send_query(hostname, port, query_line, timeout))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                hedge_slot = self._hedge_slot(hostname)
+                if hedge_slot is not None:
+                    tasks.add(asyncio.create_task(self._send_hedge(hedge_slot, hostname, port, query_line, timeout)))
+
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedging.hedge_wins += 1
+                        self.hedging.record(hostname, time.monotonic() - started)
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _hedge_slot(self, hostname: str) -> Optional[AsyncContextManager]:
+        """Return what the hedge of a query must hold, or None if it must not be sent."""
+        if not self.hedging.has_budget():
+            return None
+        slot = nullcontext() if self.limits is None else self.limits.try_slot(hostname)
+        if slot is not None:
+            self.hedging.count_hedge()
+        return slot
+
+    async def _send_hedge(
+            self,
+            slot: AsyncContextManager,
+            hostname: str,
+            port: int,
+            query_line: str,
+            timeout: int,
+    ) -> Tuple[str, Optional[str]]:
+        """Send the hedge of a query to the next address of the server."""
+        logger.debug("Hedging query to %s", hostname)
+        async with slot:
+            return await self._send_query(hostname, port, query_line, timeout, rotate=1)
+
+    def report_quota(self, hostname: str, source: Optional[str], retry_after: Optional[float] = None) -> None:
+        """
+        Take the source address a quota response was received on out of
+        rotation for ``hostname``.
+
+        :param hostname: WHOIS server that answered with a quota response.
+        :param source: Local address the query was sent from.
+        :param retry_after: Delay announced by the server, if any.
+        """
+        if self.source_pool is not None and source:
+            self.source_pool.report_quota(source, hostname, retry_after)
+
+    async def close(self) -> None:
+        """Close the persistent sessions kept by the client, if any."""
+        if self.session_pool is not None:
+            await self.session_pool.close()
+
+    async def bulk_whois(
+            self,
+            queries: Iterable[str],
+            hostname: str = "whois.cymru.com",
+            protocol: Optional[BulkProtocol] = None,
+            batch_size: int = 1000,
+            timeout: int = 30,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Send many queries to a server accepting batched queries over one session.
+
+        Queries are packed in batches of ``batch_size``, each batch using a
+        single connection. Answers are yielded as they are read, in the
+        order of the queries.
+
+        :param queries: IP addresses, ASNs or protocol specific queries.
+        :param hostname: WHOIS server, optionally as ``host:port``.
+        :param protocol: Bulk protocol to use. Defaults to the one known for
+            ``hostname``.
+        :param batch_size: Maximum number of queries sent per session.
+        :param timeout: Network timeout in seconds, per read.
+        :raises ValueError: If no bulk protocol is known for ``hostname``.
+        :raises WhoisNetworkError: If a session fails before all of its
+            answers were received.
+        :yield: (query, answer) tuples.
+        """
+        host, port = split_host_port(hostname)
+        protocol = protocol or bulk_protocol_for(host)
+        if protocol is None:
+            raise ValueError(f"No bulk protocol is known for {hostname}")
+
+        batch: list[str] = []
+        for query in queries:
+            batch.append(query)
+            if len(batch) >= batch_size:
+                async for answer in self._bulk_session(host, port, protocol, batch, timeout):
+                    yield answer
+                batch = []
+
+        if batch:
+            async for answer in self._bulk_session(host, port, protocol, batch, timeout):
+                yield answer
+
+    async def _bulk_session(
+            self,
+            hostname: str,
+            port: int,
+            protocol: BulkProtocol,
+            batch: list[str],
+            timeout: int,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """Send one batch over one connection and stream its answers back."""
+        received = 0
+        try:
+            # noinspection PyArgumentList
+            async with self._connect(hostname, timeout, port) as (reader, writer):
+                writer.write(protocol.encode(batch))
+                await writer.drain()
+                async for answer in protocol.read_answers(reader, batch, timeout):
+                    received += 1
+                    yield answer
+        except asyncio.IncompleteReadError as e:
+            raise WhoisNetworkError(
+                f"{hostname} closed the bulk session after {received} of {len(batch)} answers"
+            ) from e
+        except (asyncio.TimeoutError, OSError) as e:
+            raise WhoisNetworkError(f"Network failure for {hostname}: {str(e)}") from e
+
     async def choose_server(
             self,
             domain: str,
             timeout: int = 10,
+            registrable: bool = False,
     ) -> Optional[str]:
-        """Choose the initial WHOIS NIC host for a domain."""
+        """Choose the initial WHOIS NIC host for a domain.
+
+        IP addresses are sent straight to the regional registry IANA
+        delegated their block to, falling back to ARIN for unknown space.
+        Domains go to the server of their longest suffix found in
+        ``WHOIS_SERVERS``, else to the one IANA gives for their TLD. Names
+        under no public suffix (``host.internal``...) have no server.
+
+        :param registrable: Whether ``domain`` is known to be under a public
+            suffix, as the result of ``extract_domain()`` is. This saves
+            checking it against the public suffix list when the domain is
+            missing from ``WHOIS_SERVERS``.
+        """
+        if _is_ip(domain):
+            server = rir_whois_server(domain) or self.ANICHOST
+            logger.debug("Server %s was selected for %s", server, domain)
+            return server
+
         domain = domain.encode("idna").decode("utf-8")
-        suffix = extract(domain, include_psl_private_domains=True).suffix
-        server = WHOIS_SERVERS.get(suffix)
+        _, server = suffix_whois_server(domain)
         if server:
             logger.debug("Server %s was selected for %s", server, domain)
             return server
 
-        tld = ""
-        if not suffix and "." in domain:
-            tld = domain.split(".")[-1]
-            if tld[0].isdigit():
-                return self.ANICHOST
+        tld = domain.rstrip(".").rsplit(".", 1)[-1].lower()
+        if tld[:1].isdigit():
+            return self.ANICHOST
+        if not tld or not (registrable or psl.extract(domain).suffix):
+            return None
+
+        server = self.learned_servers.get(tld)
+        if server:
+            logger.debug("Server %s was learned for %s", server, tld)
+            return server
+
+        if self.speculative:
+            server = await self._race_iana(tld, domain, timeout)
+        else:
+            server = await self.findwhois_iana(tld, timeout=timeout)
+        if server:
+            self.learned_servers[tld] = server
+        return server
+
+    async def _probe_nic_server(self, suffix: str, domain: str, timeout: int) -> Optional[str]:
+        """
+        Check whether the conventional ``whois.nic.<suffix>`` server answers
+        queries for ``domain``.
+
+        The probe is a regular registry query, through the breakers, limits
+        and quota checks. Its answer is kept for ``whois_lookup()`` to use
+        instead of querying the server again.
+
+        :return: The server hostname if it gave a non-empty answer, else None.
+        """
+        hostname = f"whois.nic.{suffix}"
+        try:
+            response = await self.whois(domain, hostname, 0, timeout=timeout)
+        except (WhoisError, OSError, asyncio.TimeoutError) as exception:
+            logger.debug("Speculative probe of %s failed: %s", hostname, exception)
+            return None
+        if not response.strip():
             return None
 
-        return await self.findwhois_iana(suffix or tld, timeout=timeout)
+        self._probe_answers[(hostname, domain.lower())] = response
+        while len(self._probe_answers) > self.PROBE_ANSWERS_SIZE:
+            self._probe_answers.popitem(last=False)
+        return hostname
+
+    async def _race_iana(self, suffix: str, domain: str, timeout: int) -> Optional[str]:
+        """
+        Ask IANA for the server of ``suffix`` while probing ``whois.nic.<suffix>``,
+        returning the first confirmed server.
+
+        When the probe wins, the IANA query goes on in the background and
+        corrects the learned server if IANA names another one.
+
+        :raises WhoisNetworkError: If IANA can't be reached and the probe failed.
+        """
+        iana = asyncio.create_task(self.findwhois_iana(suffix, timeout=timeout))
+        probe = asyncio.create_task(self._probe_nic_server(suffix, domain, timeout))
+        pending = {iana, probe}
+        winner: Optional[asyncio.Task] = None
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winner = next((task for task in done if task.exception() is None and task.result()), None)
+
+        if winner is None:
+            if iana.exception() is not None:
+                raise iana.exception()
+            return None
+
+        if winner is iana:
+            probe.cancel()
+        elif not iana.done():
+            self._background_tasks.add(iana)
+            iana.add_done_callback(lambda task: self._check_iana_answer(suffix, task))
+        else:
+            self._check_iana_answer(suffix, iana)
+        logger.debug("Server %s was found for %s by %s", winner.result(), suffix,
+                     "IANA" if winner is iana else "probing")
+        return winner.result()
+
+    def _check_iana_answer(self, suffix: str, task: asyncio.Task) -> None:
+        """Let the IANA answer override a server learned by probing."""
+        self._background_tasks.discard(task)
+        if task.cancelled() or task.exception() is not None or not task.result():
+            return
+        if self.learned_servers.get(suffix) != task.result():
+            logger.debug("IANA names %s for %s", task.result(), suffix)
+            self.learned_servers[suffix] = task.result()
+
+    def _cached_range_answer(self, query: str) -> Optional[str]:
+        """Return the cached answer of the address block containing ``query``, if any."""
+        if self.range_cache is None or not _is_ip(query):
+            return None
+
+        result = self.range_cache.get(query)
+        if result is not None:
+            logger.debug("Answering %s from the range cache", query)
+        return result
+
+    async def _whois_memoized_referral(self, query: str, flags: int, timeout: int) -> Optional[str]:
+        """
+        Query the registrar server remembered for ``query``, skipping the registry.
+
+        If the remembered server cannot be reached, the memo entry is dropped
+        and None is returned so the caller falls back to a regular lookup.
+        An open circuit breaker only means the server is unavailable for
+        now: the entry is kept.
+
+        :return: The registrar response alone, unlike a regular lookup that
+            returns the registry response followed by the registrar one, or
+            None if no usable referral is known.
+        """
+        if self.referral_memo is None or not flags & NICClient.WHOIS_RECURSE:
+            return None
+
+        nhost = self.referral_memo.get(query.lower())
+        if not nhost:
+            return None
+
+        logger.debug("Using memoized referral %s for %s", nhost, query)
+        try:
+            result = await self.whois(query, nhost, 0, timeout=timeout)
+        except WhoisCircuitOpenError as exception:
+            logger.debug("Memoized referral %s is unavailable for %s: %s", nhost, query, exception)
+            return None
+        except WhoisNetworkError as exception:
+            logger.debug("Memoized referral %s failed for %s: %s", nhost, query, exception)
+            await asyncio.to_thread(self.referral_memo.delete, query.lower())
+            return None
+
+        if self.verify_referrals:
+            task = asyncio.create_task(self._refresh_referral(query, timeout))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+
+        return result
+
+    async def _refresh_referral(self, query: str, timeout: int) -> None:
+        """
+        Ask the registry for the current referral of ``query`` and update the memo.
+        """
+        try:
+            nichost = await self.choose_server(query, timeout=timeout)
+            if nichost is None:
+                return
+            response = await self.whois(query, nichost, 0, timeout=timeout)
+        except (WhoisNetworkError, WhoisQuotaExceededError) as exception:
+            logger.debug("Background referral check failed for %s: %s", query, exception)
+            return
+
+        nhost = self.findwhois_server(response, nichost, query)
+        if nhost:
+            await asyncio.to_thread(self.referral_memo.set, query.lower(), nhost)
+        else:
+            await asyncio.to_thread(self.referral_memo.delete, query.lower())
+
+    async def _query_chosen_server(self, query: str, flags: int, timeout: int, registrable: bool) -> str:
+        """Look ``query`` up on the server ``choose_server()`` picks, reusing the answer of its probe if any."""
+        nichost = await self.choose_server(query, timeout=timeout, registrable=registrable)
+        if nichost is None:
+            return ""
+        result = self._probe_answers.pop((nichost, query.lower()), None)
+        if result is not None:
+            if flags & NICClient.WHOIS_RECURSE:
+                result = await self._follow_referral(query, nichost, result, timeout)
+            return result
+
+        result = await self.whois(query, nichost, flags, timeout=timeout)
+        if self.range_cache is not None and _is_ip(query):
+            self.range_cache.put(query, result)
+        return result
 
     async def whois_lookup(
-            self, options: Optional[dict], query_arg: str, flags: int, timeout: int = 10
+            self, options: Optional[dict], query_arg: str, flags: int, timeout: int = 10, registrable: bool = False
     ) -> str:
         """Main entry point: Perform initial lookup on TLD whois server,
         or other server to get region-specific whois server, then if quick
         flag is false, perform a second lookup on the region-specific
-        server for contact records."""
+        server for contact records. ``registrable`` is passed to ``choose_server()``."""
         if options is None:
             options = {}
 
@@ -355,11 +857,13 @@ class NICClient:
                 timeout=timeout
             )
         elif self.use_qnichost:
-            nichost = await self.choose_server(query_arg, timeout=timeout)
-            if nichost is not None:
-                result = await self.whois(query_arg, nichost, flags, timeout=timeout)
-            else:
-                result = ""
+            result = self._cached_range_answer(query_arg)
+            if result is None:
+                result = await self._whois_memoized_referral(query_arg, flags, timeout)
+            if result is not None:
+                return result
+
+            result = await self._query_chosen_server(query_arg, flags, timeout, registrable)
         else:
             result = await self.whois(query_arg, options["whoishost"], flags, timeout=timeout)
         return result
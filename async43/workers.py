@@ -0,0 +1,390 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterable, Iterator, Optional
+
+from async43.bulk import UNKNOWN_SERVER, BulkResult, BulkRunner, _Job
+from async43.exceptions import WhoisInternalError
+from async43.net.ratelimit import TokenBucket
+
+if TYPE_CHECKING:
+    from async43 import WhoisClient
+    from async43.journal import BulkJournal
+
+logger = logging.getLogger("async43")
+
+# Seconds before a job whose server is at its shared limit is tried again
+SLOT_RETRY_DELAY = 0.05
+
+# Seconds between two attempts to hand out the next batch when the workers are busy
+FEED_INTERVAL = 0.05
+
+# Seconds between two checks that the workers are still alive
+LIVENESS_INTERVAL = 1.0
+
+_END = object()
+
+
+def _default_client_factory() -> "WhoisClient":
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from async43 import WhoisClient
+    return WhoisClient()
+
+
+class SharedServerLimits:
+    """
+    Per-server concurrency slots and back-off deadlines shared by processes.
+
+    Servers are hashed to ``slots`` entries of two arrays in shared memory:
+    the number of lookups in flight and the ``time.monotonic()`` deadline of
+    the current back-off. Two servers hashed to the same entry share their
+    limits, which only makes them stricter.
+    """
+
+    def __init__(self, per_server: int, slots: int = 4096, context: Any = None):
+        """
+        :param per_server: Lookups that may run at once for one server, across processes.
+        :param slots: Number of entries of the shared arrays.
+        :param context: multiprocessing context the workers are started with.
+        """
+        context = context or multiprocessing
+        self.per_server = per_server
+        self.slots = slots
+        self._lock = context.Lock()
+        self._in_flight = context.RawArray("i", slots)
+        self._backoff_until = context.RawArray("d", slots)
+
+    def _slot(self, server: str) -> int:
+        # Unlike hash(), stable across processes
+        return zlib.crc32(server.encode()) % self.slots
+
+    def try_acquire(self, server: str) -> bool:
+        """Take a slot of ``server`` if one is free."""
+        slot = self._slot(server)
+        with self._lock:
+            if self._in_flight[slot] >= self.per_server:
+                return False
+            self._in_flight[slot] += 1
+            return True
+
+    def release(self, server: str) -> None:
+        """Free a slot taken with ``try_acquire``."""
+        slot = self._slot(server)
+        with self._lock:
+            self._in_flight[slot] -= 1
+
+    def back_off(self, server: str, delay: float) -> None:
+        """Stop every process from sending queries to ``server`` for ``delay`` seconds."""
+        slot = self._slot(server)
+        with self._lock:
+            self._backoff_until[slot] = max(self._backoff_until[slot], time.monotonic() + delay)
+
+    def backoff_remaining(self, server: str) -> float:
+        """Seconds before queries may be sent to ``server`` again."""
+        return max(0.0, self._backoff_until[self._slot(server)] - time.monotonic())
+
+
+class SharedTokenBucket(TokenBucket):
+    """``TokenBucket`` whose tokens are kept in shared memory, so that processes share one rate."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, context: Any = None):
+        """
+        :param rate: Tokens added per second, for all processes together.
+        :param burst: Capacity of the bucket, defaults to one second of tokens.
+        :param context: multiprocessing context the workers are started with.
+        """
+        super().__init__(rate, burst)
+        context = context or multiprocessing
+        self._lock = context.Lock()
+        self._state = context.RawArray("d", [self._tokens, self._updated])
+
+    def try_take(self) -> float:
+        with self._lock:
+            self._tokens, self._updated = self._state
+            wait = super().try_take()
+            self._state[0], self._state[1] = self._tokens, self._updated
+        return wait
+
+
+class SharedLimitsBulkRunner(BulkRunner):
+    """
+    ``BulkRunner`` of a worker process, honouring the per-server limits
+    shared with the other workers.
+
+    An attempt first takes a slot of its server in ``SharedServerLimits``;
+    when the server already has ``per_server`` lookups in flight across the
+    workers, the job is requeued for a moment instead. Back-offs after quota
+    replies are published to the other workers.
+    """
+
+    def __init__(self, client: "WhoisClient", limits: SharedServerLimits, **kwargs):
+        """
+        :param client: Client running the lookups.
+        :param limits: Limits shared with the other workers.
+        :param kwargs: Other ``BulkRunner`` options.
+        """
+        super().__init__(client, **kwargs)
+        self.limits = limits
+
+    def back_off(self, server: str, delay: Optional[float] = None) -> None:
+        delay = self.backoff if delay is None else delay
+        super().back_off(server, delay)
+        self.limits.back_off(server, delay)
+
+    def backoff_until(self, server: str) -> float:
+        until = super().backoff_until(server)
+        remaining = self.limits.backoff_remaining(server)
+        if remaining:
+            until = max(until, asyncio.get_running_loop().time() + remaining)
+        return until
+
+    async def _attempt(self, job: _Job, flags: int) -> tuple[_Job, Optional[BulkResult]]:
+        # The server the job is queued on, as the scheduler sees it
+        server = job.queue
+        if server == UNKNOWN_SERVER:
+            return await super()._attempt(job, flags)
+        if not self.limits.try_acquire(server):
+            job.ready_at = asyncio.get_running_loop().time() + SLOT_RETRY_DELAY
+            return job, None
+        try:
+            return await super()._attempt(job, flags)
+        finally:
+            self.limits.release(server)
+
+
+@dataclass
+class _WorkerConfig:
+    client_factory: Callable[[], "WhoisClient"]
+    limits: SharedServerLimits
+    rate_limit: Optional[SharedTokenBucket]
+    concurrency: int
+    max_attempts: int
+    backoff: float
+    flags: int
+
+
+@dataclass
+class _WorkerExit:
+    name: str
+    error: Optional[str] = None
+
+
+async def _read_batches(inputs: Any) -> AsyncIterator[str]:
+    """
+    Queries of the batches sent to a worker, until the ``None`` that ends its input.
+
+    A feeder thread waits on the multiprocessing queue and hands the batches
+    over through an ``asyncio.Queue``, so the lookups in flight keep running
+    while the parent is slow to send more (piped input, lazy generator...).
+    The thread is a daemon one: it may stay blocked on the queue when the
+    worker stops early.
+    """
+    loop = asyncio.get_running_loop()
+    batches: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    def feed() -> None:
+        while True:
+            batch = inputs.get()
+            try:
+                asyncio.run_coroutine_threadsafe(batches.put(batch), loop).result()
+            except RuntimeError:
+                # The event loop is closed
+                return
+            if batch is None:
+                return
+
+    threading.Thread(target=feed, name="async43-feeder", daemon=True).start()
+    while (batch := await batches.get()) is not None:
+        for query in batch:
+            yield query
+
+
+async def _work(config: _WorkerConfig, inputs: Any, results: Any) -> None:
+    async with config.client_factory() as client:
+        runner = SharedLimitsBulkRunner(
+            client,
+            config.limits,
+            concurrency=config.concurrency,
+            max_attempts=config.max_attempts,
+            backoff=config.backoff,
+            per_server=config.limits.per_server,
+            rate_limit=config.rate_limit,
+        )
+        async for result in runner.run(_read_batches(inputs), flags=config.flags):
+            results.put(result)
+
+
+def _worker_main(config: _WorkerConfig, inputs: Any, results: Any) -> None:
+    """Entry point of a worker process."""
+    # The parent decides when to stop, and terminates the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    name = multiprocessing.current_process().name
+    try:
+        asyncio.run(_work(config, inputs, results))
+    except Exception as exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Bulk worker %s failed", name)
+        results.put(_WorkerExit(name, f"{type(exception).__name__}: {exception}"))
+        return
+    results.put(_WorkerExit(name))
+
+
+class ShardedRunner:
+    """
+    Runs a bulk job over several worker processes, to use more than one core.
+
+    Parsing WHOIS answers is CPU bound, so a single event loop tops out at a
+    few hundred lookups per second. Each worker process runs its own event
+    loop, ``WhoisClient`` (made by ``client_factory``) and
+    ``SharedLimitsBulkRunner``. The parent reads the input and hands out
+    batches of ``batch_size`` queries through a bounded queue, so idle
+    workers take the next batch and memory use doesn't depend on the input
+    size. Results of all the workers are merged into one stream, in
+    completion order.
+
+    The limits that protect the WHOIS servers hold for the job as a whole:
+    ``per_server`` lookups in flight per server and back-offs after quota
+    replies are shared through ``SharedServerLimits``, and ``rate`` through
+    a ``SharedTokenBucket``. ``concurrency`` applies to each worker.
+
+    Workers are started with the "spawn" method by default, so
+    ``client_factory`` must be picklable: a module level function or a
+    ``functools.partial`` of one. With a ``journal``, the parent skips the
+    queries it has a final outcome for and records the results, as
+    ``BulkRunner`` does.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+            self,
+            workers: Optional[int] = None,
+            client_factory: Callable[[], "WhoisClient"] = _default_client_factory,
+            concurrency: int = 10,
+            max_attempts: int = 5,
+            backoff: float = 60,
+            per_server: int = 4,
+            rate: Optional[float] = None,
+            journal: Optional["BulkJournal"] = None,
+            batch_size: int = 100,
+            context: Any = None,
+    ):
+        """
+        :param workers: Number of worker processes, defaults to the number of CPUs.
+        :param client_factory: Picklable callable returning the client of a worker.
+        :param concurrency: Maximum number of lookups in flight in each worker.
+        :param max_attempts: Number of quota replies after which a query is
+            given up.
+        :param backoff: Seconds to back off from a server after a quota reply
+            without retry delay.
+        :param per_server: Maximum number of lookups in flight for one server,
+            across the workers.
+        :param rate: Maximum number of lookups started per second, across the
+            workers.
+        :param journal: Optional journal of completed queries to resume from.
+        :param batch_size: Number of queries sent to a worker at once.
+        :param context: multiprocessing context, defaults to "spawn".
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.client_factory = client_factory
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.per_server = per_server
+        self.rate = rate
+        self.journal = journal
+        self.batch_size = batch_size
+        self.context = context or multiprocessing.get_context("spawn")
+
+    def _batches(self, queries: Iterable[str]) -> Iterator[list[str]]:
+        inputs: Iterator[str] = iter(queries)
+        if self.journal is not None:
+            inputs = filter(self.journal.pending, inputs)
+        while batch := list(itertools.islice(inputs, self.batch_size)):
+            yield batch
+
+    def _config(self, flags: int) -> _WorkerConfig:
+        return _WorkerConfig(
+            client_factory=self.client_factory,
+            limits=SharedServerLimits(self.per_server, context=self.context),
+            rate_limit=SharedTokenBucket(self.rate, context=self.context) if self.rate else None,
+            concurrency=self.concurrency,
+            max_attempts=self.max_attempts,
+            backoff=self.backoff,
+            flags=flags,
+        )
+
+    def _start(self, config: _WorkerConfig, inputs: Any, results: Any) -> list:
+        processes = [
+            self.context.Process(
+                target=_worker_main, args=(config, inputs, results), name=f"async43-worker-{index}", daemon=True
+            )
+            for index in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+        return processes
+
+    @staticmethod
+    def _check_alive(processes: list, exited: set[str]) -> None:
+        """Raise if a worker died without reporting its exit (killed, out of memory...)."""
+        for process in processes:
+            if process.exitcode not in (None, 0) and process.name not in exited:
+                raise WhoisInternalError(f"Bulk worker {process.name} died with exit code {process.exitcode}")
+
+    def run(self, queries: Iterable[str], flags: int = 0) -> Iterator[BulkResult]:
+        """
+        Look up every query, yielding results as they complete.
+
+        Closing the iterator early terminates the workers.
+        """
+        inputs = self.context.Queue(maxsize=2 * self.workers)
+        results = self.context.Queue()
+        # The shared memory and locks must outlive the workers: keep a reference
+        config = self._config(flags)
+        processes = self._start(config, inputs, results)
+        exited: set[str] = set()
+        # One None per worker ends the input
+        outbox = itertools.chain(self._batches(queries), [None] * len(processes))
+        batch = next(outbox, _END)
+
+        try:
+            while len(exited) < len(processes):
+                while batch is not _END:
+                    try:
+                        inputs.put_nowait(batch)
+                    except queue.Full:
+                        break
+                    batch = next(outbox, _END)
+
+                try:
+                    message = results.get(timeout=FEED_INTERVAL if batch is not _END else LIVENESS_INTERVAL)
+                except queue.Empty:
+                    self._check_alive(processes, exited)
+                    continue
+
+                if isinstance(message, _WorkerExit):
+                    exited.add(message.name)
+                    if message.error is not None:
+                        raise WhoisInternalError(f"Bulk worker {message.name} failed: {message.error}")
+                    continue
+
+                yield message
+                if self.journal is not None:
+                    self.journal.record(message)
+        finally:
+            if len(exited) < len(processes):
+                for process in processes:
+                    process.terminate()
+            for process in processes:
+                process.join()
+            inputs.cancel_join_thread()
+            inputs.close()
+            results.close()
+            if self.journal is not None:
+                self.journal.sync()
@@ -0,0 +1,96 @@
+"""
+Benchmark the time ``import async43`` takes in a fresh interpreter.
+
+Runs ``python -X importtime -c "import async43"`` several times and keeps the
+best cumulative time of the package, so that short-lived CLI runs and
+serverless workers stay quick to start. The heavy dependencies (tldextract,
+the parser with rapidfuzz and text_scrubber's geo tables, pydantic,
+dnspython) must only be imported on first use: the benchmark fails if one of
+them is loaded by the import, or if the best time is above the budget.
+
+Usage: python benchmarks/bench_import.py [budget_in_ms] [runs]
+"""
+import re
+import subprocess
+import sys
+
+DEFAULT_BUDGET_MS = 150
+DEFAULT_RUNS = 5
+
+# Modules that must not be imported by "import async43"
+DEFERRED = [
+    "tldextract",
+    "rapidfuzz",
+    "text_scrubber",
+    "phonenumbers",
+    "email_validator",
+    "dns.resolver",
+    "pydantic",
+    "async43.parser",
+    "async43.model",
+    "async43.servers",
+]
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$")
+
+
+def measure() -> tuple[float, list[tuple[float, str]]]:
+    """
+    Import async43 in a new interpreter.
+
+    :return: The cumulative import time of async43 in milliseconds, and the
+        cumulative times of the modules it imported directly.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import async43"],
+        capture_output=True, text=True, check=True,
+    )
+    total = 0.0
+    children: list[tuple[float, str]] = []
+    pending: list[tuple[float, str]] = []
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match is None:
+            continue
+        cumulative, depth, name = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        # Children are listed before their parent
+        if depth == 3:
+            pending.append((cumulative, name))
+        elif depth == 1:
+            if name == "async43":
+                total, children = cumulative, pending
+            pending = []
+    return total, sorted(children, reverse=True)
+
+
+def loaded_deferred_modules() -> list[str]:
+    """Return the modules of ``DEFERRED`` loaded by importing async43."""
+    code = f"import sys, async43; print(' '.join(name for name in {DEFERRED!r} if name in sys.modules))"
+    process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return process.stdout.split()
+
+
+def main(argv: list[str]) -> int:
+    """Entry point."""
+    budget = float(argv[1]) if len(argv) > 1 else DEFAULT_BUDGET_MS
+    runs = int(argv[2]) if len(argv) > 2 else DEFAULT_RUNS
+
+    results = [measure() for _ in range(runs)]
+    best, children = min(results)
+    print(f"import async43: best {best:.1f} ms of {runs} runs (budget {budget:.0f} ms)")
+    for cumulative, name in children[:8]:
+        print(f"  {cumulative:8.1f} ms  {name}")
+
+    status = 0
+    loaded = loaded_deferred_modules()
+    if loaded:
+        print(f"FAIL: imported eagerly: {', '.join(loaded)}")
+        status = 1
+    if best > budget:
+        print(f"FAIL: {best:.1f} ms is over the budget")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
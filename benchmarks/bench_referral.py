@@ -0,0 +1,69 @@
+"""
+Benchmark referral extraction on large synthetic WHOIS responses.
+
+Compares the single-pass scanner of ``async43.net.referral`` with the former
+per-query ``DOTALL`` regular expression of ``NICClient.findwhois_server``.
+
+The legacy search is quadratic on responses listing many domain names without
+a referral, so keep sizes modest: 256 KiB already takes about half a minute.
+
+Usage: python benchmarks/bench_referral.py [size_in_kib ...]
+"""
+import re
+import sys
+import timeit
+
+from async43.net.referral import scan_referral
+
+IP_WHOIS = ["whois.lacnic.net", "whois.ripe.net", "whois.apnic.net", "whois.registro.br", "whois.pandi.or.id"]
+
+
+def legacy_findwhois_server(buf: str, hostname: str, query: str):
+    """Referral extraction as it was done before the scanner."""
+    nhost = None
+    match = re.compile(
+        rf"Domain Name: {re.escape(query)}\s*.*?Whois Server: (.*?)\s",
+        flags=re.IGNORECASE | re.DOTALL,
+    ).search(buf)
+    if match:
+        nhost = match.group(1)
+        if nhost.count("/") > 0:
+            nhost = None
+    elif hostname == "whois.arin.net":
+        for nichost in IP_WHOIS:
+            if buf.find(nichost) != -1:
+                nhost = nichost
+                break
+    return nhost
+
+
+def build_responses(size: int) -> dict[str, tuple[str, str]]:
+    """Build synthetic responses of roughly ``size`` bytes."""
+    filler_line = "Remarks: lorem ipsum dolor sit amet, consectetur adipiscing elit\n"
+    filler = filler_line * (size // len(filler_line))
+    return {
+        # Many domain names but no referral: the worst case of the lazy DOTALL search
+        "no referral": ("Domain Name: EXAMPLE.COM\n" * (size // 25), "whois.verisign-grs.com"),
+        "referral at the end": (
+            "Domain Name: EXAMPLE.COM\n" + filler + "Registrar WHOIS Server: whois.registrar.test\n",
+            "whois.verisign-grs.com",
+        ),
+        "arin without referral label": (filler + "see whois.afrinic.net\n", "whois.arin.net"),
+    }
+
+
+def main(sizes: list[int]) -> None:
+    """Run the benchmark for each size given in KiB."""
+    for size in sizes:
+        for name, (buf, hostname) in build_responses(size * 1024).items():
+            number = 3
+            legacy = timeit.timeit(lambda: legacy_findwhois_server(buf, hostname, "example.com"), number=number)
+            scanner = timeit.timeit(lambda: scan_referral(buf, hostname), number=number)
+            print(
+                f"{size:>6} KiB  {name:<28} legacy {legacy / number * 1000:9.2f} ms"
+                f"  scanner {scanner / number * 1000:9.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [16, 64])
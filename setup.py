@@ -41,7 +41,6 @@ setup(
         "phonenumbers==9.0.22",
         "pydantic>=2.12.5",
         "python-dateutil>=2.9.0.post0",
-        "PySocks>=1.7.1",
         "rapidfuzz>=3.14.3",
         "text-scrubber>=0.5.0",
         "tldextract>=5.3.1",
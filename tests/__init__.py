@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep the on-disk caches of test runs out of the user's cache directory
+os.environ.setdefault("ASYNC43_CACHE_DIR", tempfile.mkdtemp(prefix="async43-tests-"))
@@ -0,0 +1,115 @@
+"""Test doubles shared by the test modules."""
+import asyncio
+
+from async43.exceptions import WhoisDomainNotFoundError, WhoisNetworkError, WhoisQuotaExceededError
+from async43.model import DomainContacts, Whois
+
+
+def make_whois(domain):
+    contacts = DomainContacts(registrant=None, administrative=None, technical=None, billing=None, abuse=None)
+    return Whois(domain=domain, contacts=contacts, raw_text=f"Domain Name: {domain}\n")
+
+
+async def identity(query):
+    return query
+
+
+class FakeNICClient:
+    """Stands in for NICClient, sending .de domains to DENIC and the others to Verisign."""
+
+    limits = None
+
+    async def choose_server(self, domain, timeout=10, registrable=False):
+        return "whois.denic.de" if domain.endswith(".de") else "whois.verisign-grs.com"
+
+
+class FakeClient:
+    """
+    Stands in for WhoisClient in bulk lookups, recording the looked up domains in ``calls``.
+
+    ``missing*`` domains are not found, those in ``down`` are unreachable and those in
+    ``throttled`` get a quota reply from whois.example the first time. ``in_flight`` and
+    ``peak`` are shared counters of the lookups running at once, across processes.
+    Module level so that worker processes can unpickle it.
+    """
+
+    def __init__(self, down=(), throttled=(), in_flight=None, peak=None):
+        self.nic_client = FakeNICClient()
+        self.timeout = 10
+        self.down = set(down)
+        self.throttled = set(throttled)
+        self.in_flight = in_flight
+        self.peak = peak
+        self.calls = []
+
+    async def whois(self, domain, flags=0):
+        self.calls.append(domain)
+        if self.in_flight is not None:
+            with self.in_flight.get_lock():
+                self.in_flight.value += 1
+                self.peak.value = max(self.peak.value, self.in_flight.value)
+            await asyncio.sleep(0.02)
+            with self.in_flight.get_lock():
+                self.in_flight.value -= 1
+        if domain in self.throttled and self.calls.count(domain) == 1:
+            raise WhoisQuotaExceededError("limit", server="whois.example", retry_after=0.05)
+        if domain in self.down:
+            raise WhoisNetworkError("unreachable")
+        if domain.startswith("missing"):
+            raise WhoisDomainNotFoundError("No match")
+        return make_whois(domain)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class FakeReader:
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def read(self):
+        query = self.connection.sent[-1].decode().strip()
+        return self.connection.respond(self.connection.hostname, query).encode()
+
+
+class FakeWriter:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def write(self, data):
+        self.connection.sent.append(data)
+
+    async def drain(self):
+        pass
+
+    def get_extra_info(self, name):
+        return ("127.0.0.1", 43043) if name == "sockname" else None
+
+
+class FakeConnection:
+    """Stands in for ``NICClient._connect``, answering each query with ``respond(hostname, query)``."""
+
+    def __init__(self, hostname, respond, sent):
+        self.hostname = hostname
+        self.respond = respond
+        self.sent = sent
+
+    async def __aenter__(self):
+        return FakeReader(self), FakeWriter(self)
+
+    async def __aexit__(self, *args):
+        return False
+
+
+def fake_connect(respond, sent=None):
+    """
+    Build a replacement for ``NICClient._connect``.
+
+    :param respond: Called with the hostname and the query, returns the response text.
+    :param sent: Optional list collecting the raw bytes written to the servers.
+    """
+    sent = [] if sent is None else sent
+    return lambda hostname, *args, **kwargs: FakeConnection(hostname, respond, sent)
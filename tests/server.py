@@ -0,0 +1,25 @@
+import asyncio
+
+
+class LocalServer:
+    """Runs a WHOIS stand-in on localhost, handled by ``handler(reader, writer)``."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.server = None
+        self.connections = 0
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            await self.handler(reader, writer)
+        finally:
+            writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return f"127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def __aexit__(self, *args):
+        self.server.close()
+        await self.server.wait_closed()
@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from async43.exceptions import WhoisCircuitOpenError, WhoisNetworkError
+from async43.net.breaker import CLOSED, HALF_OPEN, OPEN, BreakerRegistry, CircuitBreaker
+from async43.whois import NICClient
+from tests.server import LocalServer
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+        breaker.record_failure(False)
+        breaker.record_failure(False)
+        breaker.record_success(False)
+        breaker.record_failure(False)
+        breaker.record_failure(False)
+        self.assertEqual(breaker.state, CLOSED)
+        breaker.record_failure(False)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_half_open_probes(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=60, probes=2)
+        breaker.record_failure(False)
+        breaker.opened_at -= 60
+        self.assertEqual(breaker.state, HALF_OPEN)
+
+        self.assertTrue(breaker.allow())
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success(True)
+        self.assertEqual(breaker.state, HALF_OPEN)
+        breaker.record_success(True)
+        self.assertEqual(breaker.state, CLOSED)
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=60)
+        breaker.record_failure(False)
+        breaker.opened_at -= 60
+        self.assertTrue(breaker.allow())
+        breaker.record_failure(True)
+        self.assertEqual(breaker.state, OPEN)
+        self.assertGreater(breaker.retry_in(), 59)
+
+
+class TestBreakerRegistry(unittest.IsolatedAsyncioTestCase):
+    async def test_guard_fails_fast_once_open(self):
+        breakers = BreakerRegistry(failure_threshold=2, cooldown=60)
+        for _ in range(2):
+            with self.assertRaises(asyncio.TimeoutError):
+                async with breakers.guard("whois.example"):
+                    raise asyncio.TimeoutError()
+
+        with self.assertRaises(WhoisCircuitOpenError) as context:
+            async with breakers.guard("whois.example"):
+                self.fail("The query should not go through")
+        self.assertIsInstance(context.exception, WhoisNetworkError)
+        self.assertEqual(context.exception.server, "whois.example")
+        self.assertEqual(breakers.states()["whois.example"]["state"], OPEN)
+
+    async def test_other_errors_do_not_count(self):
+        breakers = BreakerRegistry(failure_threshold=1)
+        with self.assertRaises(ValueError):
+            async with breakers.guard("whois.example"):
+                raise ValueError()
+        self.assertEqual(breakers.get("whois.example").state, CLOSED)
+
+
+async def answer(reader, writer):
+    await reader.readline()
+    writer.write(b"Domain Name: EXAMPLE.COM\n")
+    await writer.drain()
+
+
+class TestNICClientBreakers(unittest.IsolatedAsyncioTestCase):
+    async def test_down_server_fails_fast(self):
+        client = NICClient(breakers=BreakerRegistry(failure_threshold=2, cooldown=60))
+        with patch("asyncio.open_connection", side_effect=ConnectionRefusedError("refused")) as open_connection:
+            for _ in range(2):
+                with self.assertRaises(WhoisNetworkError):
+                    await client.whois("example.com", "127.0.0.1:9", 0)
+            calls = open_connection.call_count
+
+            with self.assertRaises(WhoisCircuitOpenError):
+                await client.whois("example.com", "127.0.0.1:9", 0)
+            self.assertEqual(open_connection.call_count, calls)
+
+        self.assertEqual(client.breaker_states()["127.0.0.1"]["state"], OPEN)
+
+    async def test_healthy_server_stays_closed(self):
+        client = NICClient(breakers=BreakerRegistry())
+        async with LocalServer(answer) as hostname:
+            await client.whois("example.com", hostname, 0)
+        self.assertEqual(client.breaker_states()["127.0.0.1"]["state"], CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main()
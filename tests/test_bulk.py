@@ -0,0 +1,96 @@
+import asyncio
+import unittest
+
+from async43.exceptions import WhoisNetworkError
+from async43.net.bulk import CymruBulkProtocol, IrrdBulkProtocol
+from async43.whois import NICClient
+from tests.server import LocalServer
+
+
+async def cymru_handler(reader, writer):
+    assert await reader.readline() == b"begin\n"
+    writer.write(b"Bulk mode; whois.cymru.com [2025-01-01 00:00:00 +0000]\n")
+    while True:
+        line = (await reader.readline()).decode().strip()
+        if line == "end":
+            break
+        if line == "8.8.8.8":
+            writer.write(b"15169   | 8.8.8.8          | GOOGLE, US\n")
+        elif line.upper() == "AS13335":
+            writer.write(b"13335   | CLOUDFLARENET, US\n")
+        else:
+            writer.write(f"Error: no ASN or IP match on line for {line}.\n".encode())
+        await writer.drain()
+
+
+async def irrd_handler(reader, writer):
+    assert await reader.readline() == b"!!\n"
+    while True:
+        line = (await reader.readline()).decode().strip()
+        if line == "!q" or not line:
+            break
+        if line == "!gAS15169":
+            data = b"8.8.8.0/24 8.8.4.0/24\n"
+            writer.write(b"A%d\n%sC\n" % (len(data), data))
+        elif line == "!r8.8.8.8,o":
+            writer.write(b"A8\nAS15169\nC\n")
+        elif line.startswith("!g"):
+            writer.write(b"D\n")
+        else:
+            writer.write(b"F Unrecognized command\n")
+        await writer.drain()
+
+
+class TestBulkWhois(unittest.IsolatedAsyncioTestCase):
+    async def test_cymru_bulk(self):
+        server = LocalServer(cymru_handler)
+        client = NICClient()
+        async with server as hostname:
+            answers = [
+                answer async for answer in client.bulk_whois(
+                    ["8.8.8.8", "AS13335", "bogus", "8.8.8.8"], hostname, CymruBulkProtocol(), batch_size=3
+                )
+            ]
+
+        self.assertEqual([query for query, _ in answers], ["8.8.8.8", "AS13335", "bogus", "8.8.8.8"])
+        self.assertIn("GOOGLE", answers[0][1])
+        self.assertIn("CLOUDFLARENET", answers[1][1])
+        self.assertTrue(answers[2][1].startswith("Error"))
+        # Two batches, one connection each
+        self.assertEqual(server.connections, 2)
+
+    async def test_irrd_bulk(self):
+        server = LocalServer(irrd_handler)
+        client = NICClient()
+        async with server as hostname:
+            answers = dict([
+                answer async for answer in client.bulk_whois(
+                    ["AS15169", "8.8.8.8", "AS64496", "!zfoo"], hostname, IrrdBulkProtocol()
+                )
+            ])
+
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(answers["AS15169"], "8.8.8.0/24 8.8.4.0/24")
+        self.assertEqual(answers["8.8.8.8"], "AS15169")
+        self.assertEqual(answers["AS64496"], "No entries found for AS64496")
+        self.assertEqual(answers["!zfoo"], "Unrecognized command")
+
+    async def test_truncated_session(self):
+        async def handler(reader, writer):
+            await reader.readline()
+            await reader.readline()
+            writer.write(b"15169   | 8.8.8.8          | GOOGLE, US\n")
+            await writer.drain()
+
+        client = NICClient()
+        answers = []
+        async with LocalServer(handler) as hostname:
+            with self.assertRaises(WhoisNetworkError):
+                async for answer in client.bulk_whois(["8.8.8.8", "1.1.1.1"], hostname, CymruBulkProtocol()):
+                    answers.append(answer)
+        self.assertEqual(len(answers), 1)
+
+    async def test_unknown_protocol(self):
+        with self.assertRaises(ValueError):
+            async for _ in NICClient().bulk_whois(["8.8.8.8"], "whois.example.net"):
+                pass
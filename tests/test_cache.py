@@ -0,0 +1,285 @@
+import ipaddress
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from async43.cache import IanaCache, RangeCache, ReferralMemo, TTLStore, default_cache_dir, extract_ip_ranges
+from async43.exceptions import WhoisCircuitOpenError, WhoisNetworkError
+from async43.whois import NICClient
+from tests.fakes import fake_connect
+
+
+class TestTTLStore(unittest.TestCase):
+    def test_memory_store_expires_entries(self):
+        store = TTLStore(ttl=60)
+        store.set("example.com", "whois.example.net")
+        self.assertEqual(store.get("example.com"), "whois.example.net")
+
+        store.set("expired.com", "whois.example.net", ttl=-1)
+        self.assertIsNone(store.get("expired.com"))
+        self.assertEqual(len(store), 1)
+
+    def test_memory_store_is_bounded(self):
+        store = TTLStore(max_entries=2)
+        for i in range(5):
+            store.set(f"domain{i}.com", i)
+        self.assertIsNone(store.get("domain0.com"))
+        self.assertEqual(store.get("domain4.com"), 4)
+        self.assertEqual(len(store), 2)
+
+    def test_sqlite_store_is_persistent(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cache", "referrals.sqlite")
+            store = ReferralMemo(path)
+            store.set("example.com", "whois.example.net")
+            store.close()
+
+            store = ReferralMemo(path)
+            self.assertEqual(store.get("example.com"), "whois.example.net")
+            store.delete("example.com")
+            self.assertIsNone(store.get("example.com"))
+            store.close()
+
+    def test_sqlite_store_is_bounded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = TTLStore(os.path.join(directory, "store.sqlite"), max_entries=20)
+            for i in range(100):
+                store.set(f"domain{i}.com", i, ttl=60 + i)
+            self.assertLessEqual(len(store), 22)
+            self.assertIsNone(store.get("domain0.com"))
+            self.assertEqual(store.get("domain99.com"), 99)
+            store.close()
+
+    def test_sqlite_store_expires_entries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = TTLStore(os.path.join(directory, "store.sqlite"), ttl=0.01)
+            store.set("example.com", {"host": "whois.example.net"})
+            time.sleep(0.02)
+            self.assertIsNone(store.get("example.com"))
+            store.close()
+
+
+class TestReferralMemo(unittest.IsolatedAsyncioTestCase):
+    async def test_referral_is_memoized(self):
+        registrar = "Domain Name: example.com\nRegistrar: Test\n"
+        client = NICClient(referral_memo=ReferralMemo())
+        client.referral_memo.set("example.com", "whois.registrar.test")
+        calls = []
+
+        async def recording_whois(query, hostname, flags, many_results=False, timeout=10):
+            calls.append(hostname)
+            return registrar
+
+        with patch.object(client, "whois", side_effect=recording_whois), \
+                patch.object(NICClient, "choose_server", AsyncMock(side_effect=AssertionError)):
+            result = await client.whois_lookup(None, "example.com", 0)
+
+        # Only the registrar record, where a regular lookup puts the registry one first
+        self.assertEqual(result, registrar)
+        self.assertEqual(calls, ["whois.registrar.test"])
+
+    async def test_memo_is_filled_when_following_referral(self):
+        client = NICClient(referral_memo=ReferralMemo())
+        responses = {
+            "whois.verisign-grs.com": "Domain Name: EXAMPLE.COM\n   Registrar WHOIS Server: whois.registrar.test\n",
+            "whois.registrar.test": "Domain Name: example.com\n",
+        }
+
+        with patch.object(client, "_connect", side_effect=fake_connect(lambda hostname, query: responses[hostname])):
+            await client.whois("example.com", "whois.verisign-grs.com", NICClient.WHOIS_RECURSE)
+
+        self.assertEqual(client.referral_memo.get("example.com"), "whois.registrar.test")
+
+    async def test_unreachable_memoized_referral_falls_back(self):
+        client = NICClient(referral_memo=ReferralMemo())
+        client.referral_memo.set("example.com", "whois.dead.test")
+        calls = []
+
+        async def fake_whois(query, hostname, flags, many_results=False, timeout=10):
+            calls.append(hostname)
+            if hostname == "whois.dead.test":
+                raise WhoisNetworkError("down")
+            return "Domain Name: example.com\n"
+
+        with patch.object(client, "whois", side_effect=fake_whois), \
+                patch.object(NICClient, "choose_server", AsyncMock(return_value="whois.verisign-grs.com")):
+            await client.whois_lookup(None, "example.com", 0)
+
+        self.assertEqual(calls, ["whois.dead.test", "whois.verisign-grs.com"])
+        self.assertIsNone(client.referral_memo.get("example.com"))
+
+    async def test_open_breaker_keeps_memoized_referral(self):
+        client = NICClient(referral_memo=ReferralMemo())
+        client.referral_memo.set("example.com", "whois.registrar.test")
+        calls = []
+
+        async def fake_whois(query, hostname, flags, many_results=False, timeout=10):
+            calls.append(hostname)
+            if hostname == "whois.registrar.test":
+                raise WhoisCircuitOpenError("open", server=hostname)
+            return "Domain Name: example.com\n"
+
+        with patch.object(client, "whois", side_effect=fake_whois), \
+                patch.object(NICClient, "choose_server", AsyncMock(return_value="whois.verisign-grs.com")):
+            await client.whois_lookup(None, "example.com", 0)
+
+        self.assertEqual(calls, ["whois.registrar.test", "whois.verisign-grs.com"])
+        self.assertEqual(client.referral_memo.get("example.com"), "whois.registrar.test")
+
+
+class TestIanaCache(unittest.IsolatedAsyncioTestCase):
+    @staticmethod
+    def fake_iana(answers, queried):
+        def respond(hostname, query):
+            queried.append(query)
+            return answers.pop(0)
+
+        return fake_connect(respond)
+
+    async def test_answers_are_shared_through_disk(self):
+        queried = []
+        answers = ["domain:       PIZZA\nwhois:        whois.nic.pizza\n", "domain:       ZZ\n"]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "iana.sqlite")
+            client = NICClient(iana_cache=IanaCache(path))
+            with patch.object(client, "_connect", side_effect=self.fake_iana(answers, queried)):
+                self.assertEqual(await client.findwhois_iana("pizza"), "whois.nic.pizza")
+                self.assertIsNone(await client.findwhois_iana("zz"))
+            client.iana_cache.close()
+
+            # A new client, as made by every call to async43.whois(), reuses the answers
+            other = NICClient(iana_cache=IanaCache(path))
+            with patch.object(other, "_connect", side_effect=AssertionError):
+                self.assertEqual(await other.findwhois_iana("pizza"), "whois.nic.pizza")
+                self.assertIsNone(await other.findwhois_iana("zz"))
+            other.iana_cache.close()
+
+        self.assertEqual(queried, ["pizza", "zz"])
+
+    async def test_negative_answers(self):
+        queried = []
+        answers = ["", "% IANA WHOIS server\n", "domain:       ZZ\n\nstatus:       ACTIVE\n"]
+        client = NICClient(iana_cache=IanaCache(negative_ttl=60))
+        with patch.object(client, "_connect", side_effect=self.fake_iana(answers, queried)):
+            # Empty or truncated answers are errors, and aren't cached
+            with self.assertRaises(WhoisNetworkError):
+                await client.findwhois_iana("zz")
+            with self.assertRaises(WhoisNetworkError):
+                await client.findwhois_iana("zz")
+            self.assertIsNone(client.iana_cache.get("zz"))
+
+            self.assertIsNone(await client.findwhois_iana("zz"))
+        self.assertEqual(queried, ["zz", "zz", "zz"])
+
+        # "No server" entries expire after negative_ttl
+        self.assertEqual(client.iana_cache.get("zz"), "")
+        with patch("async43.cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(client.iana_cache.get("zz"))
+
+    def test_default_cache_dir(self):
+        with patch.dict(os.environ, {"ASYNC43_CACHE_DIR": "/tmp/async43-test", "XDG_CACHE_HOME": "/tmp/xdg"}):
+            self.assertEqual(default_cache_dir(), "/tmp/async43-test")
+        with patch.dict(os.environ, {"ASYNC43_CACHE_DIR": "", "XDG_CACHE_HOME": "/tmp/xdg"}):
+            self.assertEqual(default_cache_dir(), os.path.join("/tmp/xdg", "async43"))
+
+
+RIPE_ANSWER = """% Information related to '193.0.0.0 - 193.0.7.255'
+
+inetnum:        193.0.0.0 - 193.0.7.255
+netname:        RIPE-NCC
+country:        NL
+"""
+
+ARIN_ANSWER = """NetRange:       8.0.0.0 - 8.127.255.255
+CIDR:           8.0.0.0/9
+NetName:        LVLT-ORG-8-8
+
+NetRange:       8.8.8.0 - 8.8.8.255
+CIDR:           8.8.8.0/24
+NetName:        GOGL
+"""
+
+
+class TestRangeCache(unittest.TestCase):
+    def test_extract_ip_ranges(self):
+        self.assertEqual(
+            extract_ip_ranges(RIPE_ANSWER, ipaddress.ip_address("193.0.6.139")),
+            [ipaddress.ip_network("193.0.0.0/21")],
+        )
+        # The most specific block wins
+        self.assertEqual(
+            extract_ip_ranges(ARIN_ANSWER, ipaddress.ip_address("8.8.8.8")),
+            [ipaddress.ip_network("8.8.8.0/24")],
+        )
+        self.assertEqual(
+            extract_ip_ranges("inetnum: 200.3.12/22\n", ipaddress.ip_address("200.3.14.10")),
+            [ipaddress.ip_network("200.3.12.0/22")],
+        )
+        self.assertEqual(
+            extract_ip_ranges("inet6num: 2001:67c:2e8::/48\n", ipaddress.ip_address("2001:67c:2e8::1")),
+            [ipaddress.ip_network("2001:67c:2e8::/48")],
+        )
+        self.assertEqual(extract_ip_ranges(RIPE_ANSWER, ipaddress.ip_address("8.8.8.8")), [])
+
+    def test_placeholder_blocks_are_not_cached(self):
+        cache = RangeCache()
+        placeholder = "inetnum:        0.0.0.0 - 255.255.255.255\nnetname:        IANA-BLK\n"
+        self.assertFalse(cache.put("203.0.113.1", placeholder))
+        self.assertFalse(cache.put("203.0.113.1", "inetnum:        0.0.0.0 - 255.255.255.255\nnetname:        X\n"))
+        self.assertFalse(cache.put("2001:db8::1", "inet6num:       ::/0\n"))
+        self.assertIsNone(cache.get("8.8.8.8"))
+
+    def test_answers_are_served_by_range(self):
+        cache = RangeCache()
+        self.assertTrue(cache.put("193.0.6.139", RIPE_ANSWER))
+        self.assertEqual(cache.get("193.0.1.1"), RIPE_ANSWER)
+        self.assertIsNone(cache.get("193.0.8.1"))
+
+        cache.put("8.8.8.8", ARIN_ANSWER)
+        self.assertEqual(cache.get("8.8.8.4"), ARIN_ANSWER)
+        self.assertIsNone(cache.get("8.8.4.4"))
+
+    def test_non_cidr_range(self):
+        cache = RangeCache()
+        cache.put("10.0.0.5", "inetnum: 10.0.0.0 - 10.0.0.9\n")
+        self.assertIsNotNone(cache.get("10.0.0.9"))
+        self.assertIsNone(cache.get("10.0.0.10"))
+
+    def test_most_specific_range_wins(self):
+        cache = RangeCache()
+        cache.add([ipaddress.ip_network("8.0.0.0/9")], "parent")
+        cache.add([ipaddress.ip_network("8.8.8.0/24")], "child")
+        self.assertEqual(cache.get("8.8.8.8"), "child")
+        self.assertEqual(cache.get("8.8.4.4"), "parent")
+
+    def test_ttl_and_memory_bound(self):
+        cache = RangeCache(ttl=-1)
+        cache.put("193.0.6.139", RIPE_ANSWER)
+        self.assertIsNone(cache.get("193.0.6.139"))
+        self.assertEqual(len(cache), 0)
+
+        cache = RangeCache(max_entries=2)
+        for i in range(4):
+            cache.add([ipaddress.ip_network(f"10.{i}.0.0/16")], i)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("10.0.0.1"))
+        self.assertEqual(cache.get("10.3.0.1"), 3)
+
+
+class TestNICClientRangeCache(unittest.IsolatedAsyncioTestCase):
+    async def test_addresses_in_cached_range_skip_the_network(self):
+        client = NICClient(range_cache=RangeCache())
+        calls = []
+
+        async def fake_whois(query, hostname, flags, many_results=False, timeout=10):
+            calls.append(query)
+            return RIPE_ANSWER
+
+        with patch.object(client, "whois", side_effect=fake_whois):
+            await client.whois_lookup(None, "193.0.6.139", 0)
+            result = await client.whois_lookup(None, "193.0.0.1", 0)
+
+        self.assertEqual(result, RIPE_ANSWER)
+        self.assertEqual(calls, ["193.0.6.139"])
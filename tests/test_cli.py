@@ -0,0 +1,65 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from async43 import WhoisClient
+from async43.bulk import BulkResult
+from async43.cli import Progress, main, read_queries, result_record
+from async43.exceptions import WhoisDomainNotFoundError
+from tests.fakes import identity, make_whois
+
+
+async def fake_whois(self, domain, flags=0):
+    if domain.startswith("missing"):
+        raise WhoisDomainNotFoundError("No match")
+    return make_whois(domain)
+
+
+class TestCli(unittest.TestCase):
+    def test_read_queries(self):
+        stream = io.StringIO("example.com\n\n  # comment\n example.org \n")
+        self.assertEqual(list(read_queries(stream)), ["example.com", "example.org"])
+
+    def test_result_record(self):
+        record = result_record(BulkResult("example.com", whois=make_whois("example.com"), attempts=1))
+        self.assertEqual(record["whois"]["domain"], "example.com")
+        self.assertNotIn("raw_text", record["whois"])
+        record = result_record(BulkResult("example.com", whois=make_whois("example.com")), include_raw=True)
+        self.assertIn("raw_text", record["whois"])
+
+        record = result_record(BulkResult("missing.com", error=WhoisDomainNotFoundError("No match")))
+        self.assertFalse(record["ok"])
+        self.assertEqual(record["error"], {"type": "WhoisDomainNotFoundError", "message": "No match"})
+
+    def test_progress(self):
+        stream = io.StringIO()
+        progress = Progress(stream, interval=0)
+        self.assertTrue(progress.update(BulkResult("example.com", whois=make_whois("example.com"))))
+        progress.update(BulkResult("missing.com", error=WhoisDomainNotFoundError("No match")))
+        self.assertEqual(progress.done, 2)
+        self.assertIn("2 done (1 ok, 1 failed)", stream.getvalue())
+
+    def test_file_to_ndjson(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "domains.txt")
+            output = os.path.join(directory, "results.ndjson")
+            with open(source, "w", encoding="utf-8") as fd:
+                fd.write("example.com\nmissing.com\nexample.de\n")
+
+            with patch("async43.extract_domain", identity), patch.object(WhoisClient, "whois", fake_whois):
+                self.assertEqual(main([source, "-o", output, "-q", "--rate", "1000"]), 0)
+
+            with open(output, encoding="utf-8") as fd:
+                records = {record["query"]: record for record in map(json.loads, fd)}
+
+        self.assertEqual(set(records), {"example.com", "missing.com", "example.de"})
+        self.assertTrue(records["example.com"]["ok"])
+        self.assertEqual(records["example.de"]["server"], "whois.denic.de")
+        self.assertEqual(records["missing.com"]["error"]["type"], "WhoisDomainNotFoundError")
+
+
+if __name__ == "__main__":
+    unittest.main()
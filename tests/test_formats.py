@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import patch
+
+from async43.net.formats import QueryFormat, QueryFormatRegistry
+from async43.whois import NICClient
+from tests.fakes import fake_connect
+
+
+class TestQueryFormatRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = QueryFormatRegistry()
+
+    def test_default_formats(self):
+        self.assertEqual(self.registry.build("whois.denic.de", "example.de"), "-T dn,ace -C UTF-8 example.de")
+        self.assertEqual(self.registry.build("whois.dk-hostmaster.dk", "example.dk"), "--show-handles example.dk")
+        self.assertEqual(self.registry.build("whois.jprs.jp", "example.jp"), "example.jp/e")
+        self.assertEqual(self.registry.build("whois.verisign-grs.com", "example.com"), "example.com")
+        self.assertEqual(self.registry.build("com.whois-servers.net", "example.com", True), "=example.com")
+
+    def test_learn_many_results(self):
+        self.assertFalse(self.registry.needs_many_results("whois.verisign-grs.com"))
+        self.registry.learn_many_results("WHOIS.verisign-grs.com")
+        self.assertTrue(self.registry.needs_many_results("whois.verisign-grs.com"))
+        self.assertEqual(self.registry.build("whois.verisign-grs.com", "example.com"), "=example.com")
+
+    def test_register(self):
+        self.registry.register(".example", QueryFormat(prefix="domain "))
+        self.registry.register("whois.nic.example", QueryFormat(suffix="/full"))
+        self.assertEqual(self.registry.build("whois.other.example", "a.example"), "domain a.example")
+        self.assertEqual(self.registry.build("whois.nic.example", "a.example"), "a.example/full")
+
+
+class TestNICClientQueryFormats(unittest.IsolatedAsyncioTestCase):
+    async def test_hint_is_learned(self):
+        sent = []
+
+        def respond(hostname, query):
+            if query.startswith("="):
+                return "Domain Name: EXAMPLE.COM\n"
+            return 'To single out one record, look it up with "=xxx"\n'
+
+        client = NICClient(query_formats=QueryFormatRegistry())
+        with patch.object(client, "_connect", side_effect=fake_connect(respond, sent)):
+            await client.whois("example.com", "whois.verisign-grs.com", 0)
+            self.assertEqual(sent, [b"example.com\r\n", b"=example.com\r\n"])
+
+            sent.clear()
+            await client.whois("example.net", "whois.verisign-grs.com", 0)
+            self.assertEqual(sent, [b"=example.net\r\n"])
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from async43.parser import geo
+from async43.parser.engine import SchemaMapper, default_mapper
+
+
+class TestCityIndexCache(unittest.TestCase):
+    def setUp(self):
+        self.cities = geo._CITY_RESOURCES["cities_per_country_code_map"]
+        self.saved = self.cities.pop("LU", None)
+        self.directory = tempfile.TemporaryDirectory()
+        self.environ = patch.dict(os.environ, {"ASYNC43_CACHE_DIR": self.directory.name})
+        self.environ.start()
+
+    def tearDown(self):
+        self.environ.stop()
+        self.directory.cleanup()
+        if self.saved is not None:
+            self.cities["LU"] = self.saved
+
+    def test_index_is_built_once_then_loaded(self):
+        geo.load_city_resources({"Luxembourg"})
+        built = self.cities.pop("LU")
+        cached = os.listdir(os.path.join(self.directory.name, "geo"))
+        self.assertEqual(len(cached), 1)
+        self.assertTrue(cached[0].startswith("LU-"))
+
+        with patch.object(geo, "add_city_resources", side_effect=AssertionError):
+            geo.load_city_resources({"Luxembourg"})
+        self.assertEqual(self.cities["LU"]["canonical_names"], built["canonical_names"])
+        self.assertEqual(geo.find_city("L-1855 Luxembourg", {"Luxembourg"})[0].location.canonical_name, "Luxembourg")
+
+    def test_corrupted_cache_is_rebuilt(self):
+        path = geo._cache_path("LU")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as fd:
+            fd.write(b"not a pickle")
+
+        geo.load_city_resources({"LU"})
+        self.assertIn("Luxembourg", self.cities["LU"]["canonical_names"])
+        with open(path, "rb") as fd:
+            self.assertNotEqual(fd.read(), b"not a pickle")
+
+
+class TestSchemaMapper(unittest.TestCase):
+    def test_alias_tables(self):
+        mapper = SchemaMapper({
+            "SECTION_TECHNICAL": ["Technical Contact"],
+            "dates.created": ["Created", "Creation Date"],
+            "dates.updated": ["Updated", "Created"],
+        })
+        self.assertEqual(mapper._try_exact_match("created").path, "dates.created")
+        self.assertEqual(mapper._try_exact_match("updated").path, "dates.updated")
+        self.assertIsNone(mapper._try_exact_match("technical contact"))
+        self.assertEqual(mapper._try_fuzzy_match("Creation Dates").path, "dates.created")
+        self.assertIs(default_mapper(), default_mapper())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import time
+import unittest
+
+from async43.net.hedging import HedgePolicy
+from async43.net.limits import ServerLimits
+from async43.whois import NICClient
+from tests.server import LocalServer
+
+
+class TestHedgePolicy(unittest.TestCase):
+    def test_no_hedge_without_enough_samples(self):
+        policy = HedgePolicy(min_samples=3)
+        policy.record("whois.example", 0.2)
+        self.assertIsNone(policy.delay_for("whois.example"))
+
+    def test_delay_is_the_latency_percentile(self):
+        policy = HedgePolicy(percentile=90, min_samples=10, min_delay=0.05)
+        for value in range(1, 11):
+            policy.record("whois.example", value / 10)
+        self.assertEqual(policy.delay_for("WHOIS.example"), 1.0)
+
+        fast = HedgePolicy(min_samples=1, min_delay=0.05)
+        fast.record("whois.example", 0.001)
+        self.assertEqual(fast.delay_for("whois.example"), 0.05)
+
+    def test_budget(self):
+        policy = HedgePolicy(budget=0.5)
+        policy.queries = 4
+        self.assertTrue(policy.has_budget())
+        policy.count_hedge()
+        policy.count_hedge()
+        self.assertFalse(policy.has_budget())
+
+
+def first_connection_stalls(delay):
+    connections = 0
+
+    async def handler(reader, writer):
+        nonlocal connections
+        connections += 1
+        query = (await reader.readline()).decode().strip()
+        if connections == 1:
+            await asyncio.sleep(delay)
+        writer.write(f"Domain Name: {query}\nConnection: {connections}\n".encode())
+        await writer.drain()
+
+    return handler
+
+
+class TestNICClientHedging(unittest.IsolatedAsyncioTestCase):
+    def policy(self):
+        policy = HedgePolicy(min_samples=1, min_delay=0.05, budget=1)
+        policy.record("127.0.0.1", 0.01)
+        return policy
+
+    async def test_hedge_wins_over_a_stalled_query(self):
+        client = NICClient(hedging=self.policy())
+        server = LocalServer(first_connection_stalls(2))
+        async with server as hostname:
+            started = time.monotonic()
+            response = await client.whois("example.com", hostname, 0)
+            elapsed = time.monotonic() - started
+
+        self.assertIn("Connection: 2", response)
+        self.assertLess(elapsed, 1)
+        self.assertEqual(server.connections, 2)
+        self.assertEqual(client.hedging.stats()["hedge_wins"], 1)
+
+    async def test_hedges_are_counted_against_the_server_limit(self):
+        limits = ServerLimits(initial=1, maximum=1)
+        client = NICClient(hedging=self.policy(), limits=limits)
+        server = LocalServer(first_connection_stalls(0.3))
+        async with server as hostname:
+            response = await client.whois("example.com", hostname, 0)
+
+        self.assertIn("Connection: 1", response)
+        self.assertEqual(server.connections, 1)
+        self.assertEqual(client.hedging.stats()["hedges"], 0)
+        self.assertEqual(limits.get("127.0.0.1").in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
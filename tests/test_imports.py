@@ -0,0 +1,36 @@
+import subprocess
+import sys
+import unittest
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_heavy_modules_load_on_first_use(self):
+        code = (
+            "import sys, async43\n"
+            "heavy = ['tldextract', 'rapidfuzz', 'text_scrubber', 'pydantic', 'dns.resolver', 'async43.servers']\n"
+            "print(sorted(name for name in heavy if name in sys.modules))\n"
+            "from async43 import DnsInfo, SoaRecord, Whois, parse, resolve_dns_bundle\n"
+            "from async43.parser import parse as parser_parse\n"
+            "from async43.model import Whois as ModelWhois\n"
+            "print(parse is parser_parse, Whois is ModelWhois, 'pydantic' in sys.modules)\n"
+        )
+        process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(process.stdout.splitlines(), ["[]", "True True True"])
+
+    def test_extractor_is_kept(self):
+        code = (
+            "import sys, async43\n"
+            "print('tldextract' in sys.modules)\n"
+            "print(async43.extractor('www.example.co.uk').suffix, 'tldextract' in sys.modules)\n"
+        )
+        process = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(process.stdout.splitlines(), ["False", "co.uk True"])
+
+    def test_unknown_attribute(self):
+        import async43
+        with self.assertRaises(AttributeError):
+            getattr(async43, "no_such_name")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from async43 import WhoisClient
+from async43.bulk import BulkResult, BulkRunner
+from async43.cli import main
+from async43.exceptions import WhoisDomainNotFoundError, WhoisNetworkError
+from async43.journal import BulkJournal
+from tests.fakes import FakeClient, identity, make_whois
+
+
+class TestBulkJournal(unittest.TestCase):
+    def test_outcomes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "journal.sqlite")
+            journal = BulkJournal(path, sync_interval=3600)
+            journal.record(BulkResult("example.com", whois=make_whois("example.com")))
+            journal.record(BulkResult("missing.com", error=WhoisDomainNotFoundError("No match")))
+            journal.record(BulkResult("down.com", error=WhoisNetworkError("unreachable")))
+            journal.close()
+
+            journal = BulkJournal(path)
+            self.assertTrue(journal.is_done("example.com"))
+            self.assertTrue(journal.is_done("missing.com"))
+            self.assertFalse(journal.is_done("down.com"))
+            self.assertFalse(journal.is_done("other.com"))
+            self.assertEqual(journal.counts(), {"done": 1, "failed": 1, "retry": 1})
+            journal.close()
+
+    def test_sync_interval(self):
+        synced = []
+        with tempfile.TemporaryDirectory() as directory:
+            journal = BulkJournal(os.path.join(directory, "journal.sqlite"), sync_interval=0,
+                                  before_sync=lambda: synced.append(True))
+            journal.record(BulkResult("example.com", whois=make_whois("example.com")))
+            self.assertEqual(synced, [True])
+            journal.close()
+        self.assertEqual(synced, [True])
+
+
+class TestResume(unittest.IsolatedAsyncioTestCase):
+    async def test_interrupted_run_resumes(self):
+        queries = ["a.com", "b.com", "missing.com", "down.com", "c.com"]
+        with tempfile.TemporaryDirectory() as directory, patch("async43.extract_domain", identity):
+            path = os.path.join(directory, "journal.sqlite")
+
+            # The consumer stops after handling two results
+            journal = BulkJournal(path)
+            handled = []
+            results = BulkRunner(FakeClient(), concurrency=1, journal=journal).run(queries)
+            async for result in results:
+                handled.append(result.query)
+                if len(handled) == 2:
+                    break
+            await results.aclose()
+            journal.close()
+            self.assertEqual(handled, ["a.com", "b.com"])
+
+            # b.com was handed out but the consumer never asked for more: it runs again
+            journal = BulkJournal(path)
+            client = FakeClient(down={"down.com"})
+            results = [result async for result in BulkRunner(client, journal=journal).run(queries)]
+            journal.close()
+            self.assertEqual(sorted(client.calls), ["b.com", "c.com", "down.com", "missing.com"])
+            self.assertEqual(journal.skipped, 1)
+            self.assertEqual(len(results), 4)
+
+            # Only the network failure is tried again
+            journal = BulkJournal(path)
+            client = FakeClient()
+            results = [result async for result in BulkRunner(client, journal=journal).run(queries)]
+            journal.close()
+            self.assertEqual(client.calls, ["down.com"])
+            self.assertTrue(results[0].ok)
+
+
+class TestCliResume(unittest.TestCase):
+    def test_output_is_appended(self):
+        async def fake_whois(self, domain, flags=0):
+            return make_whois(domain)
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "domains.txt")
+            output = os.path.join(directory, "results.ndjson")
+            journal = os.path.join(directory, "journal.sqlite")
+            with open(source, "w", encoding="utf-8") as fd:
+                fd.write("a.com\nb.com\n")
+
+            with patch("async43.extract_domain", identity), patch.object(WhoisClient, "whois", fake_whois):
+                main([source, "-o", output, "-q", "--journal", journal])
+                with open(source, "a", encoding="utf-8") as fd:
+                    fd.write("c.com\n")
+                main([source, "-o", output, "-q", "--journal", journal])
+
+            with open(output, encoding="utf-8") as fd:
+                queries = [json.loads(line)["query"] for line in fd]
+        self.assertEqual(sorted(queries), ["a.com", "b.com", "c.com"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import asyncio
+import unittest
+
+from async43.exceptions import WhoisQuotaExceededError
+from async43.net.limits import AdaptiveLimit, LatencyStats, ServerLimits
+from async43.whois import NICClient
+from tests.server import LocalServer
+
+
+class TestLatencyStats(unittest.TestCase):
+    def test_percentiles(self):
+        stats = LatencyStats(window=100)
+        self.assertIsNone(stats.percentile(90))
+        for value in range(1, 101):
+            stats.record(value / 100)
+        self.assertEqual(stats.percentile(50), 0.51)
+        self.assertEqual(stats.percentile(95), 0.96)
+        self.assertEqual(stats.percentile(100), 1.0)
+
+
+class TestAdaptiveLimit(unittest.TestCase):
+    def test_additive_increase(self):
+        limit = AdaptiveLimit(initial=2, maximum=4)
+        for _ in range(4):
+            limit.on_success(0.1)
+        self.assertGreater(limit.limit, 3)
+        for _ in range(100):
+            limit.on_success(0.1)
+        self.assertEqual(limit.limit, 4)
+
+    def test_slow_answers_do_not_grow_the_limit(self):
+        limit = AdaptiveLimit(initial=2)
+        limit.on_success(0.1)
+        grown = limit.limit
+        limit.on_success(1.0)
+        self.assertEqual(limit.limit, grown)
+
+    def test_multiplicative_decrease_once_per_interval(self):
+        limit = AdaptiveLimit(initial=16, minimum=1, decrease_interval=60)
+        limit.on_error()
+        limit.on_error()
+        self.assertEqual(limit.limit, 8)
+        self.assertEqual(limit.errors, 2)
+
+        limit.decrease_interval = 0
+        for _ in range(10):
+            limit.on_error()
+        self.assertEqual(limit.limit, 1)
+
+
+class TestServerLimits(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_is_bounded(self):
+        limits = ServerLimits(initial=2, maximum=2)
+        active = 0
+        peak = 0
+
+        async def query():
+            nonlocal active, peak
+            async with limits.slot("whois.example"):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(query() for _ in range(10)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(limits.stats()["whois.example"]["successes"], 10)
+
+    async def test_quota_error_shrinks_the_limit(self):
+        limits = ServerLimits(initial=8)
+        with self.assertRaises(WhoisQuotaExceededError):
+            async with limits.slot("whois.example"):
+                raise WhoisQuotaExceededError("limit")
+        self.assertEqual(limits.get("whois.example").limit, 4)
+
+        with self.assertRaises(ValueError):
+            async with limits.slot("whois.example"):
+                raise ValueError("not a server signal")
+        self.assertEqual(limits.get("whois.example").limit, 4)
+        self.assertEqual(limits.get("whois.example").in_flight, 0)
+
+
+async def answer(reader, writer):
+    await reader.readline()
+    writer.write(b"Domain Name: EXAMPLE.COM\n")
+    await writer.drain()
+
+
+async def throttle(reader, writer):
+    await reader.readline()
+    writer.write(b"Query rate exceeded\n")
+    await writer.drain()
+
+
+class TestNICClientLimits(unittest.IsolatedAsyncioTestCase):
+    async def test_statistics_are_kept_per_server(self):
+        client = NICClient(limits=ServerLimits(initial=2))
+        async with LocalServer(answer) as hostname:
+            await client.whois("example.com", hostname, 0)
+            await client.whois("example.com", hostname, 0)
+
+        stats = client.server_stats()["127.0.0.1"]
+        self.assertEqual(stats["successes"], 2)
+        self.assertGreater(stats["limit"], 2)
+        self.assertIsNotNone(stats["p50"])
+
+    async def test_quota_reply_is_a_decrease_signal(self):
+        client = NICClient(limits=ServerLimits(initial=4))
+        async with LocalServer(throttle) as hostname:
+            with self.assertRaises(WhoisQuotaExceededError):
+                await client.whois("example.com", hostname, 0)
+
+        self.assertEqual(client.server_stats()["127.0.0.1"]["limit"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
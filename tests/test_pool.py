@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+
+from async43.net.pool import SessionPool
+from async43.whois import NICClient
+from tests.server import LocalServer
+
+
+async def ripe_handler(reader, writer):
+    """RIPE-like server: persistent after -k, closes after one query otherwise."""
+    persistent = False
+    while True:
+        line = (await reader.readline()).decode().strip()
+        if not line or line == "-k":
+            return
+        if line.startswith("-k "):
+            persistent = True
+            line = line[3:]
+        writer.write(
+            f"% Information related to '{line}'\n\ninetnum:        {line}\nnetname:        TEST\n\n"
+            "% This query was served by the stand-in\n\n\n".encode()
+        )
+        await writer.drain()
+        if not persistent:
+            return
+
+
+class TestSessionPool(unittest.IsolatedAsyncioTestCase):
+    async def test_queries_share_one_connection(self):
+        server = LocalServer(ripe_handler)
+        async with server as hostname:
+            client = NICClient(session_pool=SessionPool(hosts=["127.0.0.1"]))
+            first = await client.whois("193.0.6.139", hostname, 0)
+            second = await client.whois("193.0.6.140", hostname, 0)
+            await client.close()
+
+        self.assertEqual(server.connections, 1)
+        self.assertIn("inetnum:        193.0.6.139", first)
+        self.assertIn("netname:        TEST", first)
+        self.assertTrue(first.endswith("% This query was served by the stand-in\n"))
+        self.assertIn("inetnum:        193.0.6.140", second)
+
+    async def test_concurrent_queries_are_bounded(self):
+        server = LocalServer(ripe_handler)
+        async with server as hostname:
+            client = NICClient(session_pool=SessionPool(hosts=["127.0.0.1"], max_sessions=2))
+            answers = await asyncio.gather(*(client.whois(f"10.0.0.{i}", hostname, 0) for i in range(10)))
+            await client.close()
+
+        self.assertEqual(server.connections, 2)
+        for i, answer in enumerate(answers):
+            self.assertIn(f"10.0.0.{i}\n", answer)
+
+    async def test_reconnect_after_server_closed_session(self):
+        async def one_query_handler(reader, writer):
+            line = (await reader.readline()).decode().strip()
+            writer.write(f"inetnum: {line[3:]}\n\n\n".encode())
+            await writer.drain()
+
+        server = LocalServer(one_query_handler)
+        async with server as hostname:
+            client = NICClient(session_pool=SessionPool(hosts=["127.0.0.1"]))
+            await client.whois("10.0.0.1", hostname, 0)
+            await asyncio.sleep(0.05)
+            answer = await client.whois("10.0.0.2", hostname, 0)
+            await client.close()
+
+        self.assertEqual(server.connections, 2)
+        self.assertIn("10.0.0.2", answer)
+
+    async def test_idle_sessions_expire(self):
+        server = LocalServer(ripe_handler)
+        async with server as hostname:
+            client = NICClient(session_pool=SessionPool(hosts=["127.0.0.1"], idle_timeout=0))
+            await client.whois("10.0.0.1", hostname, 0)
+            await asyncio.sleep(0.01)
+            await client.whois("10.0.0.2", hostname, 0)
+            await client.close()
+
+        self.assertEqual(server.connections, 2)
+
+    async def test_other_servers_are_not_pooled(self):
+        pool = SessionPool()
+        self.assertTrue(pool.supports("WHOIS.RIPE.NET"))
+        self.assertFalse(pool.supports("whois.verisign-grs.com"))
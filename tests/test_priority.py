@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from async43.bulk import BulkRunner
+from async43.exceptions import WhoisDeadlineExceededError
+from async43.net.limits import AdaptiveLimit, ServerLimits
+from async43.net.priority import BACKGROUND, INTERACTIVE, current_priority, priority
+from tests.fakes import FakeClient, FakeNICClient, identity
+
+
+class TestPriorityContext(unittest.IsolatedAsyncioTestCase):
+    async def test_lookups_are_interactive_by_default(self):
+        self.assertEqual(current_priority().lane, INTERACTIVE)
+        with priority(BACKGROUND, 12.0):
+            self.assertEqual(current_priority(), (BACKGROUND, 12.0))
+            # Tasks inherit the priority of their creator
+            lane = await asyncio.create_task(asyncio.sleep(0, current_priority().lane))
+            self.assertEqual(lane, BACKGROUND)
+        self.assertEqual(current_priority().lane, INTERACTIVE)
+
+
+class TestPriorityLanes(unittest.IsolatedAsyncioTestCase):
+    async def test_share_is_reserved_for_interactive_lookups(self):
+        limit = AdaptiveLimit(initial=4, maximum=4, reserved_share=0.25)
+        self.assertEqual(limit.capacity(BACKGROUND), 3)
+        for _ in range(3):
+            await limit.acquire(BACKGROUND)
+
+        waiting = asyncio.create_task(limit.acquire(BACKGROUND))
+        await asyncio.sleep(0)
+        self.assertFalse(waiting.done())
+
+        await asyncio.wait_for(limit.acquire(INTERACTIVE), 1)
+        self.assertEqual(limit.in_flight, 4)
+
+        limit.release(BACKGROUND)
+        await asyncio.wait_for(waiting, 1)
+        self.assertEqual(limit.background_in_flight, 3)
+
+    async def test_waiters_are_served_by_lane_then_deadline(self):
+        limit = AdaptiveLimit(initial=1, maximum=1)
+        await limit.acquire(INTERACTIVE)
+        served = []
+
+        async def wait(name, lane, deadline=None):
+            await limit.acquire(lane, deadline)
+            served.append(name)
+            limit.release(lane)
+
+        loop = asyncio.get_running_loop()
+        tasks = [
+            asyncio.create_task(wait("bulk", BACKGROUND)),
+            asyncio.create_task(wait("late", INTERACTIVE, loop.time() + 20)),
+            asyncio.create_task(wait("urgent", INTERACTIVE, loop.time() + 10)),
+        ]
+        await asyncio.sleep(0)
+        limit.release(INTERACTIVE)
+        await asyncio.gather(*tasks)
+        self.assertEqual(served, ["urgent", "late", "bulk"])
+
+    async def test_deadline_exceeded_while_waiting(self):
+        limit = AdaptiveLimit(initial=1, maximum=1)
+        await limit.acquire(INTERACTIVE)
+        loop = asyncio.get_running_loop()
+        with self.assertRaises(WhoisDeadlineExceededError):
+            await limit.acquire(INTERACTIVE, loop.time() + 0.01)
+
+        limit.release(INTERACTIVE)
+        self.assertEqual(limit.in_flight, 0)
+        await asyncio.wait_for(limit.acquire(BACKGROUND), 1)
+
+    async def test_slot_uses_the_context_priority(self):
+        limits = ServerLimits(initial=2, maximum=2, reserved_share=0.5)
+        with priority(BACKGROUND):
+            async with limits.slot("whois.example"):
+                self.assertEqual(limits.get("whois.example").background_in_flight, 1)
+                with self.assertRaises(WhoisDeadlineExceededError):
+                    with priority(BACKGROUND, asyncio.get_running_loop().time() + 0.01):
+                        async with limits.slot("whois.example"):
+                            self.fail("The background share is used up")
+                async with limits.slot("whois.other"):
+                    pass
+            async with limits.slot("whois.example"):
+                pass
+        async with limits.slot("whois.example"):
+            self.assertEqual(limits.get("whois.example").background_in_flight, 0)
+
+
+class RecordingNICClient(FakeNICClient):
+    def __init__(self):
+        self.lanes = []
+
+    async def choose_server(self, domain, timeout=10, registrable=False):
+        self.lanes.append(current_priority().lane)
+        return await super().choose_server(domain, timeout, registrable)
+
+
+class TestBulkPriority(unittest.IsolatedAsyncioTestCase):
+    async def test_server_choice_runs_in_background(self):
+        client = FakeClient()
+        client.nic_client = RecordingNICClient()
+        with patch("async43.extract_domain", identity):
+            results = [result async for result in BulkRunner(client).run(["a.com", "b.de"])]
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(client.nic_client.lanes, [BACKGROUND, BACKGROUND])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+from unittest.mock import patch
+
+from async43 import psl
+from async43.parser.nameservers import is_valid_nameserver_hostname
+
+
+class TestPublicSuffixEngine(unittest.TestCase):
+    def test_split(self):
+        result = psl.extract("https://www.example.co.uk/path")
+        self.assertEqual((result.subdomain, result.domain, result.suffix), ("www", "example", "co.uk"))
+        # Private suffixes are included
+        self.assertEqual(psl.extract("someone.blogspot.com").suffix, "blogspot.com")
+        self.assertEqual(psl.extract("example.invalid").suffix, "")
+
+    def test_bundled_snapshot_only(self):
+        extractor = psl._extractor()
+        self.assertEqual(tuple(extractor.suffix_list_urls), ())
+        self.assertFalse(extractor._cache.enabled)
+
+    def test_memoized(self):
+        psl.extract.cache_clear()
+        with patch.object(psl, "_extractor", wraps=psl._extractor) as extractor:
+            for _ in range(3):
+                self.assertTrue(is_valid_nameserver_hostname("ns1.example.net"))
+        self.assertEqual(extractor.call_count, 1)
+        self.assertEqual(psl.extract.cache_info().hits, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import unittest
+from unittest.mock import patch
+
+from async43.bulk import BulkRunner
+from async43.exceptions import WhoisDomainNotFoundError, WhoisError, WhoisInternalError, WhoisQuotaExceededError
+from async43.net.quota import find_quota_message, parse_retry_after, raise_for_quota
+from async43.parser import parse
+from async43.whois import NICClient
+from tests.fakes import FakeClient, FakeNICClient, identity
+from tests.server import LocalServer
+
+
+class TestQuotaDetection(unittest.TestCase):
+    def test_registry_specific_patterns(self):
+        ripe = "%ERROR:201: access denied for 192.0.2.1\n%\n% Sorry, access from your host has been permanently\n"
+        self.assertEqual(find_quota_message(ripe, "whois.ripe.net"), "%ERROR:201: access denied for 192.0.2.1")
+        denic = "% Error: 55000000002 Connection refused; access control limit reached.\n"
+        self.assertIsNotNone(find_quota_message(denic, "whois.denic.de"))
+
+    def test_generic_patterns_only_apply_to_short_answers(self):
+        self.assertIsNotNone(find_quota_message("WHOIS LIMIT EXCEEDED - SEE WWW.PIR.ORG/WHOIS FOR DETAILS\n"))
+        self.assertIsNotNone(find_quota_message("Too many requests, please slow down.\n", "whois.example"))
+
+        record = "Domain Name: EXAMPLE.COM\n" * 200 + "Sending too many requests may get you blocked.\n"
+        self.assertIsNone(find_quota_message(record, "whois.example"))
+        self.assertIsNone(find_quota_message("Domain Name: EXAMPLE.COM\nRegistrar: Example\n"))
+
+    def test_retry_after(self):
+        self.assertEqual(parse_retry_after("Query rate exceeded, try again in 30 seconds"), 30)
+        self.assertEqual(parse_retry_after("Excessive querying, grace period of 5 minutes"), 300)
+        self.assertEqual(parse_retry_after("Please wait 2h before retrying"), 7200)
+        self.assertIsNone(parse_retry_after("Quota exceeded"))
+
+    def test_raise_for_quota(self):
+        with self.assertRaises(WhoisQuotaExceededError) as context:
+            raise_for_quota("Quota exceeded. Try again after 60 seconds.\n", "whois.nic.it")
+        self.assertEqual(context.exception.server, "whois.nic.it")
+        self.assertEqual(context.exception.retry_after, 60)
+        raise_for_quota("Domain: example.it\n", "whois.nic.it")
+
+    def test_parser_raises_before_not_found(self):
+        with self.assertRaises(WhoisQuotaExceededError):
+            parse("%ERROR:201: access denied for 192.0.2.1\n")
+        with self.assertRaises(WhoisDomainNotFoundError):
+            parse("No match for \"EXAMPLE.TEST\".\n")
+
+    def test_parser_ignores_terms_of_use(self):
+        record = "Domain Name: EXAMPLE.COM\n" * 200 + "Sending too many requests may get you blocked.\n"
+        self.assertIsNone(find_quota_message(record))
+        self.assertEqual(parse(record).domain, "EXAMPLE.COM")
+
+
+async def throttled(reader, writer):
+    await reader.readline()
+    writer.write(b"Query rate exceeded. Please try again in 10 seconds.\n")
+    await writer.drain()
+
+
+class TestNICClientQuota(unittest.IsolatedAsyncioTestCase):
+    async def test_quota_reply_raises_with_server(self):
+        client = NICClient()
+        async with LocalServer(throttled) as hostname:
+            with self.assertRaises(WhoisQuotaExceededError) as context:
+                await client.whois("example.com", hostname, 0)
+
+        self.assertEqual(context.exception.server, "127.0.0.1")
+        self.assertEqual(context.exception.retry_after, 10)
+
+
+class TestBulkRunner(unittest.IsolatedAsyncioTestCase):
+    async def test_quota_replies_are_requeued(self):
+        client = FakeClient(throttled={"throttled.test"})
+        runner = BulkRunner(client, concurrency=2)
+        with patch("async43.extract_domain", identity):
+            results = {result.query: result async for result in runner.run(
+                ["throttled.test", "fine.test", "missing.test"]
+            )}
+
+        self.assertEqual(results["throttled.test"].whois.domain, "throttled.test")
+        self.assertEqual(results["throttled.test"].attempts, 2)
+        self.assertEqual(results["fine.test"].whois.domain, "fine.test")
+        self.assertIsInstance(results["missing.test"].error, WhoisDomainNotFoundError)
+        self.assertFalse(results["missing.test"].ok)
+        # The requeued query waited for the backoff while the others went on
+        self.assertEqual(client.calls[-1], "throttled.test")
+
+    async def test_query_fails_after_max_attempts(self):
+        client = FakeClient()
+
+        async def always_throttled(domain, flags=0):
+            raise WhoisQuotaExceededError("limit", server="whois.example", retry_after=0)
+
+        client.whois = always_throttled
+        runner = BulkRunner(client, max_attempts=3)
+        with patch("async43.extract_domain", identity):
+            results = [result async for result in runner.run(["throttled.test"])]
+
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0].error, WhoisQuotaExceededError)
+        self.assertEqual(results[0].attempts, 3)
+
+    async def test_throttled_registrar_is_backed_off(self):
+        class RegistryNICClient(FakeNICClient):
+            async def choose_server(self, domain, timeout=10, registrable=False):
+                return "whois.registry"
+
+        client = FakeClient()
+        client.nic_client = RegistryNICClient()
+
+        async def registrar_throttled(domain, flags=0):
+            client.calls.append(domain)
+            if domain == "throttled.test" and client.calls.count(domain) == 1:
+                raise WhoisQuotaExceededError("limit", server="whois.registrar", retry_after=0.1)
+            return domain
+
+        client.whois = registrar_throttled
+        runner = BulkRunner(client, concurrency=1, per_server=1)
+        with patch("async43.extract_domain", identity):
+            results = {result.query: result async for result in runner.run(
+                ["throttled.test", "a.test", "b.test"]
+            )}
+            # The registrar is backed off from, not the registry
+            self.assertGreater(runner.backoff_until("whois.registrar"), 0)
+            self.assertEqual(runner.backoff_until("whois.registry"), 0)
+
+        self.assertEqual(results["throttled.test"].attempts, 2)
+        self.assertEqual(results["throttled.test"].server, "whois.registry")
+        self.assertEqual(client.calls, ["throttled.test", "a.test", "b.test", "throttled.test"])
+
+    async def test_bad_query_only_fails_itself(self):
+        client = FakeClient()
+
+        async def encoding_whois(domain, flags=0):
+            if domain == "broken.test":
+                raise RuntimeError("bug")
+            return domain.encode("idna").decode()
+
+        client.whois = encoding_whois
+        too_long = "a" * 64 + ".test"
+        runner = BulkRunner(client)
+        with patch("async43.extract_domain", identity):
+            results = {result.query: result async for result in runner.run(
+                ["good.test", too_long, "broken.test", "other.test"]
+            )}
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(results["good.test"].ok)
+        self.assertTrue(results["other.test"].ok)
+        self.assertIsInstance(results[too_long].error, WhoisError)
+        self.assertNotIsInstance(results[too_long].error, WhoisInternalError)
+        self.assertIsInstance(results[too_long].error.__cause__, UnicodeError)
+        self.assertIsInstance(results["broken.test"].error, WhoisInternalError)
+
+    async def test_bad_query_fails_while_choosing_its_server(self):
+        class EncodingNICClient(FakeNICClient):
+            async def choose_server(self, domain, timeout=10, registrable=False):
+                domain.encode("idna")
+                return "whois.example"
+
+        client = FakeClient()
+        client.nic_client = EncodingNICClient()
+        too_long = "a" * 64 + ".test"
+        runner = BulkRunner(client)
+        with patch("async43.extract_domain", identity):
+            results = {result.query: result async for result in runner.run(["good.test", too_long])}
+
+        self.assertTrue(results["good.test"].ok)
+        self.assertIsInstance(results[too_long].error.__cause__, UnicodeError)
+        self.assertEqual(results[too_long].attempts, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
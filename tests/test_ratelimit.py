@@ -0,0 +1,29 @@
+import asyncio
+import time
+import unittest
+
+from async43.net.ratelimit import TokenBucket
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, burst=3)
+        self.assertEqual([bucket.try_take() for _ in range(3)], [0.0, 0.0, 0.0])
+        wait = bucket.try_take()
+        self.assertGreater(wait, 0.05)
+        self.assertLessEqual(wait, 0.1)
+
+    async def test_acquire_paces_lookups(self):
+        bucket = TokenBucket(rate=50, burst=1)
+        started = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(6)))
+        # The first token is there, the five others take 1/50s each
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+    def test_rate_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
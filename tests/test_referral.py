@@ -0,0 +1,58 @@
+import unittest
+
+from async43.net.referral import Referral, parse_referral, scan_referral, split_host_port
+from async43.whois import NICClient
+
+
+class TestReferral(unittest.TestCase):
+    def test_registrar_whois_server(self):
+        buf = (
+            "   Domain Name: GOOGLE.COM\n"
+            "   Registry Domain ID: 2138514_DOMAIN_COM-VRSN\n"
+            "   Registrar WHOIS Server: whois.markmonitor.com\n"
+            "   Registrar URL: http://www.markmonitor.com\n"
+        )
+        self.assertEqual(scan_referral(buf, "whois.verisign-grs.com"), Referral("whois.markmonitor.com"))
+        self.assertEqual(NICClient.findwhois_server(buf, "whois.verisign-grs.com", "google.com"),
+                         "whois.markmonitor.com")
+
+    def test_referral_server_url(self):
+        buf = "NetRange:       2.0.0.0 - 2.255.255.255\nReferralServer:  whois://whois.ripe.net\n"
+        self.assertEqual(scan_referral(buf, "whois.arin.net"), Referral("whois.ripe.net"))
+
+    def test_referral_with_port(self):
+        buf = "ReferralServer: whois://whois.example.net:4343\n"
+        referral = scan_referral(buf, "whois.arin.net")
+        self.assertEqual(referral, Referral("whois.example.net", 4343))
+        self.assertEqual(str(referral), "whois.example.net:4343")
+
+    def test_unusable_referrals_are_skipped(self):
+        buf = (
+            "ReferralServer: rwhois://rwhois.example.net:4321\n"
+            "Whois Server: https://whois.example.net/lookup\n"
+            "Registrar WHOIS Server: \n"
+            "Whois Server: whois.registrar.test\n"
+        )
+        self.assertEqual(scan_referral(buf, "whois.arin.net"), Referral("whois.registrar.test"))
+
+    def test_self_referral_is_ignored(self):
+        buf = "Registrar WHOIS Server: whois.markmonitor.com\n"
+        self.assertIsNone(scan_referral(buf, "whois.markmonitor.com"))
+
+    def test_arin_fallback_to_rir_mention(self):
+        buf = "This block is managed by APNIC, see whois.apnic.net for details.\n"
+        self.assertEqual(scan_referral(buf, "whois.arin.net"), Referral("whois.apnic.net"))
+        self.assertIsNone(scan_referral(buf, "whois.verisign-grs.com"))
+
+    def test_split_host_port(self):
+        self.assertEqual(split_host_port("whois.example.net"), ("whois.example.net", 43))
+        self.assertEqual(split_host_port("127.0.0.1:4343"), ("127.0.0.1", 4343))
+        self.assertEqual(split_host_port("[2001:db8::1]:4343"), ("2001:db8::1", 4343))
+        self.assertEqual(split_host_port("2001:db8::1"), ("2001:db8::1", 43))
+        with self.assertRaises(ValueError):
+            split_host_port("whois.example.net:http")
+
+    def test_parse_referral(self):
+        self.assertEqual(parse_referral("WHOIS.Example.NET."), Referral("whois.example.net"))
+        self.assertIsNone(parse_referral("http://www.example.net"))
+        self.assertIsNone(parse_referral("whois://whois.example.net/path"))
@@ -0,0 +1,41 @@
+import ipaddress
+import unittest
+
+from async43.net.rir import DelegationIndex, rir_whois_server
+from async43.whois import NICClient
+
+
+class TestDelegationIndex(unittest.TestCase):
+    def test_lookup(self):
+        index = DelegationIndex([
+            ("2.0.0.0/8", "whois.ripe.net"),
+            ("1.0.0.0/8", "whois.apnic.net"),
+            ("3.0.0.0/8", "whois.ripe.net"),
+            ("5.0.0.0/8", "whois.ripe.net"),
+        ])
+        # 2/8 and 3/8 are merged, 5/8 is not adjacent
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.lookup(ipaddress.ip_address("1.2.3.4")), "whois.apnic.net")
+        self.assertEqual(index.lookup(ipaddress.ip_address("3.255.255.255")), "whois.ripe.net")
+        self.assertIsNone(index.lookup(ipaddress.ip_address("4.0.0.1")))
+        self.assertIsNone(index.lookup(ipaddress.ip_address("0.0.0.1")))
+        self.assertIsNone(index.lookup(ipaddress.ip_address("6.0.0.1")))
+
+    def test_bundled_table(self):
+        self.assertEqual(rir_whois_server("193.0.6.139"), "whois.ripe.net")
+        self.assertEqual(rir_whois_server("202.12.29.1"), "whois.apnic.net")
+        self.assertEqual(rir_whois_server("200.3.14.10"), "whois.lacnic.net")
+        self.assertEqual(rir_whois_server("196.216.2.1"), "whois.afrinic.net")
+        self.assertEqual(rir_whois_server("8.8.8.8"), "whois.arin.net")
+        self.assertEqual(rir_whois_server("2001:67c:2e8::1"), "whois.ripe.net")
+        self.assertEqual(rir_whois_server("2607:f8b0:4006:802::200e"), "whois.arin.net")
+        self.assertEqual(rir_whois_server("::ffff:193.0.6.139"), "whois.ripe.net")
+        self.assertIsNone(rir_whois_server("10.0.0.1"))
+
+
+class TestChooseServerForIP(unittest.IsolatedAsyncioTestCase):
+    async def test_ip_goes_to_rir(self):
+        client = NICClient()
+        self.assertEqual(await client.choose_server("193.0.6.139"), "whois.ripe.net")
+        self.assertEqual(await client.choose_server("2a00:1450:4007:80e::200e"), "whois.ripe.net")
+        self.assertEqual(await client.choose_server("240.0.0.1"), NICClient.ANICHOST)
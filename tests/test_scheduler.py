@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from async43.bulk import BulkRunner, FairScheduler, _Job
+from tests.fakes import FakeClient, identity
+
+
+class TestFairScheduler(unittest.TestCase):
+    def setUp(self):
+        self.backoff = {}
+        self.scheduler = FairScheduler(lambda server: 2, lambda server: self.backoff.get(server, 0.0))
+
+    def test_round_robin_across_servers(self):
+        for index in range(3):
+            self.scheduler.push(_Job(f"de{index}", server="whois.denic.de"))
+        self.scheduler.push(_Job("com0", server="whois.verisign-grs.com"))
+        self.scheduler.push(_Job("com1", server="whois.verisign-grs.com"))
+
+        order = [self.scheduler.pop(0).query for _ in range(4)]
+        self.assertEqual(order, ["de0", "com0", "de1", "com1"])
+        # Both servers are at capacity
+        self.assertIsNone(self.scheduler.pop(0))
+        self.assertEqual(len(self.scheduler), 1)
+
+    def test_capacity_is_freed_when_done(self):
+        jobs = [_Job(f"de{index}", server="whois.denic.de") for index in range(3)]
+        for job in jobs:
+            self.scheduler.push(job)
+        first = self.scheduler.pop(0)
+        self.scheduler.pop(0)
+        self.assertIsNone(self.scheduler.pop(0))
+        self.scheduler.done(first)
+        self.assertEqual(self.scheduler.pop(0).query, "de2")
+
+    def test_backed_off_server_is_skipped(self):
+        self.backoff["whois.denic.de"] = 10.0
+        self.scheduler.push(_Job("de0", server="whois.denic.de"))
+        self.scheduler.push(_Job("com0", server="whois.verisign-grs.com"))
+        self.assertEqual(self.scheduler.pop(0).query, "com0")
+        self.assertIsNone(self.scheduler.pop(0))
+        self.assertEqual(self.scheduler.next_wakeup(0), 10.0)
+        self.assertEqual(self.scheduler.pop(10).query, "de0")
+
+    def test_waiting_job_does_not_hold_up_its_server(self):
+        self.scheduler.push(_Job("de0", server="whois.denic.de", ready_at=5.0))
+        self.scheduler.push(_Job("de1", server="whois.denic.de"))
+        self.assertEqual(self.scheduler.pop(0).query, "de1")
+        self.assertIsNone(self.scheduler.pop(0))
+        self.assertEqual(self.scheduler.pop(5).query, "de0")
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_throttled_job_waits_for_the_throttling_server(self):
+        self.backoff["whois.registrar"] = 5.0
+        job = _Job("com0", server="whois.registry", throttled_by="whois.registrar")
+        self.scheduler.push(job)
+        self.scheduler.push(_Job("com1", server="whois.registry"))
+        self.assertEqual(self.scheduler.pop(0).query, "com1")
+        self.assertIsNone(self.scheduler.pop(0))
+        self.assertIs(self.scheduler.pop(5), job)
+
+        # Throttled again while running: its slot is freed on the queue it was taken from
+        job.throttled_by = "whois.other"
+        self.scheduler.done(job)
+        self.assertEqual(self.scheduler._in_flight, {"whois.registry": 1, "whois.registrar": 0})
+
+
+class SlowDenicClient(FakeClient):
+    async def whois(self, domain, flags=0):
+        await asyncio.sleep(0.2 if domain.endswith(".de") else 0.01)
+        return await super().whois(domain, flags)
+
+
+class TestBulkRunnerFairness(unittest.IsolatedAsyncioTestCase):
+    async def test_slow_server_only_delays_its_own_queries(self):
+        client = SlowDenicClient()
+        runner = BulkRunner(client, concurrency=4, per_server=1)
+        queries = [f"slow{index}.de" for index in range(5)] + [f"fast{index}.com" for index in range(5)]
+        with patch("async43.extract_domain", identity):
+            results = [result async for result in runner.run(queries)]
+
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(result.ok for result in results))
+        # Every .com lookup completes while the first .de ones are still running
+        self.assertEqual(set(client.calls[:5]), {f"fast{index}.com" for index in range(5)})
+        self.assertEqual({result.server for result in results}, {"whois.denic.de", "whois.verisign-grs.com"})
+
+    async def test_input_is_read_lazily(self):
+        client = SlowDenicClient()
+        runner = BulkRunner(client, concurrency=2, max_pending=4)
+        pulled = []
+
+        def queries():
+            for index in range(20):
+                pulled.append(index)
+                yield f"fast{index}.com"
+
+        with patch("async43.extract_domain", identity):
+            results = runner.run(queries())
+            await results.__anext__()
+            self.assertLess(len(pulled), 10)
+            remaining = [result async for result in results]
+        self.assertEqual(len(remaining), 19)
+
+    async def test_async_input_does_not_hold_up_lookups(self):
+        client = SlowDenicClient()
+        runner = BulkRunner(client, concurrency=2)
+        more = asyncio.Event()
+
+        async def queries():
+            yield "fast0.com"
+            await more.wait()
+            yield "fast1.com"
+
+        with patch("async43.extract_domain", identity):
+            results = runner.run(queries())
+            # The first lookup completes while the input waits
+            first = await asyncio.wait_for(results.__anext__(), 1)
+            more.set()
+            remaining = [result async for result in results]
+        self.assertEqual(first.query, "fast0.com")
+        self.assertEqual([result.query for result in remaining], ["fast1.com"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import random
+import socket
+import unittest
+from unittest.mock import patch
+
+from async43.net.scoring import AddressScores
+from async43.whois import NICClient
+from tests.server import LocalServer
+
+
+def addr_info(address, port=43):
+    return socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)
+
+
+class TestAddressScores(unittest.TestCase):
+    def test_best_address_first_and_unknown_addresses_tried(self):
+        scores = AddressScores(epsilon=0)
+        scores.record_success("whois.example", "192.0.2.1", 0.5)
+        scores.record_success("whois.example", "192.0.2.2", 0.05)
+        infos = [addr_info("192.0.2.1"), addr_info("192.0.2.2"), addr_info("192.0.2.3")]
+
+        ordered = [info[4][0] for info in scores.order("whois.example", infos)]
+        self.assertEqual(ordered, ["192.0.2.3", "192.0.2.2", "192.0.2.1"])
+
+    def test_moving_average_and_failure_penalty(self):
+        scores = AddressScores(alpha=0.5, failure_penalty=5)
+        scores.record_success("whois.example", "192.0.2.1", 0.1)
+        scores.record_success("whois.example", "192.0.2.1", 0.3)
+        self.assertAlmostEqual(scores.score("whois.example", "192.0.2.1"), 0.2)
+
+        scores.record_failure("whois.example", "192.0.2.1")
+        self.assertAlmostEqual(scores.score("whois.example", "192.0.2.1"), 0.2 * 3.5)
+        scores.record_success("whois.example", "192.0.2.1", 0.2)
+        self.assertAlmostEqual(scores.stats()["whois.example"]["192.0.2.1"]["error_rate"], 0.25)
+
+    def test_exploration(self):
+        scores = AddressScores(epsilon=1, rng=random.Random(1))
+        scores.record_success("whois.example", "192.0.2.1", 0.01)
+        scores.record_success("whois.example", "192.0.2.2", 1)
+        infos = [addr_info("192.0.2.1"), addr_info("192.0.2.2")]
+        self.assertEqual(scores.order("whois.example", infos)[0][4][0], "192.0.2.2")
+
+
+async def answer(reader, writer):
+    await reader.readline()
+    writer.write(b"Domain Name: EXAMPLE.COM\n")
+    await writer.drain()
+
+
+class TestNICClientAddressScores(unittest.IsolatedAsyncioTestCase):
+    async def test_failing_address_is_moved_back(self):
+        scores = AddressScores(epsilon=0)
+        client = NICClient(address_scores=scores)
+        async with LocalServer(answer) as hostname:
+            port = int(hostname.split(":")[1])
+            infos = [addr_info("127.0.0.2", port), addr_info("127.0.0.1", port)]
+
+            async def open_connection(host, port, local_addr=None):
+                if host == "127.0.0.2":
+                    raise ConnectionRefusedError("refused")
+                return await real_open_connection(host, port, local_addr=local_addr)
+
+            real_open_connection = asyncio.open_connection
+            loop = asyncio.get_running_loop()
+            with patch.object(loop, "getaddrinfo", return_value=infos), \
+                    patch("asyncio.open_connection", open_connection):
+                for _ in range(3):
+                    await client.whois("example.com", f"whois.example:{port}", 0)
+
+        stats = scores.stats()["whois.example"]
+        self.assertEqual(stats["127.0.0.2"]["samples"], 1)
+        self.assertEqual(stats["127.0.0.1"]["samples"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import asyncio
+import os
+import socket
+import struct
+import unittest
+from unittest.mock import patch
+
+from async43.exceptions import WhoisNetworkError
+from async43.net.socks import ProxyPool, SocksProxy
+from async43.whois import NICClient
+from tests.server import LocalServer
+
+
+class SocksStandIn:
+    """
+    Minimal SOCKS5/SOCKS4a server answering WHOIS queries itself once the
+    tunnel is established.
+    """
+
+    def __init__(self, credentials=None, refuse=False):
+        self.credentials = credentials
+        self.refuse = refuse
+        self.destinations = []
+        self.active = 0
+        self.max_active = 0
+
+    async def handle(self, reader, writer):
+        version = (await reader.readexactly(1))[0]
+        if version == 5:
+            host, port = await self._socks5(reader, writer)
+        else:
+            host, port = await self._socks4a(reader, writer)
+        if host is None:
+            return
+
+        self.destinations.append((host, port))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            query = (await reader.readline()).decode().strip()
+            await asyncio.sleep(0.02)
+            writer.write(f"Domain Name: {query}\nServer: {host}\n".encode())
+            await writer.drain()
+        finally:
+            self.active -= 1
+
+    async def _socks5(self, reader, writer):
+        methods = await reader.readexactly((await reader.readexactly(1))[0])
+        if self.credentials:
+            if 2 not in methods:
+                writer.write(b"\x05\xff")
+                return None, None
+            writer.write(b"\x05\x02")
+            await reader.readexactly(1)
+            username = (await reader.readexactly((await reader.readexactly(1))[0])).decode()
+            password = (await reader.readexactly((await reader.readexactly(1))[0])).decode()
+            if (username, password) != self.credentials:
+                writer.write(b"\x01\x01")
+                return None, None
+            writer.write(b"\x01\x00")
+        else:
+            writer.write(b"\x05\x00")
+
+        _, command, _, address_type = await reader.readexactly(4)
+        assert command == 1
+        if address_type == 3:
+            host = (await reader.readexactly((await reader.readexactly(1))[0])).decode()
+        elif address_type == 1:
+            host = socket.inet_ntop(socket.AF_INET, await reader.readexactly(4))
+        else:
+            host = socket.inet_ntop(socket.AF_INET6, await reader.readexactly(16))
+        port = struct.unpack("!H", await reader.readexactly(2))[0]
+
+        if self.refuse:
+            writer.write(b"\x05\x05\x00\x01" + bytes(6))
+            return None, None
+        writer.write(b"\x05\x00\x00\x01" + bytes(6))
+        return host, port
+
+    @staticmethod
+    async def _socks4a(reader, writer):
+        command = (await reader.readexactly(1))[0]
+        assert command == 1
+        port = struct.unpack("!H", await reader.readexactly(2))[0]
+        address = await reader.readexactly(4)
+        await reader.readuntil(b"\x00")
+        if address[:3] == b"\x00\x00\x00":
+            host = (await reader.readuntil(b"\x00"))[:-1].decode()
+        else:
+            host = socket.inet_ntoa(address)
+        writer.write(b"\x00\x5a" + bytes(6))
+        return host, port
+
+
+def proxy_for(address, **kwargs):
+    host, port = address.split(":")
+    return SocksProxy(host, int(port), **kwargs)
+
+
+class TestSocks(unittest.IsolatedAsyncioTestCase):
+    async def test_socks5(self):
+        stand_in = SocksStandIn()
+        async with LocalServer(stand_in.handle) as address:
+            client = NICClient(proxies=ProxyPool([proxy_for(address)]))
+            response = await client.whois("example.com", "whois.example.test", 0)
+
+        self.assertIn("Domain Name: example.com", response)
+        self.assertEqual(stand_in.destinations, [("whois.example.test", 43)])
+
+    async def test_socks5_authentication(self):
+        stand_in = SocksStandIn(credentials=("user", "secret"))
+        async with LocalServer(stand_in.handle) as address:
+            client = NICClient(proxies=ProxyPool([proxy_for(address, username="user", password="secret")]))
+            response = await client.whois("example.com", "whois.example.test:4343", 0)
+
+            self.assertIn("Domain Name: example.com", response)
+            self.assertEqual(stand_in.destinations, [("whois.example.test", 4343)])
+
+            client = NICClient(proxies=ProxyPool([proxy_for(address, username="user", password="wrong")]))
+            with self.assertRaises(WhoisNetworkError):
+                await client.whois("example.com", "whois.example.test", 0)
+
+    async def test_socks4a(self):
+        stand_in = SocksStandIn()
+        async with LocalServer(stand_in.handle) as address:
+            client = NICClient(proxies=ProxyPool([proxy_for(address, version=4)]))
+            response = await client.whois("example.com", "whois.example.test", 0)
+
+        self.assertIn("Domain Name: example.com", response)
+        self.assertEqual(stand_in.destinations, [("whois.example.test", 43)])
+
+    async def test_concurrency_limit(self):
+        stand_in = SocksStandIn()
+        async with LocalServer(stand_in.handle) as address:
+            client = NICClient(proxies=ProxyPool([proxy_for(address, max_connections=2)]))
+            await asyncio.gather(*(client.whois(f"example{i}.com", "whois.example.test", 0) for i in range(6)))
+
+        self.assertEqual(len(stand_in.destinations), 6)
+        self.assertEqual(stand_in.max_active, 2)
+
+    async def test_cancelled_handshake_frees_its_slot(self):
+        stand_in = SocksStandIn()
+        answering = asyncio.Event()
+
+        async def handle(reader, writer):
+            # Hold the first handshakes until they are cancelled
+            if not answering.is_set():
+                await answering.wait()
+                return
+            await stand_in.handle(reader, writer)
+
+        async with LocalServer(handle) as address:
+            pool = ProxyPool([proxy_for(address, max_connections=2)])
+            tasks = [asyncio.create_task(pool.open_connection("whois.example.test", 43, 10)) for _ in range(3)]
+            await asyncio.sleep(0.1)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            answering.set()
+
+            self.assertEqual(pool.health()[f"socks5://{address}"]["in_use"], 0)
+            _, writer = await asyncio.wait_for(pool.open_connection("whois.example.test", 43, 10), 1)
+            writer.close()
+
+    async def test_failing_proxy_is_taken_out_of_rotation(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            dead = SocksProxy("127.0.0.1", sock.getsockname()[1])
+
+        stand_in = SocksStandIn()
+        async with LocalServer(stand_in.handle) as address:
+            pool = ProxyPool([dead, proxy_for(address)], max_failures=1, cooldown=60)
+            client = NICClient(proxies=pool)
+            await client.whois("example.com", "whois.example.test", 0)
+            await client.whois("example.org", "whois.example.test", 0)
+
+        health = pool.health()
+        self.assertFalse(health[str(dead)]["healthy"])
+        self.assertEqual(health[str(dead)]["consecutive_failures"], 1)
+        self.assertEqual(health[f"socks5://{address}"]["successes"], 2)
+        self.assertEqual(health[f"socks5://{address}"]["in_use"], 0)
+
+    async def test_target_refused_does_not_hurt_proxy_health(self):
+        stand_in = SocksStandIn(refuse=True)
+        async with LocalServer(stand_in.handle) as address:
+            pool = ProxyPool([proxy_for(address)], max_failures=1)
+            with self.assertRaises(WhoisNetworkError):
+                await NICClient(proxies=pool).whois("example.com", "whois.example.test", 0)
+
+        self.assertTrue(pool.health()[f"socks5://{address}"]["healthy"])
+
+    def test_proxy_from_url(self):
+        proxy = SocksProxy.from_url("user:p%40ss@proxy.example:9050")
+        self.assertEqual((proxy.host, proxy.port, proxy.username, proxy.password, proxy.version),
+                         ("proxy.example", 9050, "user", "p@ss", 5))
+        self.assertEqual(SocksProxy.from_url("socks4a://proxy.example:1080").version, 4)
+        with self.assertRaises(ValueError):
+            SocksProxy.from_url("http://proxy.example:8080")
+
+    def test_socks_environment_variable(self):
+        with patch.dict(os.environ, {"SOCKS": "proxy.example:9050"}):
+            client = NICClient()
+        self.assertEqual(list(client.proxies.health()), ["socks5://proxy.example:9050"])
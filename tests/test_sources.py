@@ -0,0 +1,80 @@
+import socket
+import unittest
+from unittest.mock import patch
+
+from async43.exceptions import WhoisQuotaExceededError
+from async43.net.sources import SourceAddressPool
+from async43.whois import NICClient
+from tests.server import LocalServer
+
+
+class TestSourceAddressPool(unittest.TestCase):
+    def test_least_recently_used_address_is_picked(self):
+        pool = SourceAddressPool(["192.0.2.1", "192.0.2.2", "2001:db8::1"])
+        picked = [pool.acquire("whois.example", socket.AF_INET) for _ in range(4)]
+        self.assertEqual(picked, ["192.0.2.1", "192.0.2.2", "192.0.2.1", "192.0.2.2"])
+        self.assertEqual(pool.acquire("whois.example", socket.AF_INET6), "2001:db8::1")
+
+    def test_families(self):
+        pool = SourceAddressPool(["192.0.2.1"])
+        self.assertTrue(pool.has_family(socket.AF_INET))
+        self.assertFalse(pool.has_family(socket.AF_INET6))
+        self.assertIsNone(pool.acquire("whois.example", socket.AF_INET6))
+
+    def test_quota_takes_address_out_of_rotation_for_that_server(self):
+        pool = SourceAddressPool(["192.0.2.1", "192.0.2.2"], cooldown=60)
+        pool.report_quota("192.0.2.1", "whois.example")
+
+        self.assertEqual(pool.acquire("whois.example", socket.AF_INET), "192.0.2.2")
+        self.assertEqual(pool.acquire("whois.example", socket.AF_INET), "192.0.2.2")
+        self.assertEqual(pool.acquire("whois.other", socket.AF_INET), "192.0.2.1")
+        self.assertTrue(pool.stats()["192.0.2.1"]["whois.example"]["cooling_down"])
+
+        pool.report_quota("192.0.2.2", "whois.example", retry_after=30)
+        self.assertIsNone(pool.acquire("whois.example", socket.AF_INET))
+        self.assertAlmostEqual(pool.next_available_in("whois.example", socket.AF_INET), 30, delta=1)
+
+    def test_max_queries_per_window(self):
+        pool = SourceAddressPool(["192.0.2.1"], max_queries=2, window=60)
+        self.assertEqual(pool.acquire("whois.example", socket.AF_INET), "192.0.2.1")
+        self.assertEqual(pool.acquire("whois.example", socket.AF_INET), "192.0.2.1")
+        self.assertIsNone(pool.acquire("whois.example", socket.AF_INET))
+        self.assertEqual(pool.stats()["192.0.2.1"]["whois.example"]["queries"], 2)
+
+    def test_unknown_source_is_ignored(self):
+        pool = SourceAddressPool(["192.0.2.1"])
+        pool.report_quota("198.51.100.1", "whois.example")
+        pool.report_quota("not an address", "whois.example")
+        self.assertEqual(pool.acquire("whois.example", socket.AF_INET), "192.0.2.1")
+
+
+async def echo_peer(reader, writer):
+    await reader.readline()
+    writer.write(f"peer: {writer.get_extra_info('peername')[0]}\n".encode())
+    await writer.drain()
+
+
+class TestNICClientSourcePool(unittest.IsolatedAsyncioTestCase):
+    async def test_queries_are_sent_from_pool_addresses(self):
+        pool = SourceAddressPool(["127.0.0.1"])
+        client = NICClient(source_pool=pool)
+        async with LocalServer(echo_peer) as hostname:
+            response = await client.whois("example.com", hostname, 0)
+
+        self.assertIn("peer: 127.0.0.1", response)
+        self.assertEqual(pool.stats()["127.0.0.1"]["127.0.0.1"]["queries"], 1)
+
+    async def test_exhausted_pool_raises_quota_error(self):
+        pool = SourceAddressPool(["127.0.0.1"])
+        client = NICClient(source_pool=pool)
+        client.report_quota("127.0.0.1", "127.0.0.1")
+
+        async with LocalServer(echo_peer) as hostname:
+            with patch("asyncio.open_connection") as open_connection:
+                with self.assertRaises(WhoisQuotaExceededError):
+                    await client.whois("example.com", hostname, 0)
+        open_connection.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
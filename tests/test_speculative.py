@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from async43.exceptions import WhoisNetworkError
+from async43.whois import NICClient
+
+
+def delayed(result, delay):
+    async def answer(*_args, **_kwargs):
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return answer
+
+
+class TestSpeculativeProbing(unittest.IsolatedAsyncioTestCase):
+    async def test_probe_wins_and_is_learned(self):
+        client = NICClient(speculative=True)
+        iana = AsyncMock(side_effect=delayed("whois.nic.pizza", 0.2))
+        with patch.object(client, "findwhois_iana", iana), \
+                patch.object(client, "_probe_nic_server", AsyncMock(side_effect=delayed("whois.nic.pizza", 0))):
+            self.assertEqual(await client.choose_server("example.pizza"), "whois.nic.pizza")
+            self.assertEqual(await client.choose_server("other.pizza"), "whois.nic.pizza")
+        self.assertEqual(iana.await_count, 1)
+        self.assertEqual(client.learned_servers, {"pizza": "whois.nic.pizza"})
+
+    async def test_iana_corrects_probe(self):
+        client = NICClient(speculative=True)
+        with patch.object(client, "findwhois_iana", AsyncMock(side_effect=delayed("whois.registry.pizza", 0.05))), \
+                patch.object(client, "_probe_nic_server", AsyncMock(return_value="whois.nic.pizza")):
+            self.assertEqual(await client.choose_server("example.pizza"), "whois.nic.pizza")
+            await asyncio.sleep(0.1)
+        self.assertEqual(client.learned_servers["pizza"], "whois.registry.pizza")
+
+    async def test_iana_wins_when_probe_fails(self):
+        client = NICClient(speculative=True)
+        with patch.object(client, "findwhois_iana", AsyncMock(side_effect=delayed("whois.registry.pizza", 0.05))), \
+                patch.object(client, "_probe_nic_server", AsyncMock(return_value=None)):
+            self.assertEqual(await client.choose_server("example.pizza"), "whois.registry.pizza")
+
+    async def test_iana_error_raised_when_probe_fails(self):
+        client = NICClient(speculative=True)
+        with patch.object(client, "findwhois_iana", AsyncMock(side_effect=WhoisNetworkError("down"))), \
+                patch.object(client, "_probe_nic_server", AsyncMock(side_effect=delayed(None, 0.01))):
+            with self.assertRaises(WhoisNetworkError):
+                await client.choose_server("example.pizza")
+        self.assertEqual(client.learned_servers, {})
+
+    async def test_probe_needs_an_answer(self):
+        client = NICClient()
+        with patch.object(client, "_send_query", AsyncMock(return_value=("Domain Name: EXAMPLE.PIZZA\n", None))):
+            self.assertEqual(await client._probe_nic_server("pizza", "example.pizza", 5), "whois.nic.pizza")
+        with patch.object(client, "_send_query", AsyncMock(return_value=("\r\n", None))):
+            self.assertIsNone(await client._probe_nic_server("pizza", "example.pizza", 5))
+        with patch.object(client, "_send_query", AsyncMock(side_effect=WhoisNetworkError("no such host"))):
+            self.assertIsNone(await client._probe_nic_server("pizza", "example.pizza", 5))
+
+    async def test_quota_reply_does_not_confirm_the_probe(self):
+        client = NICClient()
+        banner = ("Query rate exceeded. Please try again in 10 seconds.\n", None)
+        with patch.object(client, "_send_query", AsyncMock(return_value=banner)):
+            self.assertIsNone(await client._probe_nic_server("pizza", "example.pizza", 5))
+        self.assertEqual(client._probe_answers, {})
+
+    async def test_lookup_reuses_the_probe_answer(self):
+        client = NICClient(speculative=True)
+        answer = ("Domain Name: EXAMPLE.PIZZA\n", None)
+        send_query = AsyncMock(return_value=answer)
+        with patch.object(client, "findwhois_iana", AsyncMock(side_effect=delayed("whois.nic.pizza", 0.2))), \
+                patch.object(client, "_send_query", send_query):
+            result = await client.whois_lookup(None, "example.pizza", NICClient.WHOIS_QUICK)
+            self.assertEqual(result, answer[0])
+            self.assertEqual(send_query.await_count, 1)
+
+            # Later lookups query the learned server
+            await client.whois_lookup(None, "other.pizza", NICClient.WHOIS_QUICK)
+            self.assertEqual(send_query.await_count, 2)
+            await asyncio.sleep(0.25)
+
+    async def test_not_speculative_by_default(self):
+        client = NICClient()
+        probe = AsyncMock()
+        with patch.object(client, "findwhois_iana", AsyncMock(return_value="whois.registry.pizza")), \
+                patch.object(client, "_probe_nic_server", probe):
+            self.assertEqual(await client.choose_server("example.pizza"), "whois.registry.pizza")
+        probe.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from async43.net.suffixes import SuffixIndex, suffix_whois_server
+from async43.whois import NICClient
+
+
+class TestSuffixIndex(unittest.TestCase):
+    def test_longest_suffix_wins(self):
+        index = SuffixIndex({
+            "uk": "whois.nic.uk",
+            "ac.uk": "whois.ja.net",
+            "com": "whois.verisign-grs.com",
+            "br.com": "whois.centralnic.com",
+        })
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.lookup("www.ox.ac.uk"), ("ac.uk", "whois.ja.net"))
+        self.assertEqual(index.lookup("example.co.uk"), ("uk", "whois.nic.uk"))
+        self.assertEqual(index.lookup("Example.BR.com."), ("br.com", "whois.centralnic.com"))
+        self.assertEqual(index.lookup("example.com"), ("com", "whois.verisign-grs.com"))
+        self.assertEqual(index.lookup("com"), ("com", "whois.verisign-grs.com"))
+        self.assertEqual(index.lookup("example.pizza"), (None, None))
+
+    def test_bundled_table(self):
+        self.assertEqual(suffix_whois_server("example.co.uk"), ("co.uk", "whois.nic.uk"))
+        self.assertEqual(suffix_whois_server("xn--e1afmkfd.xn--p1ai"), ("xn--p1ai", "whois.ripn.net"))
+
+
+class TestChooseServerForDomain(unittest.IsolatedAsyncioTestCase):
+    async def test_table_match_needs_no_network(self):
+        client = NICClient()
+        with patch.object(client, "findwhois_iana", AsyncMock(side_effect=AssertionError)):
+            self.assertEqual(await client.choose_server("www.ox.ac.uk"), "whois.ja.net")
+            self.assertEqual(await client.choose_server("пример.рф"), "whois.ripn.net")
+
+    async def test_unlisted_tld_asks_iana(self):
+        client = NICClient()
+        iana = AsyncMock(return_value="whois.nic.pizza")
+        with patch.object(client, "findwhois_iana", iana):
+            self.assertEqual(await client.choose_server("www.example.pizza"), "whois.nic.pizza")
+            self.assertEqual(await client.choose_server("example.123"), NICClient.ANICHOST)
+        iana.assert_awaited_once_with("pizza", timeout=10)
+
+    async def test_names_under_no_public_suffix_have_no_server(self):
+        client = NICClient()
+        iana = AsyncMock(return_value="whois.example")
+        with patch.object(client, "findwhois_iana", iana):
+            self.assertIsNone(await client.choose_server("host.internal"))
+            self.assertIsNone(await client.choose_server("localhost"))
+            # The caller vouches for the suffix, the list is not checked
+            with patch("async43.whois.psl.extract", side_effect=AssertionError):
+                self.assertEqual(await client.choose_server("example.pizza", registrable=True), "whois.example")
+        iana.assert_awaited_once_with("pizza", timeout=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
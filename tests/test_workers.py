@@ -0,0 +1,152 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+import unittest
+from functools import partial
+from unittest.mock import patch
+
+from async43.bulk import BulkResult
+from async43.cli import main
+from async43.exceptions import WhoisDomainNotFoundError, WhoisInternalError
+from async43.journal import BulkJournal
+from async43.workers import SharedServerLimits, SharedTokenBucket, ShardedRunner, _read_batches
+from tests.fakes import FakeClient, make_whois
+
+CONTEXT = multiprocessing.get_context("spawn")
+
+
+class BrokenClient(FakeClient):
+    async def __aenter__(self):
+        raise RuntimeError("no client")
+
+
+def take_tokens(bucket, count):
+    for _ in range(count):
+        while bucket.try_take():
+            time.sleep(0.001)
+
+
+class TestSharedLimits(unittest.TestCase):
+    def test_server_slots(self):
+        limits = SharedServerLimits(2, context=CONTEXT)
+        self.assertTrue(limits.try_acquire("whois.example"))
+        self.assertTrue(limits.try_acquire("whois.example"))
+        self.assertFalse(limits.try_acquire("whois.example"))
+        self.assertTrue(limits.try_acquire("whois.other"))
+        limits.release("whois.example")
+        self.assertTrue(limits.try_acquire("whois.example"))
+
+    def test_backoff(self):
+        limits = SharedServerLimits(2, context=CONTEXT)
+        self.assertEqual(limits.backoff_remaining("whois.example"), 0)
+        limits.back_off("whois.example", 30)
+        self.assertGreater(limits.backoff_remaining("whois.example"), 29)
+        limits.back_off("whois.example", 10)
+        self.assertGreater(limits.backoff_remaining("whois.example"), 29)
+        self.assertEqual(limits.backoff_remaining("whois.other"), 0)
+
+    def test_bucket_is_shared(self):
+        bucket = SharedTokenBucket(20, burst=5, context=CONTEXT)
+        started = time.monotonic()
+        processes = [CONTEXT.Process(target=take_tokens, args=(bucket, 10)) for _ in range(2)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        # 5 tokens of burst, then 15 at 20 per second, where separate buckets would take 0.25s
+        self.assertGreaterEqual(time.monotonic() - started, 0.7)
+
+
+class TestReadBatches(unittest.IsolatedAsyncioTestCase):
+    async def test_waiting_for_input_does_not_block_the_loop(self):
+        inputs = queue.Queue()
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        threading.Timer(0.2, lambda: (inputs.put(["a.com", "b.com"]), inputs.put(None))).start()
+        queries = [query async for query in _read_batches(inputs)]
+        ticker.cancel()
+        self.assertEqual(queries, ["a.com", "b.com"])
+        self.assertGreater(ticks, 5)
+
+
+class TestShardedRunner(unittest.TestCase):
+    def test_results_are_merged(self):
+        queries = [f"domain{index}.com" for index in range(50)] + ["missing.com"]
+        runner = ShardedRunner(workers=2, client_factory=FakeClient, batch_size=7)
+        results = list(runner.run(queries))
+        self.assertEqual(sorted(result.query for result in results), sorted(queries))
+        failed = [result for result in results if not result.ok]
+        self.assertEqual([result.query for result in failed], ["missing.com"])
+        self.assertIsInstance(failed[0].error, WhoisDomainNotFoundError)
+        self.assertEqual(results[0].server, "whois.verisign-grs.com")
+
+    def test_per_server_limit_is_shared(self):
+        in_flight, peak = CONTEXT.Value("i", 0), CONTEXT.Value("i", 0)
+        runner = ShardedRunner(
+            workers=2,
+            client_factory=partial(FakeClient, in_flight=in_flight, peak=peak),
+            concurrency=4,
+            per_server=2,
+            batch_size=5,
+        )
+        results = list(runner.run(f"domain{index}.com" for index in range(30)))
+        self.assertEqual(len(results), 30)
+        self.assertEqual(peak.value, 2)
+
+    def test_journal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = BulkJournal(os.path.join(directory, "journal.sqlite"))
+            journal.record(BulkResult("a.com", whois=make_whois("a.com")))
+            runner = ShardedRunner(workers=2, client_factory=FakeClient, journal=journal)
+            results = list(runner.run(["a.com", "b.com"]))
+            journal.close()
+        self.assertEqual([result.query for result in results], ["b.com"])
+        self.assertEqual(journal.skipped, 1)
+
+    def test_close_terminates_workers(self):
+        results = ShardedRunner(workers=2, client_factory=FakeClient).run(f"domain{index}.com" for index in range(1000))
+        self.assertTrue(next(results).ok)
+        results.close()
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_worker_failure(self):
+        runner = ShardedRunner(workers=1, client_factory=BrokenClient)
+        with self.assertRaises(WhoisInternalError):
+            list(runner.run(["a.com"]))
+
+
+class TestCliWorkers(unittest.TestCase):
+    def test_workers_option(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "domains.txt")
+            output = os.path.join(directory, "results.ndjson")
+            with open(source, "w", encoding="utf-8") as fd:
+                fd.write("".join(f"domain{index}.com\n" for index in range(20)))
+
+            with patch("async43.cli.make_client", make_fake_client):
+                self.assertEqual(main([source, "-o", output, "-q", "--workers", "2"]), 0)
+
+            with open(output, encoding="utf-8") as fd:
+                records = [json.loads(line) for line in fd]
+        self.assertEqual(len(records), 20)
+        self.assertTrue(all(record["ok"] for record in records))
+
+
+def make_fake_client(timeout=10, prefer_ipv6=False):
+    return FakeClient()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Regenerate ``async43/delegations.py`` from local copies of the IANA registries.
+
+Download the CSV files of these registries first:
+
+- https://www.iana.org/assignments/ipv4-address-space/ipv4-address-space.csv
+- https://www.iana.org/assignments/ipv6-unicast-address-assignments/ipv6-unicast-address-assignments.csv
+
+Usage: python tools/update_delegations.py ipv4-address-space.csv ipv6-unicast-address-assignments.csv
+"""
+import csv
+import ipaddress
+import sys
+from pathlib import Path
+
+OUTPUT = Path(__file__).resolve().parent.parent / "async43" / "delegations.py"
+
+
+def read_registry(path: str) -> list[tuple[str, str]]:
+    """
+    Read an IANA address space CSV file.
+
+    :param path: Path of the CSV file.
+    :return: (network, whois server) pairs for every block with a WHOIS server.
+    """
+    delegations = []
+    with open(path, encoding="utf-8", newline="") as fd:
+        for row in csv.DictReader(fd):
+            whois_server = (row.get("WHOIS") or "").strip().lower()
+            if not whois_server:
+                continue
+
+            prefix = row["Prefix"].strip()
+            if "." not in prefix and ":" not in prefix:
+                # The IPv4 registry lists blocks as "001/8"
+                first_octet, length = prefix.split("/")
+                prefix = f"{int(first_octet)}.0.0.0/{length}"
+
+            network = ipaddress.ip_network(prefix)
+            delegations.append((str(network), whois_server))
+
+    return sorted(delegations, key=lambda item: ipaddress.ip_network(item[0]))
+
+
+def render(ipv4: list[tuple[str, str]], ipv6: list[tuple[str, str]]) -> str:
+    """Render the content of the delegations module."""
+    lines = [
+        "# Generated by tools/update_delegations.py from the IANA IPv4 address space",
+        "# and IPv6 unicast address assignments registries. Do not edit by hand.",
+        "IPV4_DELEGATIONS = [",
+    ]
+    lines.extend(f"    ('{network}', '{server}')," for network, server in ipv4)
+    lines.append("]")
+    lines.append("")
+    lines.append("IPV6_DELEGATIONS = [")
+    lines.extend(f"    ('{network}', '{server}')," for network, server in ipv6)
+    lines.append("]")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str]) -> int:
+    """Entry point."""
+    if len(argv) != 3:
+        print(__doc__.strip(), file=sys.stderr)
+        return 1
+
+    ipv4 = read_registry(argv[1])
+    ipv6 = read_registry(argv[2])
+    OUTPUT.write_text(render(ipv4, ipv6), encoding="utf-8")
+    print(f"Wrote {len(ipv4)} IPv4 and {len(ipv6)} IPv6 delegations to {OUTPUT}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
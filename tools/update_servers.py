@@ -0,0 +1,89 @@
+"""
+Regenerate ``async43/servers.py`` from a local copy of the zonedb database.
+
+Download ``metadata/zones.json`` from https://github.com/zonedb/zonedb first.
+Servers that IANA gave for TLDs missing from the database can be folded in
+from an IANA cache (see ``async43.cache.default_iana_cache``) with ``--iana-cache``.
+
+Usage: python tools/update_servers.py zones.json [--iana-cache ~/.cache/async43/iana.sqlite]
+"""
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+OUTPUT = Path(__file__).resolve().parent.parent / "async43" / "servers.py"
+
+
+def read_zonedb(path: str) -> dict[str, str]:
+    """
+    Read a zonedb ``zones.json`` file.
+
+    :param path: Path of the JSON file.
+    :return: WHOIS server of every zone that has one.
+    """
+    with open(path, encoding="utf-8") as fd:
+        data = json.load(fd)
+
+    zones = data.get("zones", data)
+    servers = {}
+    for zone, metadata in zones.items():
+        whois_server = (metadata.get("whoisServer") or "").strip().lower()
+        if whois_server:
+            servers[zone.strip(".").lower()] = whois_server
+    return servers
+
+
+def read_iana_cache(path: str) -> dict[str, str]:
+    """
+    Read the servers recorded in an IANA cache database, expired ones included.
+
+    :param path: Path of the SQLite database.
+    :return: WHOIS server of every TLD that has one.
+    """
+    with sqlite3.connect(path) as db:
+        rows = db.execute("SELECT key, value FROM iana").fetchall()
+    servers = {}
+    for tld, value in rows:
+        whois_server = json.loads(value)
+        if whois_server:
+            servers[tld] = whois_server.lower()
+    return servers
+
+
+def render(servers: dict[str, str]) -> str:
+    """Render the content of the servers module."""
+    lines = [
+        "# pylint: disable=too-many-lines",
+        "# extracted from https://github.com/zonedb/zonedb",
+        "WHOIS_SERVERS = {",
+    ]
+    entries = [f"    '{zone}': '{server}'" for zone, server in sorted(servers.items())]
+    lines.append(",\n".join(entries))
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str]) -> int:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("zones", help="zonedb zones.json file")
+    parser.add_argument("--iana-cache", help="IANA cache database to take servers missing from zonedb from")
+    args = parser.parse_args(argv[1:])
+
+    servers = read_zonedb(args.zones)
+    learned = 0
+    if args.iana_cache:
+        for tld, whois_server in read_iana_cache(args.iana_cache).items():
+            if tld not in servers:
+                servers[tld] = whois_server
+                learned += 1
+
+    OUTPUT.write_text(render(servers), encoding="utf-8")
+    print(f"Wrote {len(servers)} servers to {OUTPUT}, {learned} of them from the IANA cache")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))